@@ -6,7 +6,7 @@ import wget
 script_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.join(os.path.dirname(script_dir), 'utils'))
 
-from rocotostat import rocoto_statcount, rocotostat_summary, is_done, is_stalled, CommandNotFoundError
+from rocotostat import rocoto_statcount, rocotostat_summary, rocoto_status_from_database, is_done, is_stalled, CommandNotFoundError
 from wxflow import which
 
 test_data_url = 'https://noaa-nws-global-pds.s3.amazonaws.com/data/CI/'
@@ -52,6 +52,17 @@ def test_rocoto_summary():
     assert result['CYCLES_DONE'] == 1
 
 
+def test_rocoto_status_from_database():
+
+    result = rocoto_status_from_database(os.path.join(testdata_full_path, 'workflow.xml'),
+                                         os.path.join(testdata_full_path, 'database.db'))
+
+    assert result == {**rocoto_statcount(rocotostat_cmd), **rocotostat_summary(rocotostat_cmd)}
+    assert result['SUCCEEDED'] == 20
+    assert result['CYCLES_TOTAL'] == 1
+    assert result['CYCLES_DONE'] == 1
+
+
 def test_rocoto_done():
 
     result = rocotostat_summary(rocotostat_cmd)
@@ -86,4 +97,9 @@ def test_rocoto_stalled():
     assert result['SUCCEEDED'] == 11
     assert is_stalled(result)
 
+    result = rocoto_status_from_database(xml, db)
+
+    assert result['SUCCEEDED'] == 11
+    assert is_stalled(result)
+
     rmtree(testdata_full_path)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the generation of an ensemble ecFlow suite.
+
+A GEFS-like suite (initial conditions, then for each member a forecast, atmos
+and wave products triggered by the forecast of the member, and ensemble
+statistics and archiving triggered by all of them) is generated with
+Ecflowsetup for a range of ensemble sizes.  The time per node should not grow
+with the number of members; the exit status is 1 if the time per node of the
+largest suite exceeds that of the smallest one by more than the tolerance.
+
+Usage:
+    benchmark_ecflow.py                      # 30-member suite, and smaller/larger ones
+    benchmark_ecflow.py --members 10 30 120
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+
+import yaml
+
+_here = os.path.dirname(os.path.abspath(__file__))
+HOMEgfs = os.sep.join(_here.split(os.sep)[:-3])
+
+
+def input_args():
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    args : Namespace
+        The parsed command-line arguments.
+    """
+
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0], formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('--members', nargs='+', type=int, default=[15, 30, 60, 120],
+                        help='ensemble sizes to generate the suite for')
+    parser.add_argument('--repeat', type=int, default=3, help='number of generations of each suite (the fastest is kept)')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='relative increase of the time per node reported as non-linear scaling')
+
+    return parser.parse_args()
+
+
+def ensemble_config(nmem):
+    """
+    ensemble_config Build the ecFlow generator configuration of an ensemble suite.
+
+    Input:
+    nmem - Number of ensemble members.
+
+    Output:
+    config - The configuration, as read from a YAML file by Ecflowsetup.
+    """
+
+    member_tasks = {
+        'tasks': {
+            f'jgefs_fcst_mem({nmem})': {'template': 'skip',
+                                        'edits': {'ENSMEM': '( )'},
+                                        'triggers': [{'task': 'jgefs_stage_ic'}],
+                                        'events': ['release_prod']},
+        }
+    }
+    product_tasks = {
+        'tasks': {
+            f'jgefs_atmos_prod_mem({nmem})': {'template': 'skip',
+                                              'edits': {'ENSMEM': '( )', 'COMPONENT': 'atmos'},
+                                              'triggers': [{'task': 'jgefs_fcst_mem( )'}]},
+            f'jgefs_wave_post_mem({nmem})': {'template': 'skip',
+                                             'edits': {'ENSMEM': '( )'},
+                                             'triggers': [{'task': 'jgefs_fcst_mem( )',
+                                                           'state': ['active', 'complete'],
+                                                           'operand': 'OR'}]},
+        }
+    }
+
+    return {
+        'suites': {
+            'gefs': {
+                'edits': {'CYC': '00'},
+                'nodes': {
+                    'gefs': {
+                        'edits': {'NET': 'gefs', 'RUN': 'gefs'},
+                        'init': {'tasks': {'jgefs_stage_ic': {'template': 'skip'}}},
+                        'forecast': member_tasks,
+                        'products': product_tasks,
+                        'ensstat': {'tasks': {'jgefs_atmos_ensstat': {'template': 'skip',
+                                                                      'triggers': [{'task': f'jgefs_atmos_prod_mem({nmem})'}]}}},
+                        'archive': {'tasks': {'jgefs_arch': {'template': 'skip',
+                                                             'triggers': [{'family': 'gefs/products'},
+                                                                          {'task': 'jgefs_atmos_ensstat'}]}}},
+                    }
+                }
+            }
+        }
+    }
+
+
+def generate_suite(nmem, workdir):
+    """
+    generate_suite Generate and save the ensemble suite.
+
+    Output:
+    seconds - Time to generate and save the suite.
+    nodes - Number of tasks and families in the suite.
+    """
+
+    from ecFlow.ecflow_setup import Ecflowsetup
+
+    config_file = os.path.join(workdir, f'ecflow_gefs_{nmem}.yml')
+    with open(config_file, 'w') as fh:
+        yaml.safe_dump(ensemble_config(nmem), fh, sort_keys=False)
+
+    class EcflowArgs:
+        ecflow_config = config_file
+        savedir = workdir
+
+    env_configs = {'base': {'ECFgfs': os.path.join(workdir, f'ecf_{nmem}'), 'ACCOUNT': 'benchmark',
+                            'QUEUE': 'batch', 'machine': 'benchmark', 'RUN_ENVIR': 'emc'}}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        workflow = Ecflowsetup(EcflowArgs, env_configs)
+        workflow.generate_workflow()
+        workflow.save()
+        seconds = time.perf_counter() - start
+
+    suite = workflow.suite_array['gefs']
+    return seconds, len(suite.ecf_nodes)
+
+
+if __name__ == '__main__':
+
+    args = input_args()
+
+    sys.path.insert(0, os.path.join(HOMEgfs, 'workflow'))
+    try:
+        import ecflow  # noqa: F401
+    except ImportError:
+        print('The ecflow module is not available, nothing to benchmark')
+        sys.exit(0)
+
+    per_node = {}
+    with tempfile.TemporaryDirectory(prefix='benchmark_ecflow_') as workdir:
+        for nmem in sorted(args.members):
+            seconds, nodes = min(generate_suite(nmem, workdir) for _ in range(args.repeat))
+            per_node[nmem] = seconds / nodes
+            print(f'{nmem:4d} members: {nodes:6d} nodes in {seconds:7.3f} s ({1.e6 * per_node[nmem]:8.1f} us/node)')
+
+    smallest, largest = min(per_node), max(per_node)
+    if per_node[largest] > per_node[smallest] * (1. + args.tolerance):
+        print(f'Non-linear scaling: {1.e6 * per_node[smallest]:.1f} us/node with {smallest} members, '
+              f'{1.e6 * per_node[largest]:.1f} us/node with {largest} members')
+        sys.exit(1)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the generation of experiments and compare with stored baselines.
+
+Representative experiments (GFS cycled, GFS forecast-only, GEFS and SFS) are
+generated with setup_expt.py and setup_xml.py for each host under
+workflow/hosts, each in its own process.  For every case and host, the wall
+time, the peak resident memory and the time of each phase (setup_expt, config
+sourcing, task building, XML assembly and, when the ecflow module is
+available, the ecFlow suite) are recorded.
+
+Usage:
+    benchmark_workflow.py --save-baseline baseline.json      # record a baseline
+    benchmark_workflow.py --baseline baseline.json           # compare with it
+
+The exit status is 1 if any case failed or regressed beyond the tolerance.
+"""
+
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter, SUPPRESS
+
+_here = os.path.dirname(os.path.abspath(__file__))
+HOMEgfs = os.sep.join(_here.split(os.sep)[:-3])
+
+IDATE = '2021032312'
+EDATE = '2021032412'
+
+CASES = {
+    'gfs_cycled': ['gfs', 'cycled', '--app', 'S2SW', '--resdetatmos', '96', '--resensatmos', '48',
+                   '--nens', '2', '--idate', IDATE, '--edate', EDATE],
+    'gfs_forecast-only': ['gfs', 'forecast-only', '--app', 'S2SW', '--resdetatmos', '48',
+                          '--idate', IDATE, '--edate', EDATE],
+    'gefs': ['gefs', 'forecast-only', '--app', 'S2SWA', '--resdetatmos', '48', '--resensatmos', '48',
+             '--nens', '10', '--idate', IDATE, '--edate', EDATE],
+    'sfs': ['sfs', 'forecast-only', '--app', 'S2S', '--resdetatmos', '96', '--resensatmos', '96',
+            '--nens', '10', '--idate', IDATE, '--edate', EDATE],
+}
+
+HOSTS = sorted(os.path.splitext(host)[0].upper() for host in os.listdir(os.path.join(HOMEgfs, 'workflow', 'hosts'))
+               if host.endswith('.yaml'))
+
+# Metrics compared with the baseline, and the smallest increase reported as a regression
+METRICS = {'wall_time': 0.5,
+           'peak_rss_mb': 50.,
+           'setup_expt': 0.2,
+           'config_sourcing': 0.2,
+           'task_building': 0.1,
+           'xml_assembly': 0.1,
+           'ecflow': 0.2}
+
+
+def input_args():
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    args : Namespace
+        The parsed command-line arguments.
+    """
+
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0], formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES), help='cases to generate')
+    parser.add_argument('--hosts', nargs='+', choices=HOSTS, default=HOSTS, help='hosts to generate the cases for')
+    parser.add_argument('--baseline', help='baseline JSON file to compare with', default=None)
+    parser.add_argument('--save-baseline', help='save the results as a baseline JSON file', default=None)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative increase over the baseline reported as a regression')
+    parser.add_argument('--workdir', help='directory to generate the experiments in (default: a temporary directory)')
+    parser.add_argument('--run-case', nargs=3, metavar=('CASE', 'HOST', 'RESULT'), help=SUPPRESS)
+
+    return parser.parse_args()
+
+
+def run_case(case, host, workdir):
+    """
+    run_case Generate one experiment, timing each phase.
+
+    Run in a process of its own (see benchmark_case), with the host detection
+    overridden so any host under workflow/hosts can be benchmarked anywhere.
+
+    Input:
+    case - Name of the case in CASES.
+    host - Name of the host.
+    workdir - Directory to generate the experiment in.
+
+    Output:
+    result - A dictionary with the phase timings, the number of tasks and the XML size.
+    """
+
+    sys.path.insert(0, os.path.join(HOMEgfs, 'workflow'))
+    import hosts
+    hosts.Host.detect = classmethod(lambda cls: host)
+
+    import setup_expt
+    from applications.application_factory import app_config_factory
+    from applications.cached_configuration import CachedConfiguration
+    from rocoto.rocoto_xml_factory import rocoto_xml_factory
+    from rocoto.workflow_tasks import TaskProfiler
+
+    pslot = f'{case}_{host}'.replace('-', '_')
+    expdir = os.path.join(workdir, 'EXPDIR', pslot)
+    phases = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        setup_expt.main(CASES[case] + ['--pslot', pslot, '--comroot', os.path.join(workdir, 'COMROOT'),
+                                       '--expdir', os.path.join(workdir, 'EXPDIR'), '--icsdir', workdir,
+                                       '--overwrite'])
+        phases['setup_expt'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cfg = CachedConfiguration(expdir)
+        base = cfg.parse_config('config.base')
+        app_config = app_config_factory.create(f"{base['NET']}_{base['MODE']}", cfg)
+        phases['config_sourcing'] = time.perf_counter() - start
+
+        profiler = TaskProfiler()
+        rocoto_config = {'maxtries': 2, 'cyclethrottle': 3, 'taskthrottle': 25, 'verbosity': 10}
+        start = time.perf_counter()
+        xml = rocoto_xml_factory.create(f"{base['NET']}_{base['MODE']}", app_config, rocoto_config)
+        xml.write(xml_file=os.path.join(expdir, f'{pslot}.xml'), crontab_file=os.path.join(expdir, f'{pslot}.crontab'),
+                  profiler=profiler)
+        phases['task_building'] = sum(task[0] for task in profiler.tasks)
+        phases['xml_assembly'] = time.perf_counter() - start - phases['task_building']
+
+        if base['NET'] == 'gfs':
+            phases['ecflow'] = run_ecflow(base, expdir)
+
+    return {'phases': phases,
+            'tasks': len(profiler.tasks),
+            'xml_bytes': os.path.getsize(os.path.join(expdir, f'{pslot}.xml'))}
+
+
+def run_ecflow(base, expdir):
+    """
+    run_ecflow Build and save the ecFlow suite of an experiment.
+
+    The suite is built under the experiment directory, with the scripts
+    deployed there from the ecf/scripts of HOMEgfs.
+
+    Output:
+    seconds - Time to build and save the suite, None if ecflow is not available.
+    """
+
+    try:
+        from ecFlow.ecflow_setup import Ecflowsetup
+    except ImportError:
+        return None
+
+    class EcflowArgs:
+        ecflow_config = os.path.join(HOMEgfs, 'workflow', 'ecflow_build.yml')
+        savedir = expdir
+
+    base = dict(base, ECFgfs=os.path.join(expdir, 'ecf'), scriptrepo=os.path.join(HOMEgfs, 'ecf', 'scripts'))
+
+    start = time.perf_counter()
+    workflow = Ecflowsetup(EcflowArgs, {'base': base})
+    workflow.generate_workflow()
+    workflow.save()
+    return time.perf_counter() - start
+
+
+def benchmark_case(case, host, workdir):
+    """
+    benchmark_case Run run_case in a new process and collect its results.
+
+    Output:
+    result - The result of run_case, plus the wall time and peak RSS of the
+    process, or the error output if it failed.
+    """
+
+    with tempfile.NamedTemporaryFile(suffix='.json', dir=workdir) as result_file:
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-case', case, host, result_file.name],
+                                 stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        wall_time = time.perf_counter() - start
+        if process.returncode != 0:
+            return {'error': process.stdout.strip().splitlines()[-1:] or [f'exit code {process.returncode}']}
+        with open(result_file.name) as fh:
+            result = json.load(fh)
+
+    result['wall_time'] = wall_time
+    return result
+
+
+def compare(result, baseline, tolerance):
+    """
+    compare Compare a result with its baseline.
+
+    Output:
+    regressions - A list of (metric, baseline value, value) of the metrics that
+    increased by more than tolerance (and by more than the minimum of the metric).
+    """
+
+    regressions = []
+    for metric, minimum in METRICS.items():
+        value, reference = flatten(result).get(metric), flatten(baseline).get(metric)
+        if value is None or reference is None:
+            continue
+        if value > reference * (1. + tolerance) and value - reference > minimum:
+            regressions.append((metric, reference, value))
+    return regressions
+
+
+def flatten(result):
+    return {'wall_time': result.get('wall_time'), 'peak_rss_mb': result.get('peak_rss_mb'), **result.get('phases', {})}
+
+
+def print_result(key, result):
+    if 'error' in result:
+        print(f'{key:<32} FAILED: {" ".join(result["error"])}')
+        return
+    phases = ' '.join(f'{name}={seconds:.2f}s' for name, seconds in result['phases'].items() if seconds is not None)
+    print(f'{key:<32} wall={result["wall_time"]:.2f}s rss={result["peak_rss_mb"]:.0f}MB '
+          f'tasks={result["tasks"]} xml={result["xml_bytes"]}B {phases}')
+
+
+if __name__ == '__main__':
+
+    args = input_args()
+
+    if args.run_case:
+        case, host, result_file = args.run_case
+        result = run_case(case, host, os.path.dirname(result_file))
+        result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+        with open(result_file, 'w') as fh:
+            json.dump(result, fh)
+        sys.exit(0)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix='benchmark_workflow_'))
+        os.makedirs(workdir, exist_ok=True)
+
+        results = {}
+        failed = False
+        regressed = False
+        for case in args.cases:
+            for host in args.hosts:
+                key = f'{case}@{host}'
+                results[key] = benchmark_case(case, host, workdir)
+                print_result(key, results[key])
+                if 'error' in results[key]:
+                    failed = True
+                elif key in baseline:
+                    for metric, reference, value in compare(results[key], baseline[key], args.tolerance):
+                        print(f'    REGRESSION {metric}: {reference:.2f} -> {value:.2f}')
+                        regressed = True
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as fh:
+            json.dump({key: result for key, result in results.items() if 'error' not in result}, fh, indent=2)
+
+    sys.exit(1 if failed or regressed else 0)
@@ -3,6 +3,10 @@
 import sys
 import os
 import copy
+import sqlite3
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from time import sleep
 
 from wxflow import which, Logger, CommandNotFoundError, ProcessError
@@ -12,6 +16,21 @@ from collections import Counter
 
 logger = Logger(level=os.environ.get("LOGGING_LEVEL", "DEBUG"), colored_log=False)
 
+status_cases = ['SUCCEEDED', 'FAIL', 'DEAD', 'RUNNING', 'SUBMITTING', 'QUEUED', 'UNAVAILABLE', 'UNKNOWN']
+
+# Job states in the Rocoto database that are reported under another status case
+state_aliases = {'FAILED': 'FAIL'}
+
+# State of the latest job of each task in each cycle, and the done time of every
+# cycle, read in a single statement so both come from the same database snapshot
+status_query = """
+    SELECT 'job', state, COUNT(*) FROM
+        (SELECT state, MAX(id) FROM jobs GROUP BY taskname, cycle)
+        GROUP BY state
+    UNION ALL
+    SELECT 'cycle', cycle, done FROM cycles
+"""
+
 
 def attempt_multiple_times(expression, max_attempts, sleep_duration=0, exception_class=Exception):
     """
@@ -47,11 +66,12 @@ def attempt_multiple_times(expression, max_attempts, sleep_duration=0, exception
     last_exception = None
     while attempt < max_attempts:
         try:
-            pass
             return expression()
-        except exception_class as last_exception:
+        except exception_class as err:
+            last_exception = err
             attempt += 1
-            sleep(sleep_duration)
+            if attempt < max_attempts:
+                sleep(sleep_duration)
     else:
         raise last_exception
 
@@ -67,7 +87,7 @@ def input_args():
     """
 
     description = """
-        Using rocotostat to get the status of all jobs this scripts
+        Reading the Rocoto database (or using rocotostat) to get the status of all jobs this scripts
         determines rocoto_state: if all cycles are done, then rocoto_state is Done.
         Assuming rocotorun had just been run, and the rocoto_state is not Done, then
         rocoto_state is Stalled if there are no jobs that are RUNNING, SUBMITTING, or QUEUED.
@@ -80,6 +100,8 @@ def input_args():
     parser.add_argument('--verbose', action='store_true', help='List the states and the number of jobs that are in each', required=False)
     parser.add_argument('-v', action='store_true', help='List the states and the number of jobs that are in each', required=False)
     parser.add_argument('--export', action='store_true', help='create and export list of the status values for bash', required=False)
+    parser.add_argument('--rocotostat', action='store_true', required=False,
+                        help='use the rocotostat command instead of reading the database directly')
 
     args = parser.parse_args()
 
@@ -136,8 +158,6 @@ def rocoto_statcount(rocotostat):
     rocotostat_output = [line.split()[0:4] for line in rocotostat_output]
     rocotostat_output = [line for line in rocotostat_output if len(line) != 1]
 
-    status_cases = ['SUCCEEDED', 'FAIL', 'DEAD', 'RUNNING', 'SUBMITTING', 'QUEUED', 'UNAVAILABLE', 'UNKNOWN']
-
     rocoto_status = {}
     status_counts = Counter(case for sublist in rocotostat_output for case in sublist)
     for case in status_cases:
@@ -146,6 +166,123 @@ def rocoto_statcount(rocotostat):
     return rocoto_status
 
 
+def parse_interval(interval):
+    """
+    parse_interval Convert a Rocoto cycledef increment to a timedelta.
+
+    Input:
+    interval - Increment in seconds, or as [[dd:]hh:]mm:ss.
+
+    Output:
+    timedelta - The increment.
+    """
+
+    fields = [int(field) for field in interval.split(':')]
+    seconds = 0
+    for field, factor in zip(reversed(fields), (1, 60, 3600, 86400)):
+        seconds += field * factor
+    return timedelta(seconds=seconds)
+
+
+def workflow_cycles(workflow_file):
+    """
+    workflow_cycles Cycles defined by the cycledefs of a workflow document.
+
+    workflow_cycles(workflow_file) parses the workflow XML (expanding its entities)
+    and enumerates the cycles of every 'start end increment' cycledef. Crontab style
+    cycledefs are skipped, their cycles are only known once they are in the database.
+
+    Input:
+    workflow_file - Path to the workflow XML.
+
+    Output:
+    cycles - A set of the cycles as Unix times, as stored in the Rocoto database.
+    """
+
+    cycles = set()
+    for cycledef in ET.parse(workflow_file).getroot().iter('cycledef'):
+        fields = cycledef.text.split()
+        if len(fields) != 3:
+            logger.debug(f"skipping cycledef '{cycledef.text.strip()}', its cycles are read from the database")
+            continue
+        start, end = (datetime.strptime(field, '%Y%m%d%H%M').replace(tzinfo=timezone.utc) for field in fields[:2])
+        increment = parse_interval(fields[2])
+        cycle = start
+        while cycle <= end:
+            cycles.add(int(cycle.timestamp()))
+            if increment <= timedelta(0):
+                break
+            cycle += increment
+    return cycles
+
+
+def read_database(database_file, timeout=30):
+    """
+    read_database Read the job states and cycles from the Rocoto database.
+
+    read_database(database_file) opens the database read-only, so it never takes a
+    write lock from rocotorun, and reads the state of the latest job of every task and
+    the done time of every cycle in one statement, i.e. from one consistent snapshot
+    (in both rollback journal and WAL mode).
+
+    Input:
+    database_file - Path to the Rocoto database.
+    timeout - Seconds to wait for a lock held by rocotorun.
+
+    Output:
+    states - A Counter of the number of jobs in each state.
+    cycles - A dictionary with the done time (0 if not done) of each cycle in the database.
+    """
+
+    uri = f'{Path(database_file).resolve().as_uri()}?mode=ro'
+    connection = sqlite3.connect(uri, uri=True, timeout=timeout)
+    try:
+        rows = connection.execute(status_query).fetchall()
+    finally:
+        connection.close()
+
+    states = Counter()
+    cycles = {}
+    for kind, key, value in rows:
+        if kind == 'job':
+            states[key] += value
+        else:
+            cycles[key] = value or 0
+    return states, cycles
+
+
+def rocoto_status_from_database(workflow_file, database_file):
+    """
+    rocoto_status_from_database Get the status of a workflow without rocotostat.
+
+    rocoto_status_from_database(workflow_file, database_file) returns the same
+    dictionary as rocoto_statcount and rocotostat_summary combined, computed from
+    the workflow XML and the Rocoto database. It takes milliseconds and does not
+    start a rocotostat (ruby) process, so it can be polled often.
+
+    Input:
+    workflow_file - Path to the workflow XML.
+    database_file - Path to the Rocoto database.
+
+    Output:
+    rocoto_status - A dictionary with the count of each status case, the total
+    number of cycles and the number of cycles that are done.
+    """
+
+    states, cycles = attempt_multiple_times(lambda: read_database(database_file), 3, 5, sqlite3.OperationalError)
+
+    rocoto_status = {case: 0 for case in status_cases}
+    for state, count in states.items():
+        case = state_aliases.get(state, state)
+        if case in rocoto_status:
+            rocoto_status[case] += count
+
+    rocoto_status['CYCLES_TOTAL'] = len(workflow_cycles(workflow_file).union(cycles))
+    rocoto_status['CYCLES_DONE'] = sum(1 for done in cycles.values() if done)
+
+    return rocoto_status
+
+
 def is_done(rocoto_status):
     """
     is_done Check if all cycles are done.
@@ -190,23 +327,38 @@ if __name__ == '__main__':
     """
     main Execute the script.
 
-    main() parses the input arguments, checks if the rocotostat command is available,
-    adds default arguments to the rocotostat command, and runs it and reports
-    out to stdout spcific information of rocoto workflow.
+    main() parses the input arguments, reads the status of the workflow from its
+    Rocoto database (or runs rocotostat if requested) and reports out to stdout
+    spcific information of rocoto workflow.
     """
 
     args = input_args()
+    workflow_file = os.path.abspath(args.w.name)
+    database_file = os.path.abspath(args.d.name)
 
-    try:
-        rocotostat = which("rocotostat")
-    except CommandNotFoundError:
-        logger.exception("rocotostat not found in PATH")
-        raise CommandNotFoundError("rocotostat not found in PATH")
+    if args.rocotostat:
+        try:
+            rocotostat = which("rocotostat")
+        except CommandNotFoundError:
+            logger.exception("rocotostat not found in PATH")
+            raise CommandNotFoundError("rocotostat not found in PATH")
+
+        rocotostat.add_default_arg(['-w', workflow_file, '-d', database_file])
+
+        def get_rocoto_status():
+            rocoto_status = rocoto_statcount(rocotostat)
+            rocoto_status.update(rocotostat_summary(rocotostat))
+            return rocoto_status
 
-    rocotostat.add_default_arg(['-w', os.path.abspath(args.w.name), '-d', os.path.abspath(args.d.name)])
+        def recount():
+            return attempt_multiple_times(lambda: rocoto_statcount(rocotostat), 2, 120, ProcessError)
+    else:
+        def get_rocoto_status():
+            return rocoto_status_from_database(workflow_file, database_file)
+
+        recount = get_rocoto_status
 
-    rocoto_status = rocoto_statcount(rocotostat)
-    rocoto_status.update(rocotostat_summary(rocotostat))
+    rocoto_status = get_rocoto_status()
 
     error_return = 0
     if is_done(rocoto_status):
@@ -215,7 +367,7 @@ if __name__ == '__main__':
         error_return = rocoto_status['FAIL'] + rocoto_status['DEAD']
         rocoto_state = 'FAIL'
     elif rocoto_status['UNAVAILABLE'] > 0 or rocoto_status['UNKNOWN'] > 0:
-        rocoto_status = attempt_multiple_times(lambda: rocoto_statcount(rocotostat), 2, 120, ProcessError)
+        rocoto_status.update(recount())
         error_return = 0
         rocoto_state = 'RUNNING'
         if rocoto_status['UNAVAILABLE'] > 0:
@@ -225,7 +377,8 @@ if __name__ == '__main__':
             error_return += rocoto_status['UNKNOWN']
             rocoto_state = 'UNKNOWN'
     elif is_stalled(rocoto_status):
-        rocoto_status = attempt_multiple_times(lambda: rocoto_statcount(rocotostat), 2, 120, ProcessError)
+        rocoto_status.update(recount())
+        rocoto_state = 'RUNNING'
         if is_stalled(rocoto_status):
             error_return = 3
             rocoto_state = 'STALLED'
@@ -17,14 +17,19 @@ Parameters
 
 """
 
+import os
 import sys
+import mmap
 import argparse
 from pathlib import Path
-import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from wxflow import parse_j2yaml, Logger, logit, to_datetime
 
 logger = Logger(level="DEBUG", colored_log=True)
 
+# Size of the blocks read from each file
+BLOCK_SIZE = 64 * 1024 * 1024
+
 
 def parse_args():
     """
@@ -39,53 +44,152 @@ def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument("--yaml", required=True)
     parser.add_argument("--test_date", required=True)
+    parser.add_argument("--nthreads", type=int, default=min(8, os.cpu_count() or 1),
+                        help="number of file pairs compared concurrently")
     return parser.parse_args()
 
 
-def file_checksum(path):
+def read_blocks(path, block_size=BLOCK_SIZE):
     """
-    file_checksum
-    Computes the MD5 checksum of a file.
+    read_blocks
+    Reads a file in large blocks through a memory map.
 
     Parameters
     ----------
     path : str
         Path to the file.
+    block_size : int
+        Size of each block in bytes.
+
+    Yields
+    ------
+    memoryview
+        Successive blocks of the file, viewed in place in the memory map.
+        Each block is released when the next one is read.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # empty files cannot be memory mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            for offset in range(0, len(mm), block_size):
+                with view[offset:offset + block_size] as block:
+                    yield block
+
+
+def blocks_equal(block_a, block_b):
+    """
+    blocks_equal
+    Checks whether two blocks of equal length have the same bytes.
+
+    Memoryviews are compared element by element, so the blocks are viewed as
+    8-byte words, and only their last len % 8 bytes are compared as bytes.
+
+    Parameters
+    ----------
+    block_a, block_b : memoryview
+        Blocks to compare.
 
     Returns
     -------
-    str
-        MD5 checksum of the file.
+    bool
+        True if the blocks are identical.
     """
-    hasher = hashlib.md5()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hasher.update(chunk)
-    return hasher.hexdigest()
+    n = len(block_a) - len(block_a) % 8
+    return block_a[:n].cast("Q") == block_b[:n].cast("Q") and block_a[n:] == block_b[n:]
+
+
+def first_difference(block_a, block_b):
+    """
+    first_difference
+    Finds the offset of the first byte that differs between two blocks of equal length.
 
+    Parameters
+    ----------
+    block_a, block_b : memoryview
+        Blocks to compare.
+
+    Returns
+    -------
+    int
+        Offset of the first differing byte.
+    """
+    lo, hi = 0, len(block_a)
+    # the blocks differ somewhere in [lo, hi); halve the range until it is one byte
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if not blocks_equal(block_a[lo:mid], block_b[lo:mid]):
+            hi = mid
+        else:
+            lo = mid
+    return lo
+
+
+def compare_files(file_a, file_b):
+    """
+    compare_files
+    Compares the contents of two files.
+
+    Files of different sizes are reported without being read, and the same
+    file is never read at all.  Otherwise both files are read block by block
+    through memory maps and compared directly, which reads the same bytes as
+    hashing them but stops at, and reports, the first difference.
 
-def validate_cmpfiles(config):
+    Parameters
+    ----------
+    file_a, file_b : str
+        Paths to the files.
+
+    Returns
+    -------
+    str or None
+        Description of the first difference, or None if the files are identical.
+    """
+    stat_a = os.stat(file_a)
+    stat_b = os.stat(file_b)
+    if stat_a.st_size != stat_b.st_size:
+        return f"sizes differ ({stat_a.st_size} vs {stat_b.st_size} bytes)"
+    if (stat_a.st_dev, stat_a.st_ino) == (stat_b.st_dev, stat_b.st_ino):
+        return None
+
+    offset = 0
+    for block_a, block_b in zip(read_blocks(file_a), read_blocks(file_b)):
+        if not blocks_equal(block_a, block_b):
+            return f"first difference at byte offset {offset + first_difference(block_a, block_b)}"
+        offset += len(block_a)
+    return None
+
+
+def validate_cmpfiles(config, nthreads=1):
     """
     validate_cmpfiles
-    Validates that the checksums of paired files match.
+    Validates that the contents of paired files match.
 
     Parameters
     ----------
     config : dict
         Configuration dictionary containing file pairs to compare.
+    nthreads : int
+        Number of file pairs compared concurrently.
 
     Raises
     ------
     ValueError
-        If the checksums of any paired files do not match.
+        If the contents of any paired files do not match.
     """
     cmpfiles = config.get("output_files", {}).get("cmpfiles", [])
-    for pair in cmpfiles:
-        file_a, file_b = pair
-        if file_checksum(file_a) != file_checksum(file_b):
-            logger.error(f"Checksum mismatch: {file_a} vs {file_b}")
-            raise ValueError(f"Checksum mismatch: {file_a} vs {file_b}")
-        logger.info(f"checksums match: {file_a} vs {file_b}")
+    with ThreadPoolExecutor(max_workers=max(1, nthreads)) as executor:
+        results = executor.map(lambda pair: compare_files(*pair), cmpfiles)
+
+        mismatches = []
+        for (file_a, file_b), difference in zip(cmpfiles, results):
+            if difference is None:
+                logger.info(f"files match: {file_a} vs {file_b}")
+            else:
+                logger.error(f"Checksum mismatch: {file_a} vs {file_b}: {difference}")
+                mismatches.append(f"{file_a} vs {file_b}")
+
+    if mismatches:
+        raise ValueError(f"Checksum mismatch: {', '.join(mismatches)}")
 
 
 @logit(logger)
@@ -112,7 +216,7 @@ def main():
         logger.info("Nothing to validate (TODO - Stubbed).")
         sys.exit(0)
 
-    validate_cmpfiles(files)
+    validate_cmpfiles(files, nthreads=args.nthreads)
     logger.info(f"All files exist and pass checksum for test: {args.yaml}")
 
 
@@ -28,7 +28,7 @@ def main():
             'DOHYBVAR', 'DOIAU_ENKF', 'IAU_OFFSET', 'DOIAU', 'DO_CA',
             'DO_CALC_INCREMENT', 'assim_freq', 'ARCH_CYC', 'DO_JEDISNOWDA',
             'ARCH_WARMICFREQ', 'ARCH_FCSTICFREQ',
-            'IAUFHRS_ENKF', 'NET', 'NMEM_ENS_GFS']
+            'IAUFHRS_ENKF', 'NET', 'NMEM_ENS_GFS', 'ARCH_TAR_NPROC', 'ARCH_SKIP_UNCHANGED']
 
     archive_dict = AttrDict()
     for key in keys:
@@ -49,8 +49,7 @@ def main():
     atardir_sets = archive.configure_tars(archive_dict)
 
     # Create the backup tarballs and store in ATARDIR
-    for atardir_set in atardir_sets:
-        archive.execute_backup_dataset(atardir_set)
+    archive.execute_backup_datasets(atardir_sets)
 
     os.chdir(cwd)
 
@@ -19,6 +19,10 @@ ROTDIR:       Rotating (COM) directory
 USHgfs:       Path to global-workflow `ush` directory
 PARMgfs:      Path to global-workflow `parm` directory
 
+Optionally, the following environment variable may be set:
+
+MERGE_NPROC:  Number of tiles to merge concurrently (default: all tiles)
+
 Additionally, the following data files are used:
 
 - Tiled atmospheric initial conditions that follow the naming pattern determined by `atm_base_pattern` and `atm_file_pattern`
@@ -36,7 +40,9 @@ The tiled atmospheric intial condition files will be updated with conservation-a
 
 import os
 import subprocess
+import time as timer
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import partial
 
@@ -72,6 +78,7 @@ def main() -> None:
     rot_dir = get_env_var("ROTDIR")
     ush_gfs = get_env_var("USHgfs")
     parm_gfs = get_env_var("PARMgfs")
+    merge_nproc = int(get_env_var("MERGE_NPROC", fail_on_missing=False) or n_tiles)
 
     # os.chdir(data)
 
@@ -89,7 +96,8 @@ def main() -> None:
     tracer_files, rest_files, core_files = get_restart_files(time, incr, max_lookback, fcst_length, rot_dir, run)
 
     if (tracer_files is not None):
-        merge_tracers(merge_script, atm_files, tracer_files, rest_files, core_files[0], ctrl_files[0], tracer_list_file)
+        merge_tracers(merge_script, atm_files, tracer_files, rest_files, core_files[0], ctrl_files[0], tracer_list_file,
+                      nproc=merge_nproc)
 
     return
 
@@ -217,7 +225,14 @@ def get_restart_files(time: datetime, incr: int, max_lookback: int, fcst_length:
                 print(f"\t\tLooking for files {files} in directory {file_base}")
             file_list = file_list + [files]
 
-        found = all([os.path.isfile(file) for file in files for files in file_list])
+        # List the restart directory once instead of checking each file separately
+        try:
+            with os.scandir(file_base) as entries:
+                available = {entry.name for entry in entries if entry.is_file()}
+        except OSError:
+            available = set()
+
+        found = all([os.path.basename(file) in available for files in file_list for file in files])
 
         if (found):
             break
@@ -238,10 +253,12 @@ def merge_tracers(merge_script: str,
                   rest_files: typing.List[str],
                   core_file: str,
                   ctrl_file: str,
-                  tracer_list_file: str) -> None:
+                  tracer_list_file: str,
+                  nproc: int = n_tiles) -> None:
     '''
     Call the merger script to merge the tracers into the atmospheric IC files. Merged file is written to a temp file
-    which then overwrites the original upon successful completion of the script.
+    which then overwrites the original upon successful completion of the script. Up to `nproc` tiles are merged
+    concurrently, and the time taken by each tile is reported.
 
     Parameters
     ----------
@@ -259,6 +276,8 @@ def merge_tracers(merge_script: str,
             Path of control file
     tracer_list_file : str
             Full path to the file listing the tracer variables to add
+    nproc : int, optional
+            Number of tiles to merge concurrently (default: all tiles)
 
     Returns
     ----------
@@ -279,12 +298,21 @@ def merge_tracers(merge_script: str,
     if (len(atm_files) != len(rest_files)):
         raise ValueError("Atmosphere file list and dycore file list are not the same length")
 
-    for atm_file, tracer_file, rest_file in zip(atm_files, tracer_files, rest_files):
+    def merge_tile(atm_file: str, tracer_file: str, rest_file: str) -> float:
         if debug:
             print(f"\tMerging tracers from {tracer_file} into {atm_file}")
+        start = timer.perf_counter()
         temp_file = f'{atm_file}.tmp'
         subprocess.run([merge_script, atm_file, tracer_file, core_file, ctrl_file, rest_file, tracer_list_file, temp_file], check=True)
         os.replace(temp_file, atm_file)
+        return timer.perf_counter() - start
+
+    # Each tile is merged by its own merge script process; threads only wait on them
+    with ThreadPoolExecutor(max_workers=max(1, nproc)) as executor:
+        futures = [executor.submit(merge_tile, atm_file, tracer_file, rest_file)
+                   for atm_file, tracer_file, rest_file in zip(atm_files, tracer_files, rest_files)]
+        for atm_file, future in zip(atm_files, futures):
+            print(f"\tMerged tracers into {atm_file} in {future.result():.1f} s")
 
 
 if __name__ == "__main__":
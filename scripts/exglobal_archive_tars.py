@@ -40,7 +40,8 @@ def main():
             'NMEM_ENS', 'DO_JEDIATMVAR', 'FHMAX_FITS', 'waveGRD',
             'IAUFHRS', 'DO_FIT2OBS', 'NET', 'FHOUT_HF_GFS', 'FHMAX_HF_GFS', 'REPLAY_ICS',
             'OFFSET_START_HOUR', 'ARCH_EXPDIR', 'EXPDIR', 'ARCH_EXPDIR_FREQ', 'ARCH_HASHES',
-            'ARCH_DIFFS', 'SDATE', 'EDATE', 'HOMEgfs', 'DO_GEMPAK', 'WAVE_OUT_GRIDS']
+            'ARCH_DIFFS', 'SDATE', 'EDATE', 'HOMEgfs', 'DO_GEMPAK', 'WAVE_OUT_GRIDS',
+            'ARCH_TAR_NPROC', 'ARCH_SKIP_UNCHANGED']
 
     archive_dict = AttrDict()
     for key in keys:
@@ -60,8 +61,7 @@ def main():
         atardir_sets = archive.configure_tars(archive_dict)
 
         # Create the backup tarballs and store in ATARDIR
-        for atardir_set in atardir_sets:
-            archive.execute_backup_dataset(atardir_set)
+        archive.execute_backup_datasets(atardir_sets)
 
         # Clean up any temporary files
         archive.clean()
@@ -137,12 +137,9 @@ if [[ -d $dirA/ocean ]]; then
 	files="${files} $(basename_list 'ocean/' $dirA/ocean/*grb2)"
 fi
 
-for file in $files; do
-	echo "=== ${file} ==="
-	fileA="$dirA/$file"
-	fileB="$dirB/$file"
-	./diff_grib_files.py $fileA $fileB
-done
+if [[ -n "${files// /}" ]]; then
+	./diff_grib_files.py --dirs "$dirA" "$dirB" $files
+fi
 
 ## NetCDF Files
 files=""
@@ -87,12 +87,9 @@ files="$(basename_list '' $dirA/GFSFLX.Grb*)"
 
 module load wgrib2/2.0.8
 
-for file in $files; do
-	echo "=== ${file} ==="
-	fileA="$dirA/$file"
-	fileB="$dirB/$file"
-	./diff_grib_files.py $fileA $fileB
-done
+if [[ -n "${files// /}" ]]; then
+	./diff_grib_files.py --dirs "$dirA" "$dirB" $files
+fi
 
 # NetCDF Files
 files=""
@@ -1,11 +1,24 @@
 #! /bin/env python3
 '''
-Compares two grib2 files and print any variables that have a
-  non-identity correlation.
+Compares grib2 files and prints any fields that differ.
+
+Both files of a pair are indexed by message (variable, level type, level,
+forecast step, and any ensemble member), and each field in common is
+compared in vectorized chunks, reporting the correlation, the offsets of the
+minima and maxima, and the maximum absolute difference.  File pairs are
+spread across a process pool, and a machine-readable (JSON) summary of all
+pairs can be written.
+
+Fields are decoded natively with pygrib (ecCodes) when it is available;
+otherwise wgrib2 is used to compute correlations as before.
 
 Syntax
 ------
-diff_grib_files.py fileA fileB
+diff_grib_files.py [-n nproc] [-j summary.json] [-q] fileA fileB
+
+    OR
+
+diff_grib_files.py [-n nproc] [-j summary.json] [-q] --dirs dirA dirB file [file ...]
 
 Parameters
 ----------
@@ -13,64 +26,328 @@ fileA: string
     Path to the first grib2 file
 fileB: string
     Path to the second grib2 file
+dirA, dirB: string
+    Directories holding the files to compare, which are given relative to them
 
 '''
+import argparse
+import json
+import os
 import re
-import sys
 import subprocess
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Number of grid points compared at a time
+CHUNK_SIZE = 1024 * 1024
+
+
+def message_key(grb) -> str:
+    '''
+    Build the key identifying a grib message within its file.
 
-# TODO - Update to also check the min just in case the grib files have a constant offset
+    Parameters
+    ----------
+    grb: pygrib.gribmessage
+        Message to identify. Only its header is read.
+
+    Returns
+    -------
+    str
+        Key of the form 'shortName:typeOfLevel:level:stepRange[:perturbationNumber]'
+    '''
+    parts = [str(grb[key]) for key in ('shortName', 'typeOfLevel', 'level', 'stepRange')]
+    if grb.has_key('perturbationNumber'):
+        parts.append(str(grb['perturbationNumber']))
+    return ':'.join(parts)
 
 
-def count_nonid_corr(test_string: str, quiet=False):
+def index_messages(grbs) -> OrderedDict:
     '''
-    Scan a wgrib2 print of the correlation between two values and count
-      how many variables have a non-identity correlation. Any such variables
-      are printed.
+    Index the messages of an open grib file by key.
 
-    wgrib2 is assumed to be invoked by the following command:
-        wgrib2 {fileA} -var -rpn 'sto_1' -import_grib {fileB} -rpn 'rcl_1:print_corr'
+    Repeated keys (e.g. fields that only differ in keys not part of the
+      message key) are numbered in the order they appear in the file.
 
     Parameters
     ----------
-    test_string: str
-        STDOUT from wgrib2 call.
+    grbs: pygrib.open
+        Open grib file
 
-    quiet: bool, optional
-        Whether to suppress print messages of non-identy variables and summary.
+    Returns
+    -------
+    OrderedDict
+        Message number keyed by message key
+    '''
+    index = OrderedDict()
+    grbs.seek(0)
+    for grb in grbs:
+        key = message_key(grb)
+        if key in index:
+            ndup = 2
+            while f"{key}#{ndup}" in index:
+                ndup += 1
+            key = f"{key}#{ndup}"
+        index[key] = grb.messagenumber
+    return index
+
+
+def compare_values(valuesA, valuesB, chunk_size: int = CHUNK_SIZE) -> dict:
+    '''
+    Compare two decoded fields in chunks of grid points.
+
+    Points missing (masked) in either field are left out of the statistics and
+      counted separately. The correlation is accumulated from sums taken about
+      the first valid value of each field, which keeps it accurate in float64.
+
+    Parameters
+    ----------
+    valuesA, valuesB: numpy.ndarray or numpy.ma.MaskedArray
+        Fields to compare
+
+    chunk_size: int, optional
+        Number of grid points processed at a time
 
     Returns
     -------
-    int
-        Number of non-identify correlations represented in the string.
+    dict
+        Statistics of the comparison: npoints, nmissing_mismatch, corr,
+        min_offset, max_offset, max_abs_diff
+    '''
+    if np.shape(valuesA) != np.shape(valuesB):
+        return {'error': f"grid mismatch {np.shape(valuesA)} vs {np.shape(valuesB)}"}
+
+    maskA = np.ma.getmaskarray(valuesA).ravel()
+    maskB = np.ma.getmaskarray(valuesB).ravel()
+    dataA = np.ma.getdata(valuesA).ravel()
+    dataB = np.ma.getdata(valuesB).ravel()
 
+    npoints = 0
+    sums = np.zeros(5)  # x, y, xx, yy, xy
+    shift = None
+    minA = minB = np.inf
+    maxA = maxB = -np.inf
+    max_abs_diff = 0.0
+    nmissing_mismatch = int(np.count_nonzero(maskA != maskB))
 
+    for start in range(0, dataA.size, chunk_size):
+        valid = ~(maskA[start:start + chunk_size] | maskB[start:start + chunk_size])
+        xx = dataA[start:start + chunk_size][valid].astype(np.float64)
+        yy = dataB[start:start + chunk_size][valid].astype(np.float64)
+        if xx.size == 0:
+            continue
+        if shift is None:
+            shift = (xx[0], yy[0])
+        minA, maxA = min(minA, xx.min()), max(maxA, xx.max())
+        minB, maxB = min(minB, yy.min()), max(maxB, yy.max())
+        max_abs_diff = max(max_abs_diff, float(np.abs(xx - yy).max()))
+        xx -= shift[0]
+        yy -= shift[1]
+        sums += (xx.sum(), yy.sum(), np.dot(xx, xx), np.dot(yy, yy), np.dot(xx, yy))
+        npoints += xx.size
+
+    if npoints == 0:
+        return {'npoints': 0, 'nmissing_mismatch': nmissing_mismatch, 'corr': None,
+                'min_offset': None, 'max_offset': None, 'max_abs_diff': None}
+
+    sx, sy, sxx, syy, sxy = sums
+    varx = sxx - sx * sx / npoints
+    vary = syy - sy * sy / npoints
+    if max_abs_diff == 0.0:
+        corr = 1.0
+    elif varx > 0.0 and vary > 0.0:
+        corr = float((sxy - sx * sy / npoints) / np.sqrt(varx * vary))
+    else:
+        corr = None  # undefined for a constant field
+
+    return {'npoints': npoints,
+            'nmissing_mismatch': nmissing_mismatch,
+            'corr': corr,
+            'min_offset': float(minB - minA),
+            'max_offset': float(maxB - maxA),
+            'max_abs_diff': max_abs_diff}
+
+
+def compare_files_pygrib(fileA: str, fileB: str, atol: float = 0.0) -> dict:
     '''
+    Compare two grib2 files field by field with pygrib.
+
+    Parameters
+    ----------
+    fileA, fileB: str
+        Paths to the grib2 files
+
+    atol: float, optional
+        Largest absolute difference for a field to still count as identical
+
+    Returns
+    -------
+    dict
+        Summary of the comparison, see compare_pair
+    '''
+    try:
+        import pygrib
+    except ImportError as err:
+        raise ImportError(f"Unable to import pygrib module\n{err}")
+
+    result = {'fileA': fileA, 'fileB': fileB, 'engine': 'pygrib',
+              'nfields': 0, 'ndiff': 0, 'only_in_A': [], 'only_in_B': [], 'diffs': {}}
+
+    grbsA = pygrib.open(fileA)
+    grbsB = pygrib.open(fileB)
+    try:
+        indexA = index_messages(grbsA)
+        indexB = index_messages(grbsB)
+        result['only_in_A'] = [key for key in indexA if key not in indexB]
+        result['only_in_B'] = [key for key in indexB if key not in indexA]
+
+        for key, numA in indexA.items():
+            if key not in indexB:
+                continue
+            stats = compare_values(grbsA.message(numA).values, grbsB.message(indexB[key]).values)
+            result['nfields'] += 1
+            if 'error' in stats or stats['nmissing_mismatch'] > 0 or (stats['max_abs_diff'] or 0.0) > atol:
+                result['ndiff'] += 1
+                result['diffs'][key] = stats
+    finally:
+        grbsA.close()
+        grbsB.close()
+
+    return result
+
+
+def compare_files_wgrib2(fileA: str, fileB: str, atol: float = 0.0) -> dict:
+    '''
+    Compare two grib2 files with the correlations computed by wgrib2.
+
+    Parameters
+    ----------
+    fileA, fileB: str
+        Paths to the grib2 files
+
+    atol: float, optional
+        Unused, wgrib2 only reports correlations
+
+    Returns
+    -------
+    dict
+        Summary of the comparison, see compare_pair
+    '''
+    wgrib2_cmd = ['wgrib2', fileA, '-var', '-rpn', 'sto_1', '-import_grib', fileB, '-rpn', 'rcl_1:print_corr']
+    string = subprocess.run(wgrib2_cmd, stdout=subprocess.PIPE, check=True).stdout.decode("utf-8")
+
     pattern = re.compile(r"(\d+:\d+:)(?P<var>.*):rpn_corr=(?P<corr>.*)")
-    matches = [m.groupdict() for m in pattern.finditer(test_string)]
+    matches = [m.groupdict() for m in pattern.finditer(string)]
+    diffs = {match['var']: {'corr': float(match['corr'])} for match in matches if float(match['corr']) != 1.0}
+
+    return {'fileA': fileA, 'fileB': fileB, 'engine': 'wgrib2',
+            'nfields': len(matches), 'ndiff': len(diffs), 'only_in_A': [], 'only_in_B': [], 'diffs': diffs}
+
+
+def compare_pair(pair: tuple) -> dict:
+    '''
+    Compare one pair of grib2 files, catching any error so that one bad file
+      does not stop the comparison of the others.
 
-    count = 0
-    for match in matches:
-        if float(match['corr']) != 1.0:
-            count = count + 1
-            if not quiet:
-                print(f"{match['var']}: corr={match['corr']}")
+    Parameters
+    ----------
+    pair: tuple
+        (label, fileA, fileB, engine, atol)
 
-    if not quiet:
-        if count == 0:
-            print("All fields are identical!")
-        else:
-            print(f"{count} variables are different")
+    Returns
+    -------
+    dict
+        Summary with the keys label, fileA, fileB, engine, nfields, ndiff,
+        only_in_A, only_in_B, diffs (statistics of each differing field),
+        and error if the comparison failed
+    '''
+    label, fileA, fileB, engine, atol = pair
+    compare = compare_files_pygrib if engine == 'pygrib' else compare_files_wgrib2
+    try:
+        result = compare(fileA, fileB, atol)
+    except Exception as err:
+        result = {'fileA': fileA, 'fileB': fileB, 'engine': engine, 'error': str(err)}
+    result['label'] = label
+    return result
 
-    return count
+
+def print_result(result: dict, header: bool = False, quiet: bool = False) -> None:
+    '''
+    Print the summary of a file pair in the same form as the wgrib2 comparison.
+    '''
+    if header:
+        print(f"=== {result['label']} ===")
+    if 'error' in result:
+        print(f"Unable to compare {result['fileA']} and {result['fileB']}: {result['error']}")
+        return
+    if quiet:
+        return
+
+    for key in result['only_in_A']:
+        print(f"{key}: only in {result['fileA']}")
+    for key in result['only_in_B']:
+        print(f"{key}: only in {result['fileB']}")
+    for key, stats in result['diffs'].items():
+        print(f"{key}: " + ' '.join(f"{name}={value}" for name, value in stats.items()))
+
+    if result['ndiff'] == 0 and not result['only_in_A'] and not result['only_in_B']:
+        print("All fields are identical!")
+    else:
+        print(f"{result['ndiff']} variables are different")
+
+
+def get_engine(engine: str) -> str:
+    '''
+    Resolve the 'auto' engine to pygrib if it can be imported, else wgrib2.
+    '''
+    if engine != 'auto':
+        return engine
+    try:
+        import pygrib  # noqa: F401
+        return 'pygrib'
+    except ImportError:
+        return 'wgrib2'
 
 
 if __name__ == '__main__':
-    fileA = sys.argv[0]
-    fileB = sys.argv[1]
+    parser = argparse.ArgumentParser(description='Compare grib2 files field by field')
+    parser.add_argument('files', nargs='+', help='fileA fileB, or files relative to the --dirs directories')
+    parser.add_argument('--dirs', nargs=2, metavar=('dirA', 'dirB'), help='directories holding the files to compare')
+    parser.add_argument('-n', '--nproc', type=int, default=min(8, os.cpu_count() or 1),
+                        help='number of file pairs compared concurrently')
+    parser.add_argument('-j', '--json', help='write a JSON summary of all file pairs to this file')
+    parser.add_argument('-e', '--engine', choices=['auto', 'pygrib', 'wgrib2'], default='auto',
+                        help='grib decoder, pygrib if available by default')
+    parser.add_argument('-t', '--atol', type=float, default=0.0,
+                        help='largest absolute difference for fields to count as identical')
+    parser.add_argument('-q', '--quiet', action='store_true', help='only print errors')
+    args = parser.parse_args()
 
-    wgrib2_cmd = f"wgrib2 {fileA} -var -rpn 'sto_1' -import_grib {fileB} -rpn 'rcl_1:print_corr'"
+    engine = get_engine(args.engine)
+    if args.dirs:
+        pairs = [(file, os.path.join(args.dirs[0], file), os.path.join(args.dirs[1], file), engine, args.atol)
+                 for file in args.files]
+    elif len(args.files) == 2:
+        pairs = [(args.files[0], args.files[0], args.files[1], engine, args.atol)]
+    else:
+        parser.error('give exactly two files to compare, or use --dirs')
 
-    string = subprocess.run(wgrib2_cmd, shell=True, stdout=subprocess.PIPE).stdout.decode("utf-8")
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, min(args.nproc, len(pairs)))) as executor:
+        # map returns results in order, so the output matches the order of the files
+        for result in executor.map(compare_pair, pairs):
+            print_result(result, header=bool(args.dirs), quiet=args.quiet)
+            sys.stdout.flush()
+            results.append(result)
 
-    count_nonid_corr(string)
+    if args.json:
+        summary = {'engine': engine,
+                   'npairs': len(results),
+                   'npairs_different': sum(1 for result in results
+                                           if 'error' in result or result['ndiff'] or result['only_in_A'] or result['only_in_B']),
+                   'pairs': results}
+        with open(args.json, 'w') as fh:
+            json.dump(summary, fh, indent=2)
@@ -16,96 +16,100 @@ from wxflow import cast_as_dtype
 python2fortran_bool = {True: '.true.', False: '.false.'}
 
 
+# function to wait for the full resolution calc_anl.x and exit if it failed
+def wait_fullres(fullres_anl_job):
+    exit_fullres = fullres_anl_job.wait()
+    sys.stdout.flush()
+    if exit_fullres != 0:
+        print('Error with calc_analysis.x for deterministic resolution, exit code=' + str(exit_fullres))
+        sys.exit(exit_fullres)
+
+
 # function to calculate analysis from a given increment file and background
 def calcanl_gfs(DoIAU, l4DEnsVar, Write4Danl, ComOut, APrefix,
                 ComIn_Ges, GPrefix,
                 FixDir, atmges_ens_mean, RunDir, NThreads, NEMSGet, IAUHrs,
-                ExecCMD, ExecCMDMPI, ExecAnl, ExecChgresInc, run, JEDI):
+                ExecCMD, ExecCMDMPI, ExecAnl, ExecChgresInc, run, JEDI,
+                NStageThreads=8, Overlap=False):
     print('calcanl_gfs beginning at: ', datetime.datetime.utcnow())
 
     IAUHH = IAUHrs
 
-    # copy and link files
+    # build the copy/link plan for every IAU hour up front, then stage it concurrently
+    StageDirs = []
+    StagePlan = []
     if DoIAU and l4DEnsVar and Write4Danl:
         for fh in IAUHH:
             if fh == 6:
                 # for full res analysis
                 CalcAnlDir = RunDir + '/calcanl_' + format(fh, '02')
-                if not os.path.exists(CalcAnlDir):
-                    gsi_utils.make_dir(CalcAnlDir)
-                gsi_utils.copy_file(ExecAnl, CalcAnlDir + '/calc_anl.x')
-                gsi_utils.link_file(RunDir + '/siginc.nc', CalcAnlDir + '/siginc.nc.06')
-                gsi_utils.link_file(RunDir + '/sigf06', CalcAnlDir + '/ges.06')
-                gsi_utils.link_file(RunDir + '/siganl', CalcAnlDir + '/anl.06')
-                gsi_utils.copy_file(ExecChgresInc, CalcAnlDir + '/chgres_inc.x')
+                StageDirs.append(CalcAnlDir)
+                StagePlan += [('copy', ExecAnl, CalcAnlDir + '/calc_anl.x'),
+                              ('link', RunDir + '/siginc.nc', CalcAnlDir + '/siginc.nc.06'),
+                              ('link', RunDir + '/sigf06', CalcAnlDir + '/ges.06'),
+                              ('link', RunDir + '/siganl', CalcAnlDir + '/anl.06'),
+                              ('copy', ExecChgresInc, CalcAnlDir + '/chgres_inc.x')]
                 # for ensemble res analysis
-                if Run in ["gdas", "gfs"]:
+                if run in ["gdas", "gfs"]:
                     CalcAnlDir = RunDir + '/calcanl_ensres_' + format(fh, '02')
-                    if not os.path.exists(CalcAnlDir):
-                        gsi_utils.make_dir(CalcAnlDir)
-                    gsi_utils.copy_file(ExecAnl, CalcAnlDir + '/calc_anl.x')
-                    gsi_utils.link_file(RunDir + '/siginc.nc', CalcAnlDir + '/siginc.nc.06')
-                    gsi_utils.link_file(ComOut + '/' + APrefix + 'atmanl.ensres.nc', CalcAnlDir + '/anl.ensres.06')
-                    gsi_utils.link_file(ComIn_Ges + '/' + GPrefix + 'atmf006.ensres.nc', CalcAnlDir + '/ges.ensres.06')
-                    gsi_utils.link_file(RunDir + '/sigf06', CalcAnlDir + '/ges.06')
+                    StageDirs.append(CalcAnlDir)
+                    StagePlan += [('copy', ExecAnl, CalcAnlDir + '/calc_anl.x'),
+                                  ('link', RunDir + '/siginc.nc', CalcAnlDir + '/siginc.nc.06'),
+                                  ('link', ComOut + '/' + APrefix + 'atmanl.ensres.nc', CalcAnlDir + '/anl.ensres.06'),
+                                  ('link', ComIn_Ges + '/' + GPrefix + 'atmf006.ensres.nc', CalcAnlDir + '/ges.ensres.06'),
+                                  ('link', RunDir + '/sigf06', CalcAnlDir + '/ges.06')]
             else:
                 if os.path.isfile('sigi' + format(fh, '02') + '.nc'):
                     # for full res analysis
                     CalcAnlDir = RunDir + '/calcanl_' + format(fh, '02')
                     CalcAnlDir6 = RunDir + '/calcanl_' + format(6, '02')
-                    if not os.path.exists(CalcAnlDir):
-                        gsi_utils.make_dir(CalcAnlDir)
-                    if not os.path.exists(CalcAnlDir6):
-                        gsi_utils.make_dir(CalcAnlDir6)
-                    gsi_utils.link_file(ComOut + '/' + APrefix + 'atma' + format(fh, '03') + '.nc',
-                                        CalcAnlDir6 + '/anl.' + format(fh, '02'))
-                    gsi_utils.link_file(RunDir + '/siga' + format(fh, '02'),
-                                        CalcAnlDir6 + '/anl.' + format(fh, '02'))
-                    gsi_utils.link_file(RunDir + '/sigi' + format(fh, '02') + '.nc',
-                                        CalcAnlDir + '/siginc.nc.' + format(fh, '02'))
-                    gsi_utils.link_file(CalcAnlDir6 + '/inc.fullres.' + format(fh, '02'),
-                                        CalcAnlDir + '/inc.fullres.' + format(fh, '02'))
-                    gsi_utils.link_file(RunDir + '/sigf' + format(fh, '02'),
-                                        CalcAnlDir6 + '/ges.' + format(fh, '02'))
-                    gsi_utils.link_file(RunDir + '/sigf' + format(fh, '02'),
-                                        CalcAnlDir + '/ges.' + format(fh, '02'))
-                    gsi_utils.copy_file(ExecChgresInc, CalcAnlDir + '/chgres_inc.x')
+                    StageDirs += [CalcAnlDir, CalcAnlDir6]
+                    StagePlan += [('link', ComOut + '/' + APrefix + 'atma' + format(fh, '03') + '.nc',
+                                   CalcAnlDir6 + '/anl.' + format(fh, '02')),
+                                  ('link', RunDir + '/siga' + format(fh, '02'),
+                                   CalcAnlDir6 + '/anl.' + format(fh, '02')),
+                                  ('link', RunDir + '/sigi' + format(fh, '02') + '.nc',
+                                   CalcAnlDir + '/siginc.nc.' + format(fh, '02')),
+                                  ('link', CalcAnlDir6 + '/inc.fullres.' + format(fh, '02'),
+                                   CalcAnlDir + '/inc.fullres.' + format(fh, '02')),
+                                  ('link', RunDir + '/sigf' + format(fh, '02'),
+                                   CalcAnlDir6 + '/ges.' + format(fh, '02')),
+                                  ('link', RunDir + '/sigf' + format(fh, '02'),
+                                   CalcAnlDir + '/ges.' + format(fh, '02')),
+                                  ('copy', ExecChgresInc, CalcAnlDir + '/chgres_inc.x')]
                     # for ensemble res analysis
                     CalcAnlDir = RunDir + '/calcanl_ensres_' + format(fh, '02')
                     CalcAnlDir6 = RunDir + '/calcanl_ensres_' + format(6, '02')
-                    if not os.path.exists(CalcAnlDir):
-                        gsi_utils.make_dir(CalcAnlDir)
-                    if not os.path.exists(CalcAnlDir6):
-                        gsi_utils.make_dir(CalcAnlDir6)
-                    gsi_utils.link_file(ComOut + '/' + APrefix + 'atma' + format(fh, '03') + '.ensres.nc',
-                                        CalcAnlDir6 + '/anl.ensres.' + format(fh, '02'))
-                    gsi_utils.link_file(RunDir + '/sigi' + format(fh, '02') + '.nc',
-                                        CalcAnlDir6 + '/siginc.nc.' + format(fh, '02'))
-                    gsi_utils.link_file(ComIn_Ges + '/' + GPrefix + 'atmf' + format(fh, '03') + '.ensres.nc',
-                                        CalcAnlDir6 + '/ges.ensres.' + format(fh, '02'))
+                    StageDirs += [CalcAnlDir, CalcAnlDir6]
+                    StagePlan += [('link', ComOut + '/' + APrefix + 'atma' + format(fh, '03') + '.ensres.nc',
+                                   CalcAnlDir6 + '/anl.ensres.' + format(fh, '02')),
+                                  ('link', RunDir + '/sigi' + format(fh, '02') + '.nc',
+                                   CalcAnlDir6 + '/siginc.nc.' + format(fh, '02')),
+                                  ('link', ComIn_Ges + '/' + GPrefix + 'atmf' + format(fh, '03') + '.ensres.nc',
+                                   CalcAnlDir6 + '/ges.ensres.' + format(fh, '02'))]
 
     else:
         # for full res analysis
         CalcAnlDir = RunDir + '/calcanl_' + format(6, '02')
-        if not os.path.exists(CalcAnlDir):
-            gsi_utils.make_dir(CalcAnlDir)
-        gsi_utils.copy_file(ExecAnl, CalcAnlDir + '/calc_anl.x')
-        gsi_utils.link_file(RunDir + '/siginc.nc', CalcAnlDir + '/siginc.nc.06')
-        gsi_utils.link_file(RunDir + '/sigf06', CalcAnlDir + '/ges.06')
-        gsi_utils.link_file(RunDir + '/siganl', CalcAnlDir + '/anl.06')
-        gsi_utils.copy_file(ExecChgresInc, CalcAnlDir + '/chgres_inc.x')
+        StageDirs.append(CalcAnlDir)
+        StagePlan += [('copy', ExecAnl, CalcAnlDir + '/calc_anl.x'),
+                      ('link', RunDir + '/siginc.nc', CalcAnlDir + '/siginc.nc.06'),
+                      ('link', RunDir + '/sigf06', CalcAnlDir + '/ges.06'),
+                      ('link', RunDir + '/siganl', CalcAnlDir + '/anl.06'),
+                      ('copy', ExecChgresInc, CalcAnlDir + '/chgres_inc.x')]
         # for ensemble res analysis
         CalcAnlDir = RunDir + '/calcanl_ensres_' + format(6, '02')
-        if not os.path.exists(CalcAnlDir):
-            gsi_utils.make_dir(CalcAnlDir)
-        gsi_utils.copy_file(ExecAnl, CalcAnlDir + '/calc_anl.x')
-        gsi_utils.link_file(RunDir + '/siginc.nc', CalcAnlDir + '/siginc.nc.06')
-        gsi_utils.link_file(ComOut + '/' + APrefix + 'atmanl.ensres.nc', CalcAnlDir + '/anl.ensres.06')
-        gsi_utils.link_file(ComIn_Ges + '/' + GPrefix + 'atmf006.ensres.nc', CalcAnlDir + '/ges.ensres.06')
+        StageDirs.append(CalcAnlDir)
+        StagePlan += [('copy', ExecAnl, CalcAnlDir + '/calc_anl.x'),
+                      ('link', RunDir + '/siginc.nc', CalcAnlDir + '/siginc.nc.06'),
+                      ('link', ComOut + '/' + APrefix + 'atmanl.ensres.nc', CalcAnlDir + '/anl.ensres.06'),
+                      ('link', ComIn_Ges + '/' + GPrefix + 'atmf006.ensres.nc', CalcAnlDir + '/ges.ensres.06')]
+
+    gsi_utils.stage_files(StageDirs, StagePlan, NStageThreads)
 
     # get dimension information from background and increment files
-    AnlDims = gsi_utils.get_ncdims('siginc.nc')
-    GesDims = gsi_utils.get_ncdims('sigf06')
+    AnlDims = gsi_utils.get_ncdims('siginc.nc', ['lev', 'lon', 'lat'])
+    GesDims = gsi_utils.get_ncdims('sigf06', ['grid_xt', 'grid_yt'])
 
     levs = AnlDims['lev']
     LonA = AnlDims['lon']
@@ -291,51 +295,60 @@ def calcanl_gfs(DoIAU, l4DEnsVar, Write4Danl, ComOut, APrefix,
     print(ExecCMDMPILevs_nohost + ' ' + CalcAnlDir6 + '/calc_anl.x submitted')
 
     sys.stdout.flush()
-    exit_fullres = fullres_anl_job.wait()
-    sys.stdout.flush()
-    if exit_fullres != 0:
-        print('Error with calc_analysis.x for deterministic resolution, exit code=' + str(exit_fullres))
-        print(locals())
-        sys.exit(exit_fullres)
+    if not Overlap:
+        wait_fullres(fullres_anl_job)
 
     # compute determinstic analysis on ensemble resolution
-    if Run in ["gdas", "gfs"]:
-        chgres_jobs = []
-        for fh in IAUHH:
-            # first check to see if guess file exists
-            CalcAnlDir6 = RunDir + '/calcanl_ensres_06'
-            print(CalcAnlDir6 + '/ges.ensres.' + format(fh, '02'))
-            if (os.path.isfile(CalcAnlDir6 + '/ges.ensres.' + format(fh, '02'))):
-                print('Calculating analysis on ensemble resolution for f' + format(fh, '03'))
-                # generate ensres analysis from interpolated background
-                # set up the namelist
-                namelist = OrderedDict()
-                namelist["setup"] = {"datapath": "'./'",
-                                     "analysis_filename": "'anl.ensres'",
-                                     "firstguess_filename": "'ges.ensres'",
-                                     "increment_filename": "'siginc.nc'",
-                                     "fhr": fh,
-                                     "jedi": python2fortran_bool[JEDI],
-                                     }
+    # this is independent of the full resolution analysis, so when Overlap is
+    # set it runs while the full resolution calc_anl.x is still going.  Both
+    # launch on all the tasks of the job, so only set Overlap when the job has
+    # the cores for both and the launcher runs them side by side
+    try:
+        if run in ["gdas", "gfs"]:
+            chgres_jobs = []
+            for fh in IAUHH:
+                # first check to see if guess file exists
+                CalcAnlDir6 = RunDir + '/calcanl_ensres_06'
+                print(CalcAnlDir6 + '/ges.ensres.' + format(fh, '02'))
+                if (os.path.isfile(CalcAnlDir6 + '/ges.ensres.' + format(fh, '02'))):
+                    print('Calculating analysis on ensemble resolution for f' + format(fh, '03'))
+                    # generate ensres analysis from interpolated background
+                    # set up the namelist
+                    namelist = OrderedDict()
+                    namelist["setup"] = {"datapath": "'./'",
+                                         "analysis_filename": "'anl.ensres'",
+                                         "firstguess_filename": "'ges.ensres'",
+                                         "increment_filename": "'siginc.nc'",
+                                         "fhr": fh,
+                                         "jedi": python2fortran_bool[JEDI],
+                                         }
 
-                gsi_utils.write_nml(namelist, CalcAnlDir6 + '/calc_analysis.nml')
+                    gsi_utils.write_nml(namelist, CalcAnlDir6 + '/calc_analysis.nml')
 
-                # run the executable
-                if ihost > nhosts - 1:
-                    ihost = 0
-                print('ensres_calc_anl', namelist)
-                ensres_anl_job = subprocess.Popen(ExecCMDMPILevs_nohost + ' ' + CalcAnlDir6 + '/calc_anl.x', shell=True, cwd=CalcAnlDir6)
-                print(ExecCMDMPILevs_nohost + ' ' + CalcAnlDir6 + '/calc_anl.x submitted')
+                    # run the executable
+                    if ihost > nhosts - 1:
+                        ihost = 0
+                    print('ensres_calc_anl', namelist)
+                    ensres_anl_job = subprocess.Popen(ExecCMDMPILevs_nohost + ' ' + CalcAnlDir6 + '/calc_anl.x', shell=True, cwd=CalcAnlDir6)
+                    print(ExecCMDMPILevs_nohost + ' ' + CalcAnlDir6 + '/calc_anl.x submitted')
 
-                sys.stdout.flush()
-                # check on analysis steps
-                exit_ensres = ensres_anl_job.wait()
-                if exit_ensres != 0:
-                    print('Error with calc_analysis.x for ensemble resolution, exit code=' + str(exit_ensres))
-                    print(locals())
-                    sys.exit(exit_ensres)
-            else:
-                print('f' + format(fh, '03') + ' is in $IAUFHRS but ensemble resolution guess file is missing. Skipping.')
+                    sys.stdout.flush()
+                    # check on analysis steps
+                    exit_ensres = ensres_anl_job.wait()
+                    if exit_ensres != 0:
+                        print('Error with calc_analysis.x for ensemble resolution, exit code=' + str(exit_ensres))
+                        print(locals())
+                        sys.exit(exit_ensres)
+                else:
+                    print('f' + format(fh, '03') + ' is in $IAUFHRS but ensemble resolution guess file is missing. Skipping.')
+    except BaseException:
+        # do not leave the full resolution calc_anl.x running on any error
+        if fullres_anl_job.poll() is None:
+            fullres_anl_job.terminate()
+        raise
+
+    if Overlap:
+        wait_fullres(fullres_anl_job)
 
     print('calcanl_gfs successfully completed at: ', datetime.datetime.utcnow())
     print(locals())
@@ -362,10 +375,12 @@ if __name__ == '__main__':
     IAUHrs = cast_as_dtype(os.getenv('IAUFHRS', '6,'))
     Run = os.getenv('RUN', 'gdas')
     JEDI = gsi_utils.isTrue(os.getenv('DO_JEDIATMVAR', 'YES'))
+    NStageThreads = int(os.getenv('CALCANL_STAGE_THREADS', 8))
+    Overlap = gsi_utils.isTrue(os.getenv('CALCANL_OVERLAP', 'NO'))
 
     print(locals())
     calcanl_gfs(DoIAU, l4DEnsVar, Write4Danl, ComOut, APrefix,
                 ComIn_Ges, GPrefix,
                 FixDir, atmges_ens_mean, RunDir, NThreads, NEMSGet, IAUHrs,
                 ExecCMD, ExecCMDMPI, ExecAnl, ExecChgresInc,
-                Run, JEDI)
+                Run, JEDI, NStageThreads, Overlap)
@@ -48,6 +48,37 @@ def make_dir(directory):
     print("mkdir -p " + directory)
 
 
+def stage_files(directories, plan, nthreads=8):
+    """ stage_files(directories, plan, nthreads)
+    - function to create directories and then execute a copy/link plan concurrently
+    input: directories - list of string paths to directories to create if missing
+           plan        - list of (action, from_file, to_file) tuples,
+                         where action is 'copy' or 'link'
+           nthreads    - number of threads used to stage files
+    Entries with the same to_file are executed in plan order by one thread,
+    so the result is the same as executing the plan serially.
+    """
+    import os
+    from collections import OrderedDict
+    from concurrent.futures import ThreadPoolExecutor
+    for directory in OrderedDict.fromkeys(directories):
+        if not os.path.exists(directory):
+            make_dir(directory)
+
+    actions = {'copy': copy_file, 'link': link_file}
+    targets = OrderedDict()
+    for action, from_file, to_file in plan:
+        targets.setdefault(to_file, []).append((actions[action], from_file))
+
+    def stage_target(to_file):
+        for action, from_file in targets[to_file]:
+            action(from_file, to_file)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(nthreads, len(targets)))) as executor:
+        # consume the results so that any error is raised here
+        list(executor.map(stage_target, targets))
+
+
 def write_nml(nml_dict, nml_file):
     """ write_nml(nml_dict, nml_file)
     - function to write out namelist dictionary nml_dict to file nml_file
@@ -66,26 +97,166 @@ def write_nml(nml_dict, nml_file):
     nfile.close()
 
 
-def get_ncdims(ncfile):
-    """ get_ncdims(ncfile)
+_ncprobe_cache = {}
+
+# netCDF classic (CDF-1/2/5) header tags and external type sizes
+_NC_DIMENSION = 10
+_NC_VARIABLE = 11
+_NC_ATTRIBUTE = 12
+_NC_TYPES = {1: ('b', 1), 2: ('c', 1), 3: ('h', 2), 4: ('i', 4), 5: ('f', 4), 6: ('d', 8),
+             7: ('B', 1), 8: ('H', 2), 9: ('I', 4), 10: ('q', 8), 11: ('Q', 8)}
+
+
+def _read_classic_header(fh, version):
+    """ _read_classic_header(fh, version)
+    - function to parse the header of a netCDF classic format file
+    input: fh      - binary file object positioned after the 4 byte magic number
+           version - format version (1, 2 or 5)
+    returns: dims - dictionary of dimension lengths
+             variables - dictionary of (dimids, attributes, nc_type, begin)
+                         tuples keyed by variable name
+    """
+    import struct
+    size = 8 if version == 5 else 4
+    offset = 4 if version == 1 else 8
+
+    def read_int(nbytes):
+        return int.from_bytes(fh.read(nbytes), 'big')
+
+    def read_name():
+        nchars = read_int(size)
+        name = fh.read(nchars).decode('utf-8')
+        fh.read(-nchars % 4)
+        return name
+
+    def read_list(tag, read_item):
+        items = {}
+        list_tag = read_int(4)
+        nelems = read_int(size)
+        if list_tag not in (0, tag):
+            raise ValueError('unexpected tag in netCDF header')
+        for _ in range(nelems):
+            name = read_name()
+            items[name] = read_item()
+        return items
+
+    def read_attribute():
+        nc_type = read_int(4)
+        nvals = read_int(size)
+        code, itemsize = _NC_TYPES[nc_type]
+        raw = fh.read(nvals * itemsize)
+        fh.read(-(nvals * itemsize) % 4)
+        if code == 'c':
+            return raw.decode('utf-8', errors='replace').rstrip('\x00')
+        return struct.unpack('>' + str(nvals) + code, raw)
+
+    def read_variable():
+        ndims = read_int(size)
+        dimids = [read_int(size) for _ in range(ndims)]
+        attributes = read_list(_NC_ATTRIBUTE, read_attribute)
+        nc_type = read_int(4)
+        read_int(size)  # vsize
+        begin = read_int(offset)
+        return dimids, attributes, nc_type, begin
+
+    numrecs = read_int(size)
+    dims = read_list(_NC_DIMENSION, lambda: read_int(size))
+    read_list(_NC_ATTRIBUTE, read_attribute)
+    variables = read_list(_NC_VARIABLE, read_variable)
+    # a zero length is the record (unlimited) dimension
+    dims = {name: (length if length else numrecs) for name, length in dims.items()}
+    return dims, variables
+
+
+def _probe_classic(fh, version):
+    """ _probe_classic(fh, version)
+    - function to probe a netCDF classic format file from its header
+    input: fh      - binary file object positioned after the 4 byte magic number
+           version - format version (1, 2 or 5)
+    returns: ncprobe - see probe_ncfile
+    """
+    import struct
+    dims, variables = _read_classic_header(fh, version)
+    ncprobe = {'dims': dims, 'time_units': None, 'fhour': None}
+    if 'time' in variables:
+        dimids, attributes, nc_type, begin = variables['time']
+        ncprobe['time_units'] = attributes.get('units')
+        code, itemsize = _NC_TYPES[nc_type]
+        if code != 'c' and (not dimids or list(dims.values())[dimids[0]] > 0):
+            fh.seek(begin)
+            ncprobe['fhour'] = int(struct.unpack('>' + code, fh.read(itemsize))[0])
+    return ncprobe
+
+
+def _probe_netcdf4(ncfile):
+    """ _probe_netcdf4(ncfile)
+    - function to probe a netCDF4/HDF5 file with the netCDF4 library
+    input: ncfile - string to path to netCDF file
+    returns: ncprobe - see probe_ncfile
+    """
+    try:
+        import netCDF4 as nc
+    except ImportError as err:
+        raise ImportError(f"Unable to import netCDF4 module\n{err}")
+    with nc.Dataset(ncfile) as ncf:
+        ncprobe = {'dims': {d: int(len(ncf.dimensions[d])) for d in ncf.dimensions.keys()},
+                   'time_units': None, 'fhour': None}
+        if 'time' in ncf.variables:
+            time = ncf.variables['time']
+            ncprobe['time_units'] = getattr(time, 'units', None)
+            if time.size > 0:
+                ncprobe['fhour'] = int(time[0])
+    return ncprobe
+
+
+def probe_ncfile(ncfile):
+    """ probe_ncfile(ncfile)
+    - function to return the dimensions and time information of a netCDF file
+      in one pass over its header
+    input: ncfile - string to path to netCDF file
+    output: ncprobe - dictionary with keys
+                        'dims': dictionary of dimension lengths, ex: ncprobe['dims']['pfull'] = 127
+                        'time_units': units attribute of the time variable (None if absent)
+                        'fhour': integer first value of the time variable (None if absent)
+    Classic format (CDF-1/2/5) headers are parsed directly; netCDF4/HDF5
+    files are opened with the netCDF4 library, which only reads metadata.
+    Results are cached by path, size and modification time, so repeated
+    calls on the same file do not go back to the filesystem beyond a stat.
+    """
+    import os
+    stat = os.stat(ncfile)
+    key = (os.path.realpath(ncfile), stat.st_size, stat.st_mtime_ns)
+    if key not in _ncprobe_cache:
+        with open(ncfile, 'rb') as fh:
+            magic = fh.read(4)
+            if magic[:3] == b'CDF' and magic[3] in (1, 2, 5):
+                ncprobe = _probe_classic(fh, magic[3])
+            else:
+                ncprobe = None
+        if ncprobe is None:
+            ncprobe = _probe_netcdf4(ncfile)
+        _ncprobe_cache[key] = ncprobe
+
+    return _ncprobe_cache[key]
+
+
+def get_ncdims(ncfile, dims=None):
+    """ get_ncdims(ncfile, dims)
     - function to return dictionary of netCDF file dimensions and their lengths
     input: ncfile - string to path to netCDF file
+           dims   - optional list of the dimensions to return (default all)
     output: ncdims - dictionary where key is the name of a dimension and the
                         value is the length of that dimension
 
                         ex:  ncdims['pfull'] = 127
     """
-    try:
-        import netCDF4 as nc
-    except ImportError as err:
-        raise ImportError(f"Unable to import netCDF4 module")
-    ncf = nc.Dataset(ncfile)
-    ncdims = {}
-    for d in ncf.dimensions.keys():
-        ncdims[d] = int(len(ncf.dimensions[d]))
-    ncf.close()
+    ncdims = probe_ncfile(ncfile)['dims']
+    if dims is None:
+        return dict(ncdims)
+    return {d: ncdims[d] for d in dims}
 
-    return ncdims
+
+_nemsdims_cache = {}
 
 
 def get_nemsdims(nemsfile, nemsexe):
@@ -96,19 +267,35 @@ def get_nemsdims(nemsfile, nemsexe):
     output: nemsdims - dictionary where key is the name of a dimension and the
                        value is the length of that dimension
                        ex: nemsdims['pfull'] = 127
+    All three dimensions are requested from a single nemsio_get invocation,
+    and the result is cached by path, size and modification time.
     """
+    import os
     import subprocess
     ncdims = {
         'dimx': 'grid_xt',
                 'dimy': 'grid_yt',
                 'dimz': 'pfull',
     }
+    stat = os.stat(nemsfile)
+    key = (os.path.realpath(nemsfile), stat.st_size, stat.st_mtime_ns)
+    if key in _nemsdims_cache:
+        return dict(_nemsdims_cache[key])
+
+    out = subprocess.run([nemsexe, nemsfile] + list(ncdims), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
     nemsdims = {}
-    for dim in ['dimx', 'dimy', 'dimz']:
-        out = subprocess.Popen([nemsexe, nemsfile, dim], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        stdout, stderr = out.communicate()
-        nemsdims[ncdims[dim]] = int(stdout.split(' ')[-1].rstrip())
-    return nemsdims
+    for line in out.stdout.decode('utf-8', errors='replace').splitlines():
+        words = line.split()
+        if len(words) >= 2 and words[0].lower() in ncdims:
+            nemsdims[ncdims[words[0].lower()]] = int(words[-1])
+    # versions of nemsio_get that only answer one field per call
+    for dim in ncdims:
+        if ncdims[dim] not in nemsdims:
+            out = subprocess.run([nemsexe, nemsfile, dim], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            nemsdims[ncdims[dim]] = int(out.stdout.decode('utf-8').split()[-1])
+
+    _nemsdims_cache[key] = nemsdims
+    return dict(nemsdims)
 
 
 def get_timeinfo(ncfile):
@@ -118,20 +305,15 @@ def get_timeinfo(ncfile):
      returns: inittime, validtime - datetime objects
               nfhour - integer forecast hour
     """
-    try:
-        import netCDF4 as nc
-    except ImportError as err:
-        raise ImportError(f"Unable to import netCDF4 module\n{err}")
     import datetime as dt
     import re
-    ncf = nc.Dataset(ncfile)
-    time_units = ncf['time'].units
+    ncprobe = probe_ncfile(ncfile)
+    time_units = ncprobe['time_units']
     date_str = time_units.split('since ')[1]
     date_str = re.sub("[^0-9]", "", date_str)
     initstr = date_str[0:10]
     inittime = dt.datetime.strptime(initstr, "%Y%m%d%H")
-    nfhour = int(ncf['time'][0])
+    nfhour = ncprobe['fhour']
     validtime = inittime + dt.timedelta(hours=nfhour)
-    ncf.close()
 
     return inittime, validtime, nfhour
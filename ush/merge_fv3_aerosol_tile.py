@@ -27,7 +27,6 @@ optional arguments:
 """
 import os
 import sys
-import subprocess
 from typing import List
 from functools import partial
 from shutil import copyfile
@@ -40,7 +39,59 @@ import netCDF4
 print = partial(print, flush=True)
 
 
-def merge_tile(base_file_name: str, ctrl_file_name: str, core_file_name: str, rest_file_name: str, append_file_name: str, tracers_to_append: List[str]) -> None:
+# Number of model levels processed at a time when copying or scaling 3D fields
+levels_per_block = 16
+
+
+def _copy_variable(src_var: netCDF4.Variable, dst_var: netCDF4.Variable) -> None:
+    """Copy the data of a variable, a block of levels (leading dimension) at a time"""
+    src_var.set_auto_maskandscale(False)
+    dst_var.set_auto_maskandscale(False)
+    if src_var.ndim == 0:
+        dst_var.assignValue(src_var.getValue())
+    elif src_var.ndim < 3:
+        dst_var[:] = src_var[:]
+    else:
+        for k in range(0, src_var.shape[0], levels_per_block):
+            dst_var[k:k + levels_per_block] = src_var[k:k + levels_per_block]
+
+
+def _create_output_file(base_file: netCDF4.Dataset, out_file_name: str, new_ntracer: int) -> netCDF4.Dataset:
+    """
+    Create a copy of base_file with the ntracer dimension resized to new_ntracer.
+
+    netCDF dimensions cannot be resized in place, so the new file is defined with the
+    new ntracer size and all data are copied over in a single pass.  Checksum
+    attributes are not copied.
+    """
+    out_file = netCDF4.Dataset(out_file_name, "w", format=base_file.data_model)
+    out_file.setncatts({name: value for name, value in base_file.__dict__.items() if name != "checksum"})
+
+    for name, dim in base_file.dimensions.items():
+        if name == "ntracer":
+            size = new_ntracer
+        else:
+            size = None if dim.isunlimited() else dim.size
+        out_file.createDimension(name, size)
+
+    for name, var in base_file.variables.items():
+        storage = {}
+        if base_file.data_model.startswith("NETCDF4"):
+            filters = var.filters()
+            storage = {key: filters[key] for key in ("zlib", "complevel", "shuffle", "fletcher32")}
+            if var.chunking() != "contiguous":
+                storage["chunksizes"] = var.chunking()
+        attrs = {att: var.getncattr(att) for att in var.ncattrs() if att not in ("checksum", "_FillValue")}
+        out_var = out_file.createVariable(name, var.datatype, var.dimensions,
+                                          fill_value=getattr(var, "_FillValue", None), **storage)
+        out_var.setncatts(attrs)
+        _copy_variable(var, out_var)
+
+    return out_file
+
+
+def merge_tile(base_file_name: str, ctrl_file_name: str, core_file_name: str, rest_file_name: str, append_file_name: str,
+               tracers_to_append: List[str], out_file_name: str = None) -> None:
     if not os.path.isfile(base_file_name):
         print("FATAL ERROR: Atmosphere file " + base_file_name + " does not exist!")
         sys.exit(102)
@@ -61,8 +112,11 @@ def merge_tile(base_file_name: str, ctrl_file_name: str, core_file_name: str, re
         print("FATAL ERROR: Chemistry file " + append_file_name + " does not exist!")
         sys.exit(106)
 
+    if out_file_name is None:
+        out_file_name = base_file_name
+
     append_file = netCDF4.Dataset(append_file_name, "r")
-    base_file = netCDF4.Dataset(base_file_name, "r+")
+    base_file = netCDF4.Dataset(base_file_name, "r")
     core_file = netCDF4.Dataset(core_file_name, "r")
     ctrl_file = netCDF4.Dataset(ctrl_file_name, "r")
     rest_file = netCDF4.Dataset(rest_file_name, "r")
@@ -88,55 +142,71 @@ def merge_tile(base_file_name: str, ctrl_file_name: str, core_file_name: str, re
         print("FATAL ERROR: Inconsistent size of B(k) arrays: src=", bk.size, ", dst=", bi.size)
         sys.exit(108)
 
-    dp = np.zeros(delp.shape)
-    for k in range(0, dp.shape[0]):
-        dp[k, :, :] = ak[k + 1] - ak[k] + psfc * (bk[k + 1] - bk[k])
+    # pressure thickness of each IC layer, broadcast over all levels at once
+    dp = np.diff(ak)[:, np.newaxis, np.newaxis] + psfc[np.newaxis, :, :] * np.diff(bk)[:, np.newaxis, np.newaxis]
 
     scale_factor = delp / dp
 
-    # print(base_file)
-    # print(base_file.dimensions["ntracer"])
-
+    # Determine the new number of tracers up front so the output file only needs to be written once
     old_ntracer = base_file.dimensions["ntracer"].size
-    new_ntracer = old_ntracer
+    new_tracers = [name for name in tracers_to_append if name not in base_file.variables.keys()]
+    new_ntracer = old_ntracer + len(new_tracers)
 
-    print("Adding the following variables to " + base_file_name + ":\n")
+    if new_ntracer != old_ntracer:
+        print(f"Updating ntracer from {old_ntracer} to {new_ntracer}")
+        tmp_file_name = out_file_name + ".tmp"
+        out_file = _create_output_file(base_file, tmp_file_name, new_ntracer)
+        base_file.close()
+    else:
+        base_file.close()
+        if out_file_name != base_file_name:
+            copyfile(base_file_name, out_file_name)
+        out_file = netCDF4.Dataset(out_file_name, "r+")
+        # Remove checksums
+        if "checksum" in out_file.ncattrs():
+            out_file.delncattr("checksum")
+        for var in out_file.variables.values():
+            if "checksum" in var.ncattrs():
+                var.delncattr("checksum")
+
+    print("Adding the following variables to " + out_file_name + ":\n")
 
     print(" Name   | Total mass (restart) | Total mass (IC)      | Max column abs. diff.")
     print("-" * 8 + "+" + "-" * 22 + "+" + "-" * 22 + "+" + "-" * 24)
     for variable_name in tracers_to_append:
         variable = append_file[variable_name]
-        if variable_name not in base_file.variables.keys():
-            new_ntracer = new_ntracer + 1
-            base_file.createVariable(variable_name, variable.datatype, base_file["sphum"].dimensions)
-        base_file[variable_name][0, :, :] = 0.
-        base_file[variable_name][1:, :, :] = scale_factor * variable[0, :, :, :]
-        base_file[variable_name].setncatts(variable.__dict__)
-        mass_src = variable * delp
-        mass_dst = base_file[variable_name][1:, :, :] * dp
-        mass_err_max = np.max(np.abs(mass_src - mass_dst))
-        total_mass_src = np.sum(mass_src)
-        total_mass_dst = np.sum(mass_dst)
+        if variable_name in new_tracers:
+            out_file.createVariable(variable_name, variable.datatype, out_file["sphum"].dimensions)
+        out_var = out_file[variable_name]
+        out_var.setncatts({name: value for name, value in variable.__dict__.items() if name != "checksum"})
+        out_var[0, :, :] = 0.
+
+        total_mass_src = 0.
+        total_mass_dst = 0.
+        mass_err_max = 0.
+        # Scale the tracer a block of levels at a time
+        for k in range(0, dp.shape[0], levels_per_block):
+            kend = min(k + levels_per_block, dp.shape[0])
+            src = variable[0, k:kend, :, :]
+            dst = (scale_factor[k:kend] * src).astype(variable.datatype)
+            out_var[k + 1:kend + 1, :, :] = dst
+            mass_src = src * delp[k:kend]
+            mass_dst = dst * dp[k:kend]
+            total_mass_src += np.sum(mass_src)
+            total_mass_dst += np.sum(mass_dst)
+            mass_err_max = max(mass_err_max, np.max(np.abs(mass_src - mass_dst)))
         print(f' {variable_name:6}   {total_mass_src:20}   {total_mass_dst:20}    {mass_err_max:22}')
-        # print("Done adding " + variable_name)
 
     print("-" * 79 + "\n")
 
-    base_file.close()
+    out_file.close()
+    append_file.close()
+    core_file.close()
+    ctrl_file.close()
+    rest_file.close()
 
     if new_ntracer != old_ntracer:
-        print("Updating ntracer")
-
-        # Use ncks to rewrite file without ntracer so we can define it anew
-        subprocess.run(["ncks", "-x", "-v", "ntracer", "-O", base_file_name, base_file_name], check=True)
-
-        base_file = netCDF4.Dataset(base_file_name, "r+")
-        base_file.createDimension("ntracer", new_ntracer)
-        # print(base_file.dimensions["ntracer"])
-        base_file.close()
-
-    # Remove checksum
-    subprocess.run(["ncatted", "-a", "checksum,,d,,", base_file_name], check=True)
+        os.replace(tmp_file_name, out_file_name)
 
 
 def main() -> None:
@@ -163,16 +233,14 @@ def main() -> None:
     if out_file_name is None:
         print("INFO: No out_file specified, will edit atm_file in-place")
         out_file_name = atm_file_name
-    else:
-        if os.path.isfile(out_file_name):
-            print("WARNING: Specified out file " + out_file_name + " exists and will be overwritten")
-        copyfile(atm_file_name, out_file_name)
+    elif os.path.isfile(out_file_name):
+        print("WARNING: Specified out file " + out_file_name + " exists and will be overwritten")
 
     variable_file = open(variable_file)
     variable_names = variable_file.read().splitlines()
     variable_file.close()
 
-    merge_tile(out_file_name, ctrl_file_name, core_file_name, rest_file_name, chem_file_name, variable_names)
+    merge_tile(atm_file_name, ctrl_file_name, core_file_name, rest_file_name, chem_file_name, variable_names, out_file_name)
 
     # print(variable_names)
 
@@ -2,11 +2,8 @@
 
 import os
 import glob
-import gzip
-import tarfile
 from logging import getLogger
 from pprint import pformat
-from netCDF4 import Dataset
 from typing import Dict, List
 
 from wxflow import (AttrDict,
@@ -17,6 +14,9 @@ from wxflow import (AttrDict,
                     YAMLFile, parse_j2yaml,
                     logit)
 from pygfs.jedi import Jedi
+from pygfs.utils.staging import StagingPlan
+from pygfs.utils.diag_bundle import DiagBundler
+from pygfs.utils.fv3_increments import DEFAULT_BLOCK_BYTES, add_fv3_increments
 
 logger = getLogger(__name__.split('.')[-1])
 
@@ -98,10 +98,13 @@ class AerosolAnalysis(Task):
         logger.info(f"Initializing JEDI variational DA application")
         self.jedi_dict['aeroanlvar'].initialize(self.task_config)
 
+        # the files are staged together once they are all listed
+        staging = StagingPlan()
+
         # stage observations
         logger.info(f"Staging list of observation files generated from JEDI config")
         obs_dict = self.jedi_dict['aeroanlvar'].render_jcb(self.task_config, 'aero_obs_staging')
-        FileHandler(obs_dict).sync()
+        staging.add(obs_dict)
         logger.debug(f"Observation files:\n{pformat(obs_dict)}")
 
         # # stage bias corrections
@@ -120,21 +123,23 @@ class AerosolAnalysis(Task):
         # stage CRTM fix files
         logger.info(f"Staging CRTM fix files from {self.task_config.CRTM_FIX_YAML}")
         crtm_fix_dict = parse_j2yaml(self.task_config.CRTM_FIX_YAML, self.task_config)
-        FileHandler(crtm_fix_dict).sync()
+        staging.add(crtm_fix_dict, hardlink=True)
         logger.debug(f"CRTM fix files:\n{pformat(crtm_fix_dict)}")
 
         # stage fix files
         logger.info(f"Staging JEDI fix files from {self.task_config.JEDI_FIX_YAML}")
         jedi_fix_dict = parse_j2yaml(self.task_config.JEDI_FIX_YAML, self.task_config)
-        FileHandler(jedi_fix_dict).sync()
+        staging.add(jedi_fix_dict, hardlink=True)
         logger.debug(f"JEDI fix files:\n{pformat(jedi_fix_dict)}")
 
         # stage files from COM and create working directories
         logger.info(f"Staging files prescribed from {self.task_config.AERO_STAGE_VARIATIONAL_TMPL}")
         aero_var_stage_dict = parse_j2yaml(self.task_config.AERO_STAGE_VARIATIONAL_TMPL, self.task_config)
-        FileHandler(aero_var_stage_dict).sync()
+        staging.add(aero_var_stage_dict)
         logger.debug(f"Staging from COM:\n{pformat(aero_var_stage_dict)}")
 
+        staging.sync()
+
     @logit(logger)
     def execute(self, jedi_dict_key: str) -> None:
         """Execute JEDI application of aero analysis
@@ -172,12 +177,6 @@ class AerosolAnalysis(Task):
         # get list of diag files to put in tarball
         diags = glob.glob(os.path.join(self.task_config['DATA'], 'diags', 'diag*nc'))
 
-        # gzip the files first
-        for diagfile in diags:
-            logger.info(f'Adding {diagfile} to tar file')
-            with open(diagfile, 'rb') as f_in, gzip.open(f"{diagfile}.gz", 'wb') as f_out:
-                f_out.writelines(f_in)
-
         # ---- add increments to RESTART files
         logger.info('Adding increments to RESTART files')
         self._add_fms_cube_sphere_increments()
@@ -190,11 +189,8 @@ class AerosolAnalysis(Task):
         aero_var_final_list = parse_j2yaml(self.task_config.AERO_FINALIZE_VARIATIONAL_TMPL, self.task_config)
         FileHandler(aero_var_final_list).sync()
 
-        # open tar file for writing
-        with tarfile.open(aerostat, "w|gz") as archive:
-            for diagfile in diags:
-                diaggzip = f"{diagfile}.gz"
-                archive.add(diaggzip, arcname=os.path.basename(diaggzip))
+        # gzip the diag files straight into the gzipped tar file
+        DiagBundler().bundle(aerostat, diags, compress_members=True, compress_archive=True)
         logger.info(f'Saved diags to {aerostat}')
 
     def clean(self):
@@ -222,6 +218,13 @@ class AerosolAnalysis(Task):
     def add_fv3_increments(self, inc_file_tmpl: str, bkg_file_tmpl: str, incvars: List) -> None:
         """Add cubed-sphere increments to cubed-sphere backgrounds
 
+        The tiles are processed in parallel and each variable is added in place
+        in blocks of levels (see pygfs.utils.fv3_increments).
+
+        The number of tiles processed concurrently and the memory budget in bytes
+        of the blocks held by each process are read from FV3INC_NPROC and
+        FV3INC_BLOCK_BYTES in the task configuration, if set.
+
         Parameters
         ----------
         inc_file_tmpl : str
@@ -232,16 +235,6 @@ class AerosolAnalysis(Task):
            List of increment variables to add to the background
         """
 
-        for itile in range(1, self.task_config.ntiles + 1):
-            inc_path = inc_file_tmpl.format(tilenum=itile)
-            bkg_path = bkg_file_tmpl.format(tilenum=itile)
-            with Dataset(inc_path, mode='r') as incfile, Dataset(bkg_path, mode='a') as rstfile:
-                for vname in incvars:
-                    increment = incfile.variables[vname][:]
-                    bkg = rstfile.variables[vname][:]
-                    anl = bkg + increment
-                    rstfile.variables[vname][:] = anl[:]
-                    try:
-                        rstfile.variables[vname].delncattr('checksum')  # remove the checksum so fv3 does not complain
-                    except (AttributeError, RuntimeError):
-                        pass  # checksum is missing, move on
+        add_fv3_increments(inc_file_tmpl, bkg_file_tmpl, incvars, ntiles=self.task_config.ntiles,
+                           nproc=self.task_config.get('FV3INC_NPROC'),
+                           max_block_bytes=self.task_config.get('FV3INC_BLOCK_BYTES', DEFAULT_BLOCK_BYTES))
@@ -2,10 +2,8 @@
 
 import os
 import glob
-import tarfile
 from logging import getLogger
 from pprint import pformat
-from netCDF4 import Dataset
 from typing import List, Dict, Any, Union, Optional
 
 from jcb import render
@@ -13,6 +11,9 @@ from wxflow import (parse_j2yaml, FileHandler, rm_p, logit,
                     Task, Executable, WorkflowException, to_fv3time, to_YMD,
                     Template, TemplateConstants)
 
+from pygfs.utils.diag_bundle import DiagBundler
+from pygfs.utils.fv3_increments import DEFAULT_BLOCK_BYTES, add_fv3_increments
+
 logger = getLogger(__name__.split('.')[-1])
 
 
@@ -127,6 +128,13 @@ class Analysis(Task):
     def add_fv3_increments(self, inc_file_tmpl: str, bkg_file_tmpl: str, incvars: List) -> None:
         """Add cubed-sphere increments to cubed-sphere backgrounds
 
+        The tiles are processed in parallel and each variable is added in place
+        in blocks of levels (see pygfs.utils.fv3_increments).
+
+        The number of tiles processed concurrently and the memory budget in bytes
+        of the blocks held by each process are read from FV3INC_NPROC and
+        FV3INC_BLOCK_BYTES in the task configuration, if set.
+
         Parameters
         ----------
         inc_file_tmpl : str
@@ -137,19 +145,9 @@ class Analysis(Task):
            List of increment variables to add to the background
         """
 
-        for itile in range(1, self.task_config.ntiles + 1):
-            inc_path = inc_file_tmpl.format(tilenum=itile)
-            bkg_path = bkg_file_tmpl.format(tilenum=itile)
-            with Dataset(inc_path, mode='r') as incfile, Dataset(bkg_path, mode='a') as rstfile:
-                for vname in incvars:
-                    increment = incfile.variables[vname][:]
-                    bkg = rstfile.variables[vname][:]
-                    anl = bkg + increment
-                    rstfile.variables[vname][:] = anl[:]
-                    try:
-                        rstfile.variables[vname].delncattr('checksum')  # remove the checksum so fv3 does not complain
-                    except (AttributeError, RuntimeError):
-                        pass  # checksum is missing, move on
+        add_fv3_increments(inc_file_tmpl, bkg_file_tmpl, incvars, ntiles=self.task_config.ntiles,
+                           nproc=self.task_config.get('FV3INC_NPROC'),
+                           max_block_bytes=self.task_config.get('FV3INC_BLOCK_BYTES', DEFAULT_BLOCK_BYTES))
 
     @logit(logger)
     def link_jediexe(self) -> None:
@@ -196,11 +194,8 @@ class Analysis(Task):
 
         logger.info(f"Compressing {len(diags)} diag files to {statfile}")
 
-        # Open tar.gz file for writing
-        with tarfile.open(statfile, "w:gz") as tgz:
-            # Add diag files to tarball
-            for diagfile in diags:
-                tgz.add(diagfile, arcname=os.path.basename(diagfile))
+        # Stream the diag files into a gzipped tar file
+        DiagBundler().bundle(statfile, diags, compress_members=False, compress_archive=True)
 
 
 @logit(logger)
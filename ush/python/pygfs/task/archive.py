@@ -4,6 +4,8 @@ import glob
 import os
 import shutil
 import tarfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from logging import getLogger
 from typing import Any, Dict, List
 
@@ -11,7 +13,12 @@ from wxflow import (AttrDict, FileHandler, Hsi, Htar, Task, to_timedelta,
                     chgrp, get_gid, logit, mkdir_p, parse_j2yaml, rm_p, rmdir,
                     strftime, to_YMDH, which, chdir, ProcessError)
 
+from pygfs.utils.archive_utils import ArchiveManifest, DirectoryScanCache
+
 git_filename = "git_info.log"
+manifest_dirname = ".archive_manifest"
+# Read buffer used when copying files into local tarballs (large sequential reads)
+tar_bufsize = 16 * 1024 * 1024
 logger = getLogger(__name__.split('.')[-1])
 
 
@@ -47,6 +54,12 @@ class Archive(Task):
         # Boolean used for cleanup if the EXPDIR was archived
         self.archive_expdir = False
 
+        # Number of tarballs to build concurrently
+        self.tar_nproc = 1
+
+        # Manifest of previously archived files; only used if ARCH_SKIP_UNCHANGED is set
+        self.manifest = None
+
     @logit(logger)
     def configure_vrfy(self, arch_dict: Dict[str, Any]) -> (Dict[str, Any]):
         """Determine which files will need to be created to archive to arcdir.
@@ -148,6 +161,15 @@ class Archive(Task):
         else:
             raise ValueError("FATAL ERROR: Neither HPSSARCH nor LOCALARCH are set to True!")
 
+        # Number of tarballs that may be built concurrently
+        self.tar_nproc = max(1, int(arch_dict.get("ARCH_TAR_NPROC") or 1))
+
+        # Skip tarballs whose contents have not changed since they were last archived
+        self.manifest = None
+        if arch_dict.get("ARCH_SKIP_UNCHANGED"):
+            self.manifest = ArchiveManifest(os.path.join(arch_dict.ROTDIR, manifest_dirname))
+        target_exists = self.hsi.exists if arch_dict.HPSSARCH else os.path.exists
+
         # Determine if we are archiving the EXPDIR this cycle (always skip for ensembles)
         if "enkf" not in arch_dict.RUN and arch_dict.ARCH_EXPDIR:
             self.archive_expdir = self._archive_expdir(arch_dict)
@@ -166,13 +188,26 @@ class Archive(Task):
 
         atardir_sets = []
 
+        # Share directory listings and stat results across all datasets
+        scan_cache = DirectoryScanCache()
+
         for dataset in parsed_sets.datasets.values():
 
-            dataset["fileset"] = Archive._create_fileset(dataset)
-            dataset["has_rstprod"] = Archive._has_rstprod(dataset.fileset)
+            dataset["fileset"] = Archive._create_fileset(dataset, scan_cache)
+
+            if self.manifest is not None and self.manifest.is_unchanged(dataset.target, dataset.fileset,
+                                                                        stat=scan_cache.stat,
+                                                                        target_exists=target_exists):
+                logger.info(f"Skipping {dataset.target}, its files are unchanged since they were last archived")
+                continue
+
+            dataset["has_rstprod"] = Archive._has_rstprod(dataset.fileset, scan_cache)
 
             atardir_sets.append(dataset)
 
+        logger.info(f"Fileset construction issued {scan_cache.metadata_calls} metadata calls; "
+                    f"{scan_cache.saved_calls} were answered from the directory scan cache")
+
         return atardir_sets
 
     @logit(logger)
@@ -211,23 +246,179 @@ class Archive(Task):
             logger.warning(f"WARNING: skipping would-be empty archive {atardir_set.target}.")
             return
 
-        if atardir_set.has_rstprod:
+        try:
+            elapsed = Archive._build_tarball(self.cvf, atardir_set.target, atardir_set.fileset)
+        except Exception:
+            self._backup_failed(atardir_set)
+            raise
+
+        self._backup_complete(atardir_set, elapsed)
+
+    @logit(logger)
+    def execute_backup_datasets(self, atardir_sets: List[Dict[str, Any]]) -> None:
+        """Create a list of backup tarballs, building up to self.tar_nproc of
+        them concurrently.
+
+        Local tarballs are written by tarfile and are built in a process pool.
+        htar is an external program, so a thread pool is enough to drive it.
+        Restricted data is protected in this process as each tarball finishes.
+
+        Parameters
+        ----------
+        atardir_sets: List[Dict[str, Any]]
+            List of dicts defining sets of files to backup and the target tarballs.
+
+        Return
+        ------
+        None
+        """
+
+        backup_sets = []
+        for atardir_set in atardir_sets:
+            if len(atardir_set.fileset) == 0:
+                logger.warning(f"WARNING: skipping would-be empty archive {atardir_set.target}.")
+            else:
+                backup_sets.append(atardir_set)
+
+        nproc = min(self.tar_nproc, len(backup_sets))
+        if nproc <= 1:
+            for atardir_set in backup_sets:
+                self.execute_backup_dataset(atardir_set)
+            return
+
+        logger.info(f"Creating {len(backup_sets)} tarballs with {nproc} concurrent workers")
+
+        pool_executor = ProcessPoolExecutor if self.tar_cmd == "tar" else ThreadPoolExecutor
+        with pool_executor(max_workers=nproc) as executor:
+            futures = {executor.submit(Archive._build_tarball, self.cvf,
+                                       atardir_set.target, atardir_set.fileset): atardir_set
+                       for atardir_set in backup_sets}
+
+            remaining = set(futures)
+            for future in as_completed(futures):
+                remaining.discard(future)
+                atardir_set = futures[future]
+                try:
+                    elapsed = future.result()
+                except Exception:
+                    for pending in remaining:
+                        pending.cancel()
+                    self._drain_backups({pending: futures[pending] for pending in remaining})
+                    self._backup_failed(atardir_set)
+                    raise
+
+                self._backup_complete(atardir_set, elapsed)
+
+    @logit(logger)
+    def _drain_backups(self, futures: Dict[Future, Dict[str, Any]]) -> None:
+        """Wait for the tarballs still being built after another one failed.
+        Restricted tarballs that finish are protected and those that fail are
+        deleted, so that none is left behind with the default group and mode.
+
+        Parameters
+        ----------
+        futures: Dict[Future, Dict[str, Any]]
+            Futures of the tarballs not yet handled, mapped to their datasets.
+
+        Return
+        ------
+        None
+        """
+
+        for future in as_completed(futures):
+            atardir_set = futures[future]
+            if future.cancelled() or not atardir_set.has_rstprod:
+                continue
 
             try:
-                self.cvf(atardir_set.target, atardir_set.fileset)
-            # Regardless of exception type, attempt to remove the target
+                future.result()
             except Exception:
-                self.rm_cmd(atardir_set.target)
-                raise RuntimeError(f"FATAL ERROR: Failed to create restricted archive {atardir_set.target}, deleting!")
+                logger.error(f"Failed to create restricted archive {atardir_set.target}, deleting!")
+                try:
+                    self.rm_cmd(atardir_set.target)
+                except Exception:
+                    logger.error(f"Failed to delete {atardir_set.target}, please verify that it has been deleted!")
+                continue
+
+            try:
+                self._protect_rstprod(atardir_set)
+            except RuntimeError as err:
+                # The tarball failure being handled is raised by the caller
+                logger.error(str(err))
+
+    @staticmethod
+    def _build_tarball(cvf, target: str, fileset: List) -> float:
+        """Run a tarball creation command and time it.
+
+        Parameters
+        ----------
+        cvf : Callable
+            Function used to create the tarball (htar cvf or Archive._create_tarball)
+        target : str
+            Tarball to create
+        fileset : List
+            List of files to add to the archive
+
+        Return
+        ------
+        elapsed : float
+            Time in seconds taken to create the tarball
+        """
+
+        start = time.perf_counter()
+        cvf(target, fileset)
+        return time.perf_counter() - start
+
+    @logit(logger)
+    def _backup_failed(self, atardir_set: Dict[str, Any]) -> None:
+        """Clean up after a failed tarball.  Restricted tarballs are deleted
+        and a RuntimeError raised; otherwise nothing is done and the caller
+        re-raises the original exception.
+        """
+
+        if atardir_set.has_rstprod:
+            # Regardless of exception type, attempt to remove the target
+            self.rm_cmd(atardir_set.target)
+            raise RuntimeError(f"FATAL ERROR: Failed to create restricted archive {atardir_set.target}, deleting!")
 
+    @logit(logger)
+    def _backup_complete(self, atardir_set: Dict[str, Any], elapsed: float) -> None:
+        """Protect a finished tarball if it holds restricted data and report its throughput.
+        """
+
+        if atardir_set.has_rstprod:
             self._protect_rstprod(atardir_set)
 
+        if self.tar_cmd == "tar":
+            nbytes = os.path.getsize(atardir_set.target)
         else:
-            self.cvf(atardir_set.target, atardir_set.fileset)
+            nbytes = Archive._fileset_size(atardir_set.fileset)
+
+        rate = nbytes / elapsed / 1024 ** 2 if elapsed > 0 else 0.
+        logger.info(f"Created {atardir_set.target}: {nbytes / 1024 ** 2:.1f} MiB "
+                    f"in {elapsed:.1f} s ({rate:.1f} MiB/s)")
+
+        if self.manifest is not None:
+            self.manifest.update(atardir_set.target, atardir_set.fileset)
+
+    @staticmethod
+    def _fileset_size(fileset: List) -> int:
+        """Total size in bytes of the files (and directory contents) in a fileset.
+        """
+
+        nbytes = 0
+        for entry in fileset:
+            if os.path.isdir(entry):
+                for root, _, files in os.walk(entry):
+                    nbytes += sum(os.path.getsize(os.path.join(root, ff)) for ff in files)
+            elif os.path.exists(entry):
+                nbytes += os.path.getsize(entry)
+
+        return nbytes
 
     @staticmethod
     @logit(logger)
-    def _create_fileset(atardir_set: Dict[str, Any]) -> List:
+    def _create_fileset(atardir_set: Dict[str, Any], scan_cache: DirectoryScanCache = None) -> List:
         """
         Collect the list of all available files from the parsed yaml dict.
         Globs are expanded and if required files are missing, an error is
@@ -241,19 +432,28 @@ class Archive(Task):
         ----------
         atardir_set: Dict
             Contains full paths for required and optional files to be archived.
+
+        scan_cache: DirectoryScanCache
+            Cache of directory listings used to expand globs.  A new cache is
+            created if one is not provided.
         """
 
+        if scan_cache is None:
+            scan_cache = DirectoryScanCache()
+
         fileset = []
         # Check if any external files need to be brought into the ROTDIR (i.e. EXPDIR contents)
         if "FileHandler" in atardir_set:
             # Run the file handler to stage files for archiving
             FileHandler(atardir_set["FileHandler"]).sync()
+            # The staged files are not in any listings cached so far
+            scan_cache.clear()
 
         # Check that all required files are present and add them to the list of files to archive
         if "required" in atardir_set:
             if atardir_set.required is not None:
                 for item in atardir_set.required:
-                    glob_set = glob.glob(item)
+                    glob_set = scan_cache.glob(item)
                     if len(glob_set) == 0:
                         raise FileNotFoundError(f"FATAL ERROR: Required file, directory, or glob {item} not found!")
                     for entry in glob_set:
@@ -263,7 +463,7 @@ class Archive(Task):
         if "optional" in atardir_set:
             if atardir_set.optional is not None:
                 for item in atardir_set.optional:
-                    glob_set = glob.glob(item)
+                    glob_set = scan_cache.glob(item)
                     if len(glob_set) == 0:
                         logger.warning(f"WARNING: optional file/glob {item} not found!")
                     else:
@@ -274,7 +474,7 @@ class Archive(Task):
 
     @staticmethod
     @logit(logger)
-    def _has_rstprod(fileset: List) -> bool:
+    def _has_rstprod(fileset: List, scan_cache: DirectoryScanCache = None) -> bool:
         """
         Checks if any files in the input fileset belongs to rstprod.
 
@@ -282,8 +482,15 @@ class Archive(Task):
         ----------
         fileset : List
             List of filenames to check.
+
+        scan_cache: DirectoryScanCache
+            Cache of directory listings and stat results, e.g. the one used to
+            create the fileset.  A new cache is created if one is not provided.
         """
 
+        if scan_cache is None:
+            scan_cache = DirectoryScanCache()
+
         try:
             rstprod_gid = get_gid("rstprod")
         except KeyError:
@@ -292,9 +499,9 @@ class Archive(Task):
 
         # Expand globs and check each file for group ownership
         for file_or_glob in fileset:
-            glob_set = glob.glob(file_or_glob)
+            glob_set = scan_cache.glob(file_or_glob)
             for filename in glob_set:
-                if os.stat(filename).st_gid == rstprod_gid:
+                if scan_cache.stat(filename).st_gid == rstprod_gid:
                     return True
 
         return False
@@ -323,7 +530,7 @@ class Archive(Task):
 
     @staticmethod
     @logit(logger)
-    def _create_tarball(target: str, fileset: List) -> None:
+    def _create_tarball(target: str, fileset: List, bufsize: int = tar_bufsize) -> None:
         """Method to create a local tarball.
 
         Parameters
@@ -333,6 +540,9 @@ class Archive(Task):
 
         file_list : List
             List of files to add to an archive
+
+        bufsize : int
+            Size in bytes of the buffer used to copy file contents into the tarball
         """
 
         # TODO create a set of tar helper functions in wxflow
@@ -340,7 +550,7 @@ class Archive(Task):
         mkdir_p(os.path.dirname(os.path.realpath(target)))
 
         # Create the archive
-        with tarfile.open(target, "w") as tarball:
+        with tarfile.open(target, "w", copybufsize=bufsize) as tarball:
             for filename in fileset:
                 tarball.add(filename)
 
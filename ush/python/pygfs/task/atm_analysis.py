@@ -2,7 +2,6 @@
 
 import os
 import glob
-import gzip
 import tarfile
 from logging import getLogger
 from pprint import pformat
@@ -14,6 +13,8 @@ from wxflow import (AttrDict,
                     parse_j2yaml, save_as_yaml,
                     logit)
 from pygfs.jedi import Jedi
+from pygfs.utils.staging import StagingPlan
+from pygfs.utils.diag_bundle import DiagBundler
 
 logger = getLogger(__name__.split('.')[-1])
 
@@ -106,10 +107,13 @@ class AtmAnalysis(Task):
         logger.info(f"Initializing JEDI FV3 increment conversion application")
         self.jedi_dict['atmanlfv3inc'].initialize(self.task_config)
 
+        # the files are staged together once they are all listed
+        staging = StagingPlan()
+
         # stage observations
         logger.info(f"Staging list of observation files")
         obs_dict = self.jedi_dict['atmanlvar'].render_jcb(self.task_config, 'atm_obs_staging')
-        FileHandler(obs_dict).sync()
+        staging.add(obs_dict)
         logger.debug(f"Observation files:\n{pformat(obs_dict)}")
 
         # stage bias corrections
@@ -119,22 +123,19 @@ class AtmAnalysis(Task):
             logger.info(f"No bias correction files to stage")
         else:
             bias_dict['copy'] = Jedi.remove_redundant(bias_dict['copy'])
-            FileHandler(bias_dict).sync()
+            staging.add(bias_dict)
             logger.debug(f"Bias correction files:\n{pformat(bias_dict)}")
 
-            # extract bias corrections
-            Jedi.extract_tar_from_filehandler_dict(bias_dict)
-
         # stage CRTM fix files
         logger.info(f"Staging CRTM fix files from {self.task_config.CRTM_FIX_YAML}")
         crtm_fix_dict = parse_j2yaml(self.task_config.CRTM_FIX_YAML, self.task_config)
-        FileHandler(crtm_fix_dict).sync()
+        staging.add(crtm_fix_dict, hardlink=True)
         logger.debug(f"CRTM fix files:\n{pformat(crtm_fix_dict)}")
 
         # stage fix files
         logger.info(f"Staging JEDI fix files from {self.task_config.JEDI_FIX_YAML}")
         jedi_fix_dict = parse_j2yaml(self.task_config.JEDI_FIX_YAML, self.task_config)
-        FileHandler(jedi_fix_dict).sync()
+        staging.add(jedi_fix_dict, hardlink=True)
         logger.debug(f"JEDI fix files:\n{pformat(jedi_fix_dict)}")
 
         # stage static background error files, otherwise it will assume ID matrix
@@ -143,20 +144,20 @@ class AtmAnalysis(Task):
             berror_staging_dict = parse_j2yaml(self.task_config.BERROR_STAGING_YAML, self.task_config)
         else:
             berror_staging_dict = {}
-        FileHandler(berror_staging_dict).sync()
+        staging.add(berror_staging_dict, hardlink=True)
         logger.debug(f"Background error files:\n{pformat(berror_staging_dict)}")
 
         # stage ensemble files for use in hybrid background error
         if self.task_config.DOHYBVAR:
             logger.debug(f"Stage ensemble files for DOHYBVAR {self.task_config.DOHYBVAR}")
             fv3ens_staging_dict = parse_j2yaml(self.task_config.FV3ENS_STAGING_YAML, self.task_config)
-            FileHandler(fv3ens_staging_dict).sync()
+            staging.add(fv3ens_staging_dict)
             logger.debug(f"Ensemble files:\n{pformat(fv3ens_staging_dict)}")
 
         # stage backgrounds
         logger.info(f"Staging background files from {self.task_config.VAR_BKG_STAGING_YAML}")
         bkg_staging_dict = parse_j2yaml(self.task_config.VAR_BKG_STAGING_YAML, self.task_config)
-        FileHandler(bkg_staging_dict).sync()
+        staging.add(bkg_staging_dict)
         logger.debug(f"Background files:\n{pformat(bkg_staging_dict)}")
 
         # need output dir for diags and anl
@@ -165,7 +166,13 @@ class AtmAnalysis(Task):
             os.path.join(self.task_config.DATA, 'anl'),
             os.path.join(self.task_config.DATA, 'diags'),
         ]
-        FileHandler({'mkdir': newdirs}).sync()
+        staging.add({'mkdir': newdirs})
+
+        staging.sync()
+
+        # extract bias corrections
+        if bias_dict['copy'] is not None:
+            Jedi.extract_tar_from_filehandler_dict(bias_dict)
 
     @logit(logger)
     def execute(self, jedi_dict_key: str) -> None:
@@ -209,20 +216,9 @@ class AtmAnalysis(Task):
         # get list of diag files to put in tarball
         diags = glob.glob(os.path.join(self.task_config.DATA, 'diags', 'diag*nc'))
 
-        logger.info(f"Compressing {len(diags)} diag files to {atmstat}.gz")
-
-        # gzip the files first
-        logger.debug(f"Gzipping {len(diags)} diag files")
-        for diagfile in diags:
-            with open(diagfile, 'rb') as f_in, gzip.open(f"{diagfile}.gz", 'wb') as f_out:
-                f_out.writelines(f_in)
-
-        # open tar file for writing
-        logger.debug(f"Creating tar file {atmstat} with {len(diags)} gzipped diag files")
-        with tarfile.open(atmstat, "w") as archive:
-            for diagfile in diags:
-                diaggzip = f"{diagfile}.gz"
-                archive.add(diaggzip, arcname=os.path.basename(diaggzip))
+        # gzip the diag files straight into the tar file
+        logger.info(f"Creating tar file {atmstat} with {len(diags)} gzipped diag files")
+        DiagBundler().bundle(atmstat, diags, compress_members=True)
 
         # get list of yamls to copy to ROTDIR
         yamls = glob.glob(os.path.join(self.task_config.DATA, '*atm*yaml'))
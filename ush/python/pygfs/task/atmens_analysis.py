@@ -2,8 +2,6 @@
 
 import os
 import glob
-import gzip
-import tarfile
 from logging import getLogger
 from pprint import pformat
 from typing import Optional, Dict, Any
@@ -19,6 +17,8 @@ from wxflow import (AttrDict,
                     WorkflowException,
                     Template, TemplateConstants)
 from pygfs.jedi import Jedi
+from pygfs.utils.staging import StagingPlan
+from pygfs.utils.diag_bundle import DiagBundler
 
 logger = getLogger(__name__.split('.')[-1])
 
@@ -110,38 +110,38 @@ class AtmEnsAnalysis(Task):
         logger.info(f"Initializing JEDI FV3 increment conversion application")
         self.jedi_dict['atmensanlfv3inc'].initialize(self.task_config)
 
+        # the files are staged together once they are all listed
+        staging = StagingPlan()
+
         # stage observations
         logger.info(f"Staging list of observation files")
         obs_dict = self.jedi_dict['atmensanlobs'].render_jcb(self.task_config, 'atm_obs_staging')
-        FileHandler(obs_dict).sync()
+        staging.add(obs_dict)
         logger.debug(f"Observation files:\n{pformat(obs_dict)}")
 
         # stage bias corrections
         logger.info(f"Staging list of bias correction files")
         bias_dict = self.jedi_dict['atmensanlobs'].render_jcb(self.task_config, 'atm_bias_staging')
         bias_dict['copy'] = Jedi.remove_redundant(bias_dict['copy'])
-        FileHandler(bias_dict).sync()
+        staging.add(bias_dict)
         logger.debug(f"Bias correction files:\n{pformat(bias_dict)}")
 
-        # extract bias corrections
-        Jedi.extract_tar_from_filehandler_dict(bias_dict)
-
         # stage CRTM fix files
         logger.info(f"Staging CRTM fix files from {self.task_config.CRTM_FIX_YAML}")
         crtm_fix_dict = parse_j2yaml(self.task_config.CRTM_FIX_YAML, self.task_config)
-        FileHandler(crtm_fix_dict).sync()
+        staging.add(crtm_fix_dict, hardlink=True)
         logger.debug(f"CRTM fix files:\n{pformat(crtm_fix_dict)}")
 
         # stage fix files
         logger.info(f"Staging JEDI fix files from {self.task_config.JEDI_FIX_YAML}")
         jedi_fix_dict = parse_j2yaml(self.task_config.JEDI_FIX_YAML, self.task_config)
-        FileHandler(jedi_fix_dict).sync()
+        staging.add(jedi_fix_dict, hardlink=True)
         logger.debug(f"JEDI fix files:\n{pformat(jedi_fix_dict)}")
 
         # stage backgrounds
         logger.info(f"Stage ensemble member background files")
         bkg_staging_dict = parse_j2yaml(self.task_config.LGETKF_BKG_STAGING_YAML, self.task_config)
-        FileHandler(bkg_staging_dict).sync()
+        staging.add(bkg_staging_dict)
         logger.debug(f"Ensemble member background files:\n{pformat(bkg_staging_dict)}")
 
         # need output dir for diags and anl
@@ -150,7 +150,12 @@ class AtmEnsAnalysis(Task):
             os.path.join(self.task_config.DATA, 'anl'),
             os.path.join(self.task_config.DATA, 'diags'),
         ]
-        FileHandler({'mkdir': newdirs}).sync()
+        staging.add({'mkdir': newdirs})
+
+        staging.sync()
+
+        # extract bias corrections
+        Jedi.extract_tar_from_filehandler_dict(bias_dict)
 
     @logit(logger)
     def initialize_letkf(self) -> None:
@@ -211,20 +216,9 @@ class AtmEnsAnalysis(Task):
         # get list of diag files to put in tarball
         diags = glob.glob(os.path.join(self.task_config.DATA, 'diags', 'diag*nc'))
 
-        logger.info(f"Compressing {len(diags)} diag files to {atmensstat}.gz")
-
-        # gzip the files first
-        logger.debug(f"Gzipping {len(diags)} diag files")
-        for diagfile in diags:
-            with open(diagfile, 'rb') as f_in, gzip.open(f"{diagfile}.gz", 'wb') as f_out:
-                f_out.writelines(f_in)
-
-        # open tar file for writing
-        logger.debug(f"Creating tar file {atmensstat} with {len(diags)} gzipped diag files")
-        with tarfile.open(atmensstat, "w") as archive:
-            for diagfile in diags:
-                diaggzip = f"{diagfile}.gz"
-                archive.add(diaggzip, arcname=os.path.basename(diaggzip))
+        # gzip the diag files straight into the tar file
+        logger.info(f"Creating tar file {atmensstat} with {len(diags)} gzipped diag files")
+        DiagBundler().bundle(atmensstat, diags, compress_members=True)
 
         # get list of yamls to cop to ROTDIR
         yamls = glob.glob(os.path.join(self.task_config.DATA, '*atmens*yaml'))
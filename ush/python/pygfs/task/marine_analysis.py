@@ -4,6 +4,7 @@ import copy
 import os
 from logging import getLogger
 import pygfs.utils.marine_da_utils as mdau
+from pygfs.utils.staging import StagingPlan
 import glob
 import re
 import netCDF4
@@ -92,32 +93,44 @@ class MarineAnalysis(Task):
         """
         super().initialize()
 
+        # the files are staged together once they are all listed
+        staging = StagingPlan()
+
         # prepare the directory structure to run SOCA
-        self._prep_scratch_dir()
+        self._prep_scratch_dir(staging)
 
         # fetch observations from COMROOT
         # TODO(G.V. or A.E.): Keep a copy of the obs in the scratch fs after the obs prep job
-        self._fetch_observations()
+        self._fetch_observations(staging)
 
         # stage the ocean and ice backgrounds for FGAT
         bkg_list = parse_j2yaml(self.task_config.MARINE_DET_STAGE_BKG_YAML_TMPL, self.task_config)
-        FileHandler(bkg_list).sync()
+        staging.add(bkg_list)
 
         # stage the soca grid
-        FileHandler({'copy': [[os.path.join(self.task_config.COMIN_OCEAN_BMATRIX, 'soca_gridspec.nc'),
-                               os.path.join(self.task_config.DATA, 'soca_gridspec.nc')]]}).sync()
-
-        # link the flow dependent static B resources from the B-matrix task of the same cycle
-        os.symlink('../staticb', 'staticb')
+        staging.add({'copy': [[os.path.join(self.task_config.COMIN_OCEAN_BMATRIX, 'soca_gridspec.nc'),
+                               os.path.join(self.task_config.DATA, 'soca_gridspec.nc')]]})
 
         # hybrid EnVAR case
         if self.task_config.DOHYBVAR_OCN == "YES" or self.task_config.NMEM_ENS >= 2:
             # stage the ensemble weights
             logger.debug(f"Stage ensemble weights for the hybrid background error")
-            FileHandler({'copy': [[os.path.join(self.task_config.COMIN_OCEAN_BMATRIX, f'{self.task_config.APREFIX}ocean.ens_weights.nc'),
+            staging.add({'copy': [[os.path.join(self.task_config.COMIN_OCEAN_BMATRIX, f'{self.task_config.APREFIX}ocean.ens_weights.nc'),
                                    os.path.join(self.task_config.DATA, 'ocean.ens_weights.nc')],
                                   [os.path.join(self.task_config.COMIN_ICE_BMATRIX, f'{self.task_config.APREFIX}ice.ens_weights.nc'),
-                                   os.path.join(self.task_config.DATA, 'ice.ens_weights.nc')]]}).sync()
+                                   os.path.join(self.task_config.DATA, 'ice.ens_weights.nc')]]})
+
+        staging.sync()
+
+        # prepare the deterministic MOM6 input.nml
+        mdau.prep_input_nml(self.task_config)
+
+        # prepare the input.nml for the analysis geometry
+        mdau.prep_input_nml(self.task_config, output_nml="./anl_geom/mom_input.nml",
+                            simple_geom=True, mom_input="./anl_geom/MOM_input")
+
+        # link the flow dependent static B resources from the B-matrix task of the same cycle
+        os.symlink('../staticb', 'staticb')
 
         # prepare the yaml configuration to run the SOCA variational application
         self._prep_variational_yaml()
@@ -126,11 +139,16 @@ class MarineAnalysis(Task):
         self._prep_checkpoint()
 
     @logit(logger)
-    def _fetch_observations(self: Task) -> None:
+    def _fetch_observations(self: Task, staging: StagingPlan) -> None:
         """Fetch observations from COMIN_OBS
 
         This method will fetch the observations for the cycle and check the
         list against what is available for the cycle.
+
+        Parameters
+        ----------
+        staging : StagingPlan
+            Plan the observations are added to
         """
 
         # get the list of observations
@@ -157,12 +175,17 @@ class MarineAnalysis(Task):
             else:
                 logger.info(f"******* {obs_file} is not in the database")
 
-        FileHandler({'copy': obs_list}).sync()
+        staging.add({'copy': obs_list})
 
     @logit(logger)
-    def _prep_scratch_dir(self: Task) -> None:
+    def _prep_scratch_dir(self: Task, staging: StagingPlan) -> None:
         """Create and stage all the resources needed to run SOCA/JEDI, including the necesssary
            directory structure to run the SOCA variational application
+
+        Parameters
+        ----------
+        staging : StagingPlan
+            Plan the directories and resources are added to
         """
         logger.info(f"---------------- Setup runtime environement")
 
@@ -172,24 +195,17 @@ class MarineAnalysis(Task):
         diags = os.path.join(anl_dir, 'diags')            # output dir for soca DA obs space
         obs_in = os.path.join(anl_dir, 'obs')             # input      "           "
         anl_out = os.path.join(anl_dir, 'Data')           # output dir for soca DA
-        FileHandler({'mkdir': [diags, obs_in, anl_out]}).sync()
+        staging.add({'mkdir': [diags, obs_in, anl_out]})
 
         # stage fix files
         logger.info(f"Staging SOCA fix files from {self.task_config.SOCA_INPUT_FIX_DIR}")
         soca_fix_list = parse_j2yaml(self.task_config.SOCA_FIX_YAML_TMPL, self.task_config)
-        FileHandler(soca_fix_list).sync()
-
-        # prepare the deterministic MOM6 input.nml
-        mdau.prep_input_nml(self.task_config)
-
-        # prepare the input.nml for the analysis geometry
-        mdau.prep_input_nml(self.task_config, output_nml="./anl_geom/mom_input.nml",
-                            simple_geom=True, mom_input="./anl_geom/MOM_input")
+        staging.add(soca_fix_list, hardlink=True)
 
         # stage the soca utility yamls (gridgen, fields and ufo mapping yamls)
         logger.info(f"Staging SOCA utility yaml files from {self.task_config.PARMsoca}")
         soca_utility_list = parse_j2yaml(self.task_config.MARINE_UTILITY_YAML_TMPL, self.task_config)
-        FileHandler(soca_utility_list).sync()
+        staging.add(soca_utility_list)
 
     @logit(logger)
     def _prep_variational_yaml(self: Task) -> None:
@@ -4,6 +4,7 @@ import os
 import glob
 from logging import getLogger
 import pygfs.utils.marine_da_utils as mdau
+from pygfs.utils.staging import StagingPlan
 
 from wxflow import (AttrDict,
                     FileHandler,
@@ -100,33 +101,45 @@ class MarineBMat(Task):
         None
         """
 
+        # the files are staged together once they are all listed
+        staging = StagingPlan()
+
         # stage fix files
         logger.info(f"Staging SOCA fix files from {self.task_config.SOCA_INPUT_FIX_DIR}")
         soca_fix_list = parse_j2yaml(self.task_config.SOCA_FIX_YAML_TMPL, self.task_config)
-        FileHandler(soca_fix_list).sync()
-
-        # prepare the deterministic MOM6 input.nml
-        mdau.prep_input_nml(self.task_config)
-
-        # prepare the input.nml for the analysis geometry
-        mdau.prep_input_nml(self.task_config, output_nml="./anl_geom/mom_input.nml",
-                            simple_geom=True, mom_input="./anl_geom/MOM_input")
+        staging.add(soca_fix_list, hardlink=True)
 
         # stage backgrounds
         # TODO(G): Check ocean backgrounds dates for consistency
         bkg_list = parse_j2yaml(self.task_config.MARINE_DET_STAGE_BKG_YAML_TMPL, self.task_config)
-        FileHandler(bkg_list).sync()
+        staging.add(bkg_list)
 
         # stage the soca utility yamls (fields and ufo mapping yamls)
         logger.info(f"Staging SOCA utility yaml files")
         soca_utility_list = parse_j2yaml(self.task_config.MARINE_UTILITY_YAML_TMPL, self.task_config)
-        FileHandler(soca_utility_list).sync()
+        staging.add(soca_utility_list)
+
+        # stage the vtscales python script
+        staging.add({'copy': [[os.path.join(self.task_config.CALC_SCALE_EXEC),
+                               os.path.join(self.task_config.DATA, 'calc_scales.x')]]})
+
+        # stage ensemble members for the hybrid background error
+        if self.task_config.DOHYBVAR_OCN == "YES" or self.task_config.NMEM_ENS >= 2:
+            logger.debug(f"Stage ensemble members for the hybrid background error")
+            mdau.stage_ens_mem(self.task_config, staging)
+
+        staging.sync()
+
+        # prepare the deterministic MOM6 input.nml
+        mdau.prep_input_nml(self.task_config)
+
+        # prepare the input.nml for the analysis geometry
+        mdau.prep_input_nml(self.task_config, output_nml="./anl_geom/mom_input.nml",
+                            simple_geom=True, mom_input="./anl_geom/MOM_input")
 
         # initialize vtscales python script
         vtscales_config = self.jedi_dict['soca_parameters_diffusion_vt'].render_jcb(self.task_config, 'soca_vtscales')
         save_as_yaml(vtscales_config, os.path.join(self.task_config.DATA, 'soca_vtscales.yaml'))
-        FileHandler({'copy': [[os.path.join(self.task_config.CALC_SCALE_EXEC),
-                               os.path.join(self.task_config.DATA, 'calc_scales.x')]]}).sync()
 
         # initialize JEDI applications
         self.jedi_dict['gridgen'].initialize(self.task_config)
@@ -139,11 +152,6 @@ class MarineBMat(Task):
             self.jedi_dict['soca_ensb'].initialize(self.task_config)
             self.jedi_dict['soca_ensweights'].initialize(self.task_config)
 
-        # stage ensemble members for the hybrid background error
-        if self.task_config.DOHYBVAR_OCN == "YES" or self.task_config.NMEM_ENS >= 2:
-            logger.debug(f"Stage ensemble members for the hybrid background error")
-            mdau.stage_ens_mem(self.task_config)
-
         # create the symbolic link to the static B-matrix directory
         link_target = os.path.join(self.task_config.DATAstaticb)
         link_name = os.path.join(self.task_config.DATA, 'staticb')
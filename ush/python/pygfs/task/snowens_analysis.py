@@ -5,8 +5,6 @@ from logging import getLogger
 from typing import Dict, List, Optional, Any
 from pprint import pformat
 import glob
-import gzip
-import tarfile
 import numpy as np
 from netCDF4 import Dataset
 
@@ -21,6 +19,8 @@ from wxflow import (AttrDict,
                     Executable,
                     WorkflowException)
 from pygfs.jedi import Jedi
+from pygfs.utils.staging import StagingPlan
+from pygfs.utils.diag_bundle import DiagBundler
 
 logger = getLogger(__name__.split('.')[-1])
 
@@ -111,50 +111,42 @@ class SnowEnsAnalysis(Task):
         logger.info(f"Initializing JEDI ensemble mean application")
         self.jedi_dict['esnowanlensmean'].initialize(self.task_config)
 
+        # the files are staged together once they are all listed
+        staging = StagingPlan()
+
         # stage backgrounds
         logger.info(f"Staging background files from {self.task_config.SNOW_ENS_STAGE_TMPL}")
         bkg_staging_dict = parse_j2yaml(self.task_config.SNOW_ENS_STAGE_TMPL, self.task_config)
-        FileHandler(bkg_staging_dict).sync()
+        staging.add(bkg_staging_dict)
         logger.debug(f"Background files:\n{pformat(bkg_staging_dict)}")
 
         # stage orography
         logger.info(f"Staging orography files from {self.task_config.SNOW_OROG_STAGE_TMPL}")
         orog_staging_dict = parse_j2yaml(self.task_config.SNOW_OROG_STAGE_TMPL, self.task_config)
-        FileHandler(orog_staging_dict).sync()
+        staging.add(orog_staging_dict, hardlink=True)
         logger.debug(f"Orography files:\n{pformat(orog_staging_dict)}")
-        # note JEDI will try to read the orog files for each member, let's just symlink
-        logger.info("Linking orography files for each member")
-        oro_files = glob.glob(os.path.join(self.task_config.DATA, 'orog', 'ens', '*'))
-        for mem in range(1, self.task_config.NMEM_ENS + 1):
-            dest = os.path.join(self.task_config.DATA, 'bkg', f"mem{mem:03}")
-            for oro_file in oro_files:
-                os.symlink(oro_file, os.path.join(dest, os.path.basename(oro_file)))
-        # need to symlink orography files for the ensmean too
-        dest = os.path.join(self.task_config.DATA, 'bkg', 'ensmean')
-        for oro_file in oro_files:
-            os.symlink(oro_file, os.path.join(dest, os.path.basename(oro_file)))
 
         # stage observations
         logger.info(f"Staging list of observation files generated from JEDI config")
         obs_dict = self.jedi_dict['snowanlvar'].render_jcb(self.task_config, 'snow_obs_staging')
-        FileHandler(obs_dict).sync()
+        staging.add(obs_dict)
         logger.debug(f"Observation files:\n{pformat(obs_dict)}")
 
         # stage GTS bufr2ioda mapping YAML files
         logger.info(f"Staging GTS bufr2ioda mapping YAML files from {self.task_config.GTS_SNOW_STAGE_YAML}")
         gts_mapping_list = parse_j2yaml(self.task_config.GTS_SNOW_STAGE_YAML, self.task_config)
-        FileHandler(gts_mapping_list).sync()
+        staging.add(gts_mapping_list)
 
         # stage FV3-JEDI fix files
         logger.info(f"Staging JEDI fix files from {self.task_config.JEDI_FIX_YAML}")
         jedi_fix_dict = parse_j2yaml(self.task_config.JEDI_FIX_YAML, self.task_config)
-        FileHandler(jedi_fix_dict).sync()
+        staging.add(jedi_fix_dict, hardlink=True)
         logger.debug(f"JEDI fix files:\n{pformat(jedi_fix_dict)}")
 
         # staging B error files
         logger.info("Stage files for static background error")
         berror_staging_dict = parse_j2yaml(self.task_config.BERROR_STAGING_YAML, self.task_config)
-        FileHandler(berror_staging_dict).sync()
+        staging.add(berror_staging_dict, hardlink=True)
         logger.debug(f"Background error files:\n{pformat(berror_staging_dict)}")
 
         # need output dir for diags and anl
@@ -163,7 +155,21 @@ class SnowEnsAnalysis(Task):
             os.path.join(self.task_config.DATA, 'anl'),
             os.path.join(self.task_config.DATA, 'diags'),
         ]
-        FileHandler({'mkdir': newdirs}).sync()
+        staging.add({'mkdir': newdirs})
+
+        staging.sync()
+
+        # note JEDI will try to read the orog files for each member, let's just symlink
+        logger.info("Linking orography files for each member")
+        oro_files = glob.glob(os.path.join(self.task_config.DATA, 'orog', 'ens', '*'))
+        for mem in range(1, self.task_config.NMEM_ENS + 1):
+            dest = os.path.join(self.task_config.DATA, 'bkg', f"mem{mem:03}")
+            for oro_file in oro_files:
+                os.symlink(oro_file, os.path.join(dest, os.path.basename(oro_file)))
+        # need to symlink orography files for the ensmean too
+        dest = os.path.join(self.task_config.DATA, 'bkg', 'ensmean')
+        for oro_file in oro_files:
+            os.symlink(oro_file, os.path.join(dest, os.path.basename(oro_file)))
 
     @logit(logger)
     def prepare_IMS(self) -> None:
@@ -314,18 +320,9 @@ class SnowEnsAnalysis(Task):
 
         logger.info(f"Compressing {len(diags)} diag files to {snowstat}")
 
-        # gzip the files first
-        logger.debug(f"Gzipping {len(diags)} diag files")
-        for diagfile in diags:
-            with open(diagfile, 'rb') as f_in, gzip.open(f"{diagfile}.gz", 'wb') as f_out:
-                f_out.writelines(f_in)
-
-        # open tar file for writing
+        # gzip the diag files straight into the gzipped tar file
         logger.debug(f"Creating tar file {snowstat} with {len(diags)} gzipped diag files")
-        with tarfile.open(snowstat, "w|gz") as archive:
-            for diagfile in diags:
-                diaggzip = f"{diagfile}.gz"
-                archive.add(diaggzip, arcname=os.path.basename(diaggzip))
+        DiagBundler().bundle(snowstat, diags, compress_members=True, compress_archive=True)
 
         # get list of yamls to copy to ROTDIR
         yamls = glob.glob(os.path.join(self.task_config.DATA, '*snow*yaml'))
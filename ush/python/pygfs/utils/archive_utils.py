@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+from logging import getLogger
+from typing import Any, Callable, Dict, List
+
+from wxflow import logit, mkdir_p
+
+logger = getLogger(__name__.split('.')[-1])
+
+# Files up to this size are hashed so a new copy of them (e.g. EXPDIR files copied again into the
+# ROTDIR) is recognized as unchanged; larger files are taken to be changed if their mtime changed
+FULL_HASH_MAX_SIZE = 16 * 1024 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Same glob special characters recognized by the glob module
+magic_check = re.compile('([*?[])')
+
+
+class DirectoryScanCache:
+    """Glob and stat files from cached directory listings
+
+    Each directory is listed once with os.scandir and every glob pattern is
+    matched against the in-memory listing.  Stat results are cached as well, so
+    the rstprod group check and other consumers do not go back to the (Lustre)
+    metadata servers for files that were already seen.
+
+    The counters metadata_calls and saved_calls record how many scandir/stat
+    calls were issued and how many requests were answered from the cache.
+    """
+
+    def __init__(self) -> None:
+        self._listings = {}
+        self._stats = {}
+        self.metadata_calls = 0
+        self.saved_calls = 0
+
+    def clear(self) -> None:
+        """Forget all listings and stat results (e.g. after files were staged)"""
+        self._listings.clear()
+        self._stats.clear()
+
+    def listdir(self, dirname: str) -> Dict[str, os.DirEntry]:
+        """Return the entries of a directory, keyed by name
+
+        Parameters
+        ----------
+        dirname : str
+            Directory to list ('' is the current working directory)
+
+        Return
+        ------
+        entries : Dict[str, os.DirEntry]
+            Directory entries; empty if dirname is not a readable directory
+        """
+        if dirname in self._listings:
+            self.saved_calls += 1
+            return self._listings[dirname]
+
+        self.metadata_calls += 1
+        try:
+            with os.scandir(dirname or os.curdir) as it:
+                entries = {entry.name: entry for entry in it}
+        except OSError:
+            entries = {}
+
+        self._listings[dirname] = entries
+        return entries
+
+    def _entry(self, path: str):
+        """Find the directory entry of a path in its parent's listing, if possible"""
+        dirname, basename = os.path.split(path)
+        if basename in ("", os.curdir, os.pardir):
+            return None
+        return self.listdir(dirname).get(basename)
+
+    def lexists(self, path: str) -> bool:
+        """Cached equivalent of os.path.lexists"""
+        dirname, basename = os.path.split(path)
+        if basename in ("", os.curdir, os.pardir):
+            self.metadata_calls += 1
+            return os.path.lexists(path)
+        return basename in self.listdir(dirname)
+
+    def isdir(self, path: str) -> bool:
+        """Cached equivalent of os.path.isdir"""
+        entry = self._entry(path)
+        if entry is None:
+            self.metadata_calls += 1
+            return os.path.isdir(path)
+        return entry.is_dir()
+
+    def stat(self, path: str) -> os.stat_result:
+        """Cached equivalent of os.stat (follows symlinks)"""
+        if path in self._stats:
+            self.saved_calls += 1
+            return self._stats[path]
+
+        self.metadata_calls += 1
+        entry = self._entry(path)
+        result = os.stat(path) if entry is None else entry.stat()
+        self._stats[path] = result
+        return result
+
+    def glob(self, pattern: str) -> List[str]:
+        """Cached equivalent of glob.glob (non-recursive)
+
+        Parameters
+        ----------
+        pattern : str
+            Path or glob pattern to expand
+
+        Return
+        ------
+        matches : List[str]
+            Sorted list of matching paths
+        """
+        if not magic_check.search(pattern):
+            return [pattern] if self.lexists(pattern) else []
+
+        dirname, basename = os.path.split(pattern)
+        if magic_check.search(dirname):
+            dirs = [dd for dd in self.glob(dirname) if self.isdir(dd)]
+        else:
+            dirs = [dirname]
+
+        matches = []
+        for dd in dirs:
+            if not magic_check.search(basename):
+                if basename in self.listdir(dd):
+                    matches.append(os.path.join(dd, basename))
+                continue
+
+            names = self.listdir(dd).keys()
+            if not basename.startswith('.'):
+                # As with glob, wildcards do not match hidden files
+                names = [name for name in names if not name.startswith('.')]
+            matches.extend(os.path.join(dd, name) for name in fnmatch.filter(names, basename))
+
+        return sorted(matches)
+
+
+class ArchiveManifest:
+    """Record of the files that went into each archive target
+
+    Each target (tarball) gets its own JSON manifest under manifest_dir holding
+    the size, modification time, and (for small files) the hash of every file
+    archived in it.
+    Keeping one manifest per target lets concurrent archive jobs (e.g. gdas,
+    gfs, and the enkf groups) share a ROTDIR without racing on a single file.
+    """
+
+    def __init__(self, manifest_dir: str) -> None:
+        """Constructor for the ArchiveManifest
+
+        Parameters
+        ----------
+        manifest_dir : str
+            Directory (typically in the ROTDIR) to hold the manifests
+        """
+        self.manifest_dir = manifest_dir
+
+    def _manifest_path(self, target: str) -> str:
+        """Path to the manifest file for a target"""
+        target_hash = hashlib.sha1(target.encode()).hexdigest()
+        return os.path.join(self.manifest_dir, f"{target_hash}.json")
+
+    @staticmethod
+    def expand_fileset(fileset: List) -> List[str]:
+        """Expand directories in a fileset into the files tar would archive from them
+
+        Parameters
+        ----------
+        fileset : List
+            List of files and directories to archive
+
+        Return
+        ------
+        files : List[str]
+            Sorted list of files
+        """
+        files = set()
+        for entry in fileset:
+            if os.path.isdir(entry):
+                for root, _, filenames in os.walk(entry):
+                    files.update(os.path.join(root, filename) for filename in filenames)
+            else:
+                files.add(entry)
+
+        return sorted(files)
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """Compute the hash of a file
+
+        Parameters
+        ----------
+        path : str
+            File to hash
+
+        Return
+        ------
+        digest : str
+            Hexadecimal blake2b digest
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def _load(self, target: str) -> Dict[str, Any]:
+        """Read the manifest of a target, returning an empty manifest if there is none"""
+        try:
+            with open(self._manifest_path(target)) as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+        if manifest.get("target") != target:
+            return {}
+
+        return manifest
+
+    @logit(logger)
+    def is_unchanged(self, target: str, fileset: List, stat: Callable = os.stat,
+                     target_exists: Callable = os.path.exists) -> bool:
+        """Determine if a target was already archived with exactly this fileset.
+
+        Files whose size and modification time match the manifest are taken to be
+        unchanged.  A file whose size changed is changed.  A small file whose
+        modification time changed (e.g. EXPDIR files copied again into the ROTDIR)
+        is hashed in full and compared to the recorded hash; a large file whose
+        modification time changed is changed, since hashing it would cost as much
+        as archiving it again.  The target must still exist.
+
+        Parameters
+        ----------
+        target : str
+            Tarball the fileset is archived to
+        fileset : List
+            List of files and directories to archive
+        stat : Callable
+            Function used to stat files, e.g. DirectoryScanCache.stat
+        target_exists : Callable
+            Function used to check that the target exists, e.g. Hsi.exists
+
+        Return
+        ------
+        unchanged : bool
+            True if every file matches the manifest, no files were added or removed,
+            and the target exists
+        """
+        recorded = self._load(target).get("files")
+        if not recorded:
+            return False
+
+        files = ArchiveManifest.expand_fileset(fileset)
+        if set(files) != set(recorded):
+            return False
+
+        for path in files:
+            entry = recorded[path]
+            try:
+                file_stat = stat(path)
+            except OSError:
+                return False
+
+            if file_stat.st_size != entry["size"]:
+                return False
+
+            if file_stat.st_mtime_ns != entry["mtime_ns"]:
+                if file_stat.st_size > FULL_HASH_MAX_SIZE or entry.get("hash") is None:
+                    return False
+                if ArchiveManifest.file_hash(path) != entry["hash"]:
+                    return False
+
+        return target_exists(target)
+
+    @logit(logger)
+    def update(self, target: str, fileset: List) -> None:
+        """Record the files archived to a target.
+
+        The manifest is written to a temporary file and moved into place so an
+        interrupted job never leaves a partial manifest behind.
+
+        Parameters
+        ----------
+        target : str
+            Tarball the fileset was archived to
+        fileset : List
+            List of files and directories that were archived
+        """
+        files = {}
+        for path in ArchiveManifest.expand_fileset(fileset):
+            stat = os.stat(path)
+            files[path] = {"size": stat.st_size,
+                           "mtime_ns": stat.st_mtime_ns,
+                           "hash": ArchiveManifest.file_hash(path) if stat.st_size <= FULL_HASH_MAX_SIZE else None}
+
+        mkdir_p(self.manifest_dir)
+        manifest_path = self._manifest_path(target)
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump({"target": target, "files": files}, fh)
+        os.replace(tmp_path, manifest_path)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+import gzip
+import io
+import os
+import tarfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import List, Optional
+
+from wxflow import logit
+
+logger = getLogger(__name__.split('.')[-1])
+
+# Uncompressed size of each independently compressed block
+BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class GzipCodec:
+    """gzip codec
+
+    Each block is compressed as a separate gzip member.  Concatenated gzip
+    members form a valid gzip stream, so the output can be read by gzip,
+    tar -z, and python's gzip/tarfile modules like any other .gz file.
+    """
+    name = "gzip"
+    suffix = ".gz"
+
+    def __init__(self, level: int = 6) -> None:
+        self.level = level
+
+    def compress(self, block: bytes) -> bytes:
+        return gzip.compress(block, compresslevel=self.level, mtime=0)
+
+
+class ZstdCodec:
+    """zstd codec (requires the zstandard module)
+
+    Each block is compressed as a separate zstd frame; concatenated frames are
+    a valid zstd stream.
+    """
+    name = "zstd"
+    suffix = ".zst"
+
+    def __init__(self, level: int = 3) -> None:
+        try:
+            import zstandard
+        except ImportError as err:
+            raise ImportError(f"Unable to import zstandard module\n{err}")
+        self._zstandard = zstandard
+        self.level = level
+
+    def compress(self, block: bytes) -> bytes:
+        # Compressor contexts are not thread-safe, so use one per block
+        return self._zstandard.ZstdCompressor(level=self.level).compress(block)
+
+
+codecs = {GzipCodec.name: GzipCodec,
+          ZstdCodec.name: ZstdCodec}
+
+
+def get_codec(name: str, **kwargs):
+    """Return an instance of the codec with the given name ('gzip' or 'zstd')"""
+    try:
+        return codecs[name](**kwargs)
+    except KeyError:
+        raise KeyError(f"FATAL ERROR: Unknown compression codec '{name}', valid codecs are {list(codecs)}")
+
+
+class ParallelCompressedWriter(io.RawIOBase):
+    """Write-only file object that compresses its input in parallel blocks
+
+    Data written to this object is cut into BLOCK_SIZE blocks that are
+    compressed by a thread pool (zlib and zstd release the GIL) and written to
+    the underlying file object in order.  At most 2 * nthreads blocks are held
+    in memory at any time.
+    """
+
+    def __init__(self, fileobj, codec, executor: ThreadPoolExecutor, nthreads: int,
+                 block_size: int = BLOCK_SIZE) -> None:
+        super().__init__()
+        self.fileobj = fileobj
+        self.codec = codec
+        self.executor = executor
+        self.block_size = block_size
+        self.max_pending = 2 * nthreads
+        self._buffer = bytearray()
+        self._pending = deque()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block: bytes) -> None:
+        self.bytes_in += len(block)
+        self._pending.append(self.executor.submit(self.codec.compress, block))
+        while len(self._pending) >= self.max_pending:
+            self._write_next()
+
+    def _write_next(self) -> None:
+        compressed = self._pending.popleft().result()
+        self.fileobj.write(compressed)
+        self.bytes_out += len(compressed)
+
+    def close(self) -> None:
+        """Compress any remaining data and wait for all blocks to be written.
+        The underlying file object is not closed.
+        """
+        if not self.closed:
+            if self._buffer or self.bytes_in == 0:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._write_next()
+        super().close()
+
+
+class DiagBundler:
+    """Bundle diagnostic files into a tarball without intermediate files
+
+    Files are read once and streamed through a ParallelCompressedWriter straight
+    into the tarball.  Two layouts are supported, and may be combined:
+
+    - compress_members: each file is stored compressed (e.g. diag_amsua.nc.gz)
+      in the tarball.  This is the layout of the atmstat and atmensstat files.
+    - compress_archive: the tar stream itself is compressed (i.e. a .tgz file).
+    """
+
+    def __init__(self, codec: str = "gzip", nthreads: Optional[int] = None, level: Optional[int] = None) -> None:
+        """Constructor for the DiagBundler
+
+        Parameters
+        ----------
+        codec : str
+            Compression codec, 'gzip' (default) or 'zstd'
+        nthreads : int (optional)
+            Number of compression threads, defaults to the number of CPUs (at most 8)
+        level : int (optional)
+            Compression level, defaults to the codec default
+        """
+        self.codec = get_codec(codec) if level is None else get_codec(codec, level=level)
+        self.nthreads = nthreads if nthreads else min(8, os.cpu_count() or 1)
+
+    @logit(logger)
+    def bundle(self, statfile: str, files: List[str],
+               compress_members: bool = True, compress_archive: bool = False) -> None:
+        """Create a tarball of files, compressed with this bundler's codec
+
+        Parameters
+        ----------
+        statfile : str | os.PathLike
+            Path to the output tarball
+        files : List[str]
+            Files to add to the tarball.  They are stored under their basenames.
+        compress_members : bool
+            Compress each file in the tarball, appending the codec suffix to its name
+        compress_archive : bool
+            Compress the tarball itself
+        """
+
+        logger.info(f"Bundling {len(files)} files into {statfile} with {self.nthreads} {self.codec.name} threads")
+
+        with ThreadPoolExecutor(max_workers=self.nthreads) as executor, open(statfile, "wb") as fh:
+            if compress_archive:
+                outfile = ParallelCompressedWriter(fh, self.codec, executor, self.nthreads)
+            else:
+                outfile = fh
+
+            with tarfile.open(fileobj=outfile, mode="w|") as archive:
+                for filename in files:
+                    if compress_members:
+                        self._add_compressed(archive, filename, executor)
+                    else:
+                        archive.add(filename, arcname=os.path.basename(filename))
+
+            if compress_archive:
+                outfile.close()
+                logger.debug(f"Compressed {outfile.bytes_in} bytes of tar stream to {outfile.bytes_out} bytes")
+
+    def _add_compressed(self, archive: tarfile.TarFile, filename: str, executor: ThreadPoolExecutor) -> None:
+        """Compress a file in memory and add it to an open tarball"""
+
+        member = io.BytesIO()
+        writer = ParallelCompressedWriter(member, self.codec, executor, self.nthreads)
+        with open(filename, "rb") as fh:
+            for block in iter(lambda: fh.read(BLOCK_SIZE), b""):
+                writer.write(block)
+        writer.close()
+
+        tarinfo = tarfile.TarInfo(name=os.path.basename(filename) + self.codec.suffix)
+        tarinfo.size = member.tell()
+        tarinfo.mtime = int(os.path.getmtime(filename))
+        tarinfo.mode = 0o644
+        member.seek(0)
+        archive.addfile(tarinfo, member)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger
+from typing import List, Optional
+
+import numpy as np
+from netCDF4 import Dataset
+from wxflow import logit
+
+logger = getLogger(__name__.split('.')[-1])
+
+# Default memory budget (bytes) for the background and increment blocks held by each worker
+DEFAULT_BLOCK_BYTES = 256 * 1024 * 1024
+
+
+def _block_axis(shape: tuple) -> int:
+    """Axis along which to block a variable: the first axis longer than 1 (normally the levels)"""
+    for axis, size in enumerate(shape):
+        if size > 1:
+            return axis
+    return 0
+
+
+def add_increments_to_tile(inc_path: str, bkg_path: str, incvars: List[str],
+                           max_block_bytes: int = DEFAULT_BLOCK_BYTES) -> None:
+    """Add the increments in one cubed-sphere tile file to a background tile file in place
+
+    Variables are read as plain ndarrays (no masked arrays) in blocks of levels
+    sized to fit within max_block_bytes, and each increment is added to the
+    background block in place before being written back.
+
+    Parameters
+    ----------
+    inc_path : str
+       FV3 increment file for the tile
+    bkg_path : str
+       FV3 background file for the tile; updated in place
+    incvars : List[str]
+       List of increment variables to add to the background
+    max_block_bytes : int
+       Memory budget in bytes for a background block plus its increment block
+    """
+
+    with Dataset(inc_path, mode='r') as incfile, Dataset(bkg_path, mode='a') as rstfile:
+        for vname in incvars:
+            incvar = incfile.variables[vname]
+            bkgvar = rstfile.variables[vname]
+            incvar.set_auto_mask(False)
+            bkgvar.set_auto_mask(False)
+
+            shape = bkgvar.shape
+            axis = _block_axis(shape)
+            slab_bytes = 2 * bkgvar.dtype.itemsize * int(np.prod(shape)) // max(shape[axis], 1)
+            step = max(1, max_block_bytes // max(slab_bytes, 1))
+
+            # Missing values stay missing, as they did with masked arrays
+            bkg_fill = getattr(bkgvar, '_FillValue', None)
+            inc_fill = getattr(incvar, '_FillValue', bkg_fill)
+
+            # The increment may have fewer axes than the background (e.g. no Time
+            # axis): its trailing axes are aligned with the background's, as in
+            # numpy broadcasting.  It is read whole if it has no matching block axis.
+            inc_axis = axis - (len(shape) - incvar.ndim)
+            inc_blocked = 0 <= inc_axis < incvar.ndim and incvar.shape[inc_axis] == shape[axis]
+            inc_whole = None if inc_blocked else np.broadcast_to(incvar[...], shape)
+
+            for start in range(0, shape[axis], step):
+                block = [slice(None)] * len(shape)
+                block[axis] = slice(start, start + step)
+                block = tuple(block)
+
+                bkg = bkgvar[block]
+                if inc_blocked:
+                    inc_block = [slice(None)] * incvar.ndim
+                    inc_block[inc_axis] = slice(start, start + step)
+                    inc = incvar[tuple(inc_block)]
+                else:
+                    inc = inc_whole[block]
+                if bkg_fill is not None:
+                    missing = (bkg == bkg_fill) | (inc == inc_fill)
+                bkg += inc
+                if bkg_fill is not None:
+                    bkg[missing] = bkg_fill
+                bkgvar[block] = bkg
+
+            try:
+                bkgvar.delncattr('checksum')  # remove the checksum so fv3 does not complain
+            except (AttributeError, RuntimeError):
+                pass  # checksum is missing, move on
+
+
+@logit(logger)
+def add_fv3_increments(inc_file_tmpl: str, bkg_file_tmpl: str, incvars: List[str], ntiles: int = 6,
+                       nproc: Optional[int] = None, max_block_bytes: int = DEFAULT_BLOCK_BYTES) -> None:
+    """Add cubed-sphere increments to cubed-sphere backgrounds, processing tiles in parallel
+
+    Parameters
+    ----------
+    inc_file_tmpl : str
+       template of the FV3 increment file of the form: 'filetype.tile{tilenum}.nc'
+    bkg_file_tmpl : str
+       template of the FV3 background file of the form: 'filetype.tile{tilenum}.nc'
+    incvars : List[str]
+       List of increment variables to add to the background
+    ntiles : int
+       Number of cubed-sphere tiles
+    nproc : int (optional)
+       Number of tiles to process concurrently, defaults to min(ntiles, number of CPUs)
+    max_block_bytes : int
+       Memory budget in bytes for the blocks held by each process
+    """
+
+    nproc = min(ntiles, nproc if nproc else os.cpu_count() or 1)
+    tiles = range(1, ntiles + 1)
+    inc_paths = [inc_file_tmpl.format(tilenum=itile) for itile in tiles]
+    bkg_paths = [bkg_file_tmpl.format(tilenum=itile) for itile in tiles]
+
+    logger.info(f"Adding {len(incvars)} increment variables to {ntiles} tiles using {nproc} processes")
+
+    if nproc <= 1:
+        for inc_path, bkg_path in zip(inc_paths, bkg_paths):
+            add_increments_to_tile(inc_path, bkg_path, incvars, max_block_bytes)
+        return
+
+    with ProcessPoolExecutor(max_workers=nproc) as executor:
+        futures = [executor.submit(add_increments_to_tile, inc_path, bkg_path, list(incvars), max_block_bytes)
+                   for inc_path, bkg_path in zip(inc_paths, bkg_paths)]
+        for future in futures:
+            future.result()
@@ -3,6 +3,7 @@ import dateutil.parser as dparser
 import os
 from netCDF4 import Dataset
 from logging import getLogger
+from typing import Optional
 import yaml
 
 from wxflow import (FileHandler,
@@ -13,6 +14,7 @@ from wxflow import (FileHandler,
                     Executable,
                     save_as_yaml,
                     jinja)
+from pygfs.utils.staging import StagingPlan
 
 logger = getLogger(__name__.split('.')[-1])
 
@@ -67,9 +69,10 @@ def prep_input_nml(task_config: AttrDict,
 
 
 @logit(logger)
-def stage_ens_mem(task_config: AttrDict) -> None:
+def stage_ens_mem(task_config: AttrDict, staging: Optional[StagingPlan] = None) -> None:
     """ Copy the ensemble members to the DATA directory
-    Copy the ensemble members to the DATA directory and reformat the CICE history files
+    Copy the ensemble members to the DATA directory and reformat the CICE history files,
+    or add them to the staging plan if one is given
     """
     # Copy the ensemble members to the DATA directory
     logger.info("---------------- Stage ensemble members")
@@ -78,7 +81,10 @@ def stage_ens_mem(task_config: AttrDict) -> None:
     logger.debug(f"{jinja.Jinja(task_config.MARINE_ENSDA_STAGE_BKG_YAML_TMPL, ensbkgconf).render}")
     letkf_stage_list = parse_j2yaml(task_config.MARINE_ENSDA_STAGE_BKG_YAML_TMPL, ensbkgconf)
     logger.info(f"{letkf_stage_list}")
-    FileHandler(letkf_stage_list).sync()
+    if staging is not None:
+        staging.add(letkf_stage_list)
+    else:
+        FileHandler(letkf_stage_list).sync()
 
 
 @logit(logger)
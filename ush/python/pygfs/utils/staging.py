@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+import errno
+import fcntl
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+from wxflow import FileHandler, logit, mkdir
+
+logger = getLogger(__name__.split('.')[-1])
+
+# ioctl request cloning a file on copy-on-write filesystems (linux/fs.h)
+FICLONE = 0x40049409
+
+COPY_ACTIONS = ['copy', 'copy_req', 'copy_opt', 'copy_safe']
+LINK_ACTIONS = ['link', 'link_req', 'link_opt']
+
+# (source, destination) devices on which reflinks are not supported
+_no_reflink = set()
+
+
+class StagingPlan:
+    """Plan of the files to stage for a task, staged in parallel
+
+    The FileHandler configurations (mkdir, copy and link actions) added to the
+    plan are merged into a single plan, which is run by sync():
+
+    - the directories are created first,
+    - a destination staged more than once is staged once, from the last source
+      added for it, as if the configurations were synced one after the other,
+    - the files are copied and linked by a pool of threads.  A file copied from
+      a destination of the plan is copied once that destination is staged.
+
+    Copies on the same filesystem are made as reflinks (copy-on-write clones)
+    where the filesystem supports them.  Configurations added with
+    hardlink=True (read-only inputs such as fix files) are hardlinked on the
+    same filesystem instead.  Any other copy is a regular copy.
+    """
+
+    def __init__(self, nthreads: Optional[int] = None) -> None:
+        """Constructor for the StagingPlan
+
+        Parameters
+        ----------
+        nthreads : int (optional)
+            Number of staging threads, defaults to 8
+        """
+        self.nthreads = nthreads if nthreads else 8
+        self.dirs = []
+        self.files = []
+
+    def add(self, config: Dict[str, Any], hardlink: bool = False) -> None:
+        """Add a FileHandler configuration to the plan
+
+        Parameters
+        ----------
+        config : Dict
+            FileHandler configuration, e.g. {'mkdir': [...], 'copy': [[src, dest], ...]}
+        hardlink : bool
+            Hardlink the copied files on the same filesystem, only for files
+            that are not modified after they are staged
+        """
+        for action, files in config.items():
+            if files is None or len(files) == 0:
+                logger.warning(f"WARNING: No files/directories were included for {action} command")
+                continue
+            if action == 'mkdir':
+                self.dirs.extend(files)
+                continue
+            if action not in COPY_ACTIONS + LINK_ACTIONS:
+                raise KeyError(f"FATAL ERROR: Unknown FileHandler action '{action}'")
+            for sublist in files:
+                if len(sublist) != 2:
+                    raise IndexError(f"List must be of the form ['src', 'dest'], not {sublist}")
+                self.files.append((action, sublist[0], sublist[1], hardlink))
+
+    @logit(logger)
+    def sync(self) -> None:
+        """Stage the files of the plan"""
+
+        start = time.perf_counter()
+
+        for dd in dict.fromkeys(self.dirs):
+            mkdir(dd)
+            logger.info(f'Created {dd}')
+
+        waves = self._get_waves()
+        nfiles = sum(len(wave) for wave in waves)
+        logger.info(f"Staging {nfiles} files ({len(self.files) - nfiles} duplicates) with {self.nthreads} threads")
+
+        results = []
+        with ThreadPoolExecutor(max_workers=self.nthreads) as executor:
+            for wave in waves:
+                results.extend(executor.map(lambda item: _stage(*item), wave))
+
+        elapsed = max(time.perf_counter() - start, 1.e-6)
+        nbytes = sum(size for method, size in results)
+        methods = {method: sum(1 for result in results if result[0] == method)
+                   for method in sorted(set(result[0] for result in results))}
+        logger.info(f"Staged {nfiles} files ({nbytes / 1024**2:.1f} MiB) in {elapsed:.2f} s "
+                    f"({nbytes / 1024**2 / elapsed:.1f} MiB/s): "
+                    f"{', '.join(f'{count} {method}' for method, count in methods.items())}")
+
+        self.dirs = []
+        self.files = []
+
+    def _get_waves(self) -> List[List[Tuple]]:
+        """Deduplicate the files of the plan and order them in waves, the
+        files of a wave being copied from files staged in the previous waves
+        """
+
+        # Only the last file staged to each destination is kept
+        staged = {}
+        for order, (action, src, dest, hardlink) in enumerate(self.files):
+            if os.path.isdir(dest):
+                dest = os.path.join(dest, os.path.basename(src))
+            staged[os.path.normpath(dest)] = (order, (action, src, dest, hardlink))
+
+        waves = []
+        wave_of = {}
+        for key, (order, item) in sorted(staged.items(), key=lambda kv: kv[1][0]):
+            # A file copied from a destination staged before it in the plan
+            producer = staged.get(os.path.normpath(item[1]))
+            wave = wave_of[producer[1][2]] + 1 if producer is not None and producer[0] < order else 0
+            wave_of[item[2]] = wave
+            if wave == len(waves):
+                waves.append([])
+            waves[wave].append(item)
+
+        return waves
+
+
+def _stage(action: str, src: str, dest: str, hardlink: bool) -> Tuple[str, int]:
+    """Stage a file, returns how it was staged and the number of bytes staged"""
+
+    if action in LINK_ACTIONS:
+        FileHandler({action: [[src, dest]]}).sync()
+        return 'linked', 0
+
+    if not os.path.exists(src):
+        if action == 'copy_opt':
+            logger.warning(f"Source file '{src}' does not exist, skipping!")
+            return 'skipped', 0
+        logger.error(f"Source file '{src}' does not exist and is required, ABORT!")
+        raise FileNotFoundError(f"Source file '{src}' does not exist")
+
+    if action == 'copy_safe' or os.path.isdir(src):
+        FileHandler({action: [[src, dest]]}).sync()
+        return 'copied', os.path.getsize(src)
+
+    size = os.path.getsize(src)
+    if os.path.lexists(dest):
+        if not os.path.islink(dest) and os.path.samefile(src, dest):
+            logger.info(f"{dest} is already a hardlink to {src}")
+            return 'hardlinked', size
+        # Do not write through a link to the previous file
+        os.remove(dest)
+
+    devices = (os.stat(src).st_dev, os.stat(os.path.dirname(os.path.abspath(dest))).st_dev)
+    if devices[0] == devices[1]:
+        if hardlink:
+            try:
+                os.link(src, dest)
+                logger.info(f'Hardlinked {src} to {dest}')
+                return 'hardlinked', size
+            except OSError:
+                pass
+        if devices not in _no_reflink and _reflink(src, dest, devices):
+            shutil.copystat(src, dest)
+            logger.info(f'Reflinked {src} to {dest}')
+            return 'reflinked', size
+
+    try:
+        shutil.copy2(src, dest)
+    except OSError:
+        raise OSError(f"Unable to copy {src} to {dest}")
+    logger.info(f'Copied {src} to {dest}')
+    return 'copied', size
+
+
+def _reflink(src: str, dest: str, devices: Tuple[int, int]) -> bool:
+    """Clone src to dest, returns False if the filesystem does not support it"""
+
+    try:
+        with open(src, 'rb') as fsrc, open(dest, 'wb') as fdest:
+            fcntl.ioctl(fdest.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError as err:
+        if err.errno in [errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS]:
+            _no_reflink.add(devices)
+        return False
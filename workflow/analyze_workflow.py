@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Analyze the dependency graph of a Rocoto workflow: the critical path of each
+cycle, from the runtimes in the Rocoto database or the requested walltimes,
+and the redundant (transitive or duplicate) dependencies
+"""
+
+import os
+import statistics
+import yaml
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+from datetime import datetime, timezone
+
+from rocoto.workflow_graph import WorkflowGraph, load_durations, cycle_datetime
+
+
+def input_args(*argv):
+    """
+    Method to collect user arguments for `analyze_workflow.py`
+    """
+
+    parser = ArgumentParser(description=__doc__, formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('-w', '--workflow', help='Rocoto workflow XML', type=str, required=True)
+    parser.add_argument('-d', '--database', help='Rocoto database with the runtimes of the jobs', type=str,
+                        required=False, default=None)
+    parser.add_argument('--fhr-costs', help='write the runtime of each forecast hour of the metatasks run by '
+                        'forecast hour groups to this YAML file, for FHR_COST_PROFILE (requires --database)',
+                        type=str, required=False, default=None)
+    parser.add_argument('-c', '--cycles', help='cycles to analyze (YYYYMMDDHH[MM]); default: the cycles in '
+                        'the database, or else the first two cycles of each cycledef', nargs='+', default=None)
+
+    return parser.parse_args(argv[0][0] if len(argv[0]) else None)
+
+
+def _hms(seconds):
+    seconds = int(round(seconds))
+    return f'{seconds // 3600:d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+
+
+def default_cycles(graph):
+    cycles = set()
+    for ranges in graph.cycledefs.values():
+        for start, end, step in ranges:
+            cycles.add(start)
+            if step.total_seconds() > 0 and start + step <= end:
+                cycles.add(start + step)
+    return sorted(cycles)
+
+
+def fhr_costs(graph, durations):
+    """
+    Runtime of each forecast hour of the metatasks run by forecast hour groups
+    (with a fhr_list variable), from the runtimes of their tasks.  The runtime
+    of a task is shared evenly between its forecast hours.
+    """
+    costs = {}
+    for name, task in graph.tasks.items():
+        fhr_list = task.variables.get('fhr_list')
+        if not task.metatasks or not fhr_list or name not in durations:
+            continue
+        fhrs = [int(fhr) for fhr in fhr_list.split(',')]
+        metatask_costs = costs.setdefault(task.metatasks[0], {})
+        for fhr in fhrs:
+            metatask_costs.setdefault(fhr, []).append(durations[name] / len(fhrs))
+
+    return {metatask: {fhr: round(statistics.mean(values), 1) for fhr, values in sorted(metatask_costs.items())}
+            for metatask, metatask_costs in costs.items()}
+
+
+def main(*argv):
+
+    user_inputs = input_args(argv)
+
+    graph = WorkflowGraph.from_file(user_inputs.workflow)
+    print(f'{user_inputs.workflow}: {len(graph.tasks)} tasks in {len(graph.metatasks)} metatasks')
+
+    by_cycle, median = {}, {}
+    if user_inputs.database is not None:
+        if not os.path.exists(user_inputs.database):
+            raise FileNotFoundError(f'{user_inputs.database} does not exist')
+        by_cycle, median = load_durations(user_inputs.database)
+
+    if user_inputs.cycles:
+        cycles = [datetime.strptime(cycle.ljust(12, '0'), '%Y%m%d%H%M') for cycle in user_inputs.cycles]
+    elif by_cycle:
+        cycles = sorted(cycle_datetime(cycle) for cycle in by_cycle)
+    else:
+        cycles = default_cycles(graph)
+
+    for cycle in cycles:
+        durations = dict(median)
+        durations.update(by_cycle.get(int(cycle.replace(tzinfo=timezone.utc).timestamp()), {}))
+        tasks = graph.cycle_tasks(cycle)
+        length, path = graph.critical_path(tasks, durations)
+
+        print()
+        print(f'Cycle {cycle:%Y%m%d%H%M}: {len(tasks)} tasks, critical path {_hms(length)}')
+        for name, start, finish in path:
+            source = 'runtime' if name in durations else 'walltime'
+            print(f'    {name:<40} {_hms(start):>9} -> {_hms(finish):>9} ({source})')
+
+    if user_inputs.fhr_costs is not None:
+        if not median:
+            raise ValueError('--fhr-costs requires the runtimes from a --database')
+        profile = fhr_costs(graph, median)
+        with open(user_inputs.fhr_costs, 'w') as fh:
+            yaml.safe_dump(profile, fh, default_flow_style=None, sort_keys=False)
+        print()
+        print(f'Wrote the forecast hour runtimes of {len(profile)} metatasks to {user_inputs.fhr_costs}')
+
+    redundant = graph.redundant_dependencies()
+    print()
+    print(f'{len(redundant)} redundant dependencies')
+    for name, dependency, implied_by in redundant:
+        print(f'    {name}: {dependency} is implied by {implied_by}')
+
+
+if __name__ == '__main__':
+
+    main()
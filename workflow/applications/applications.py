@@ -3,22 +3,27 @@
 from typing import Dict, List, Any
 from hosts import Host
 from wxflow import Configuration
+from applications.cached_configuration import CachedConfiguration
 from abc import ABC, ABCMeta, abstractmethod
 
 __all__ = ['AppConfig']
 
 
 class AppConfigInit(ABCMeta):
-    def __call__(cls, *args, **kwargs):
+    def __call__(cls, conf, *args, **kwargs):
         '''
         We want the child classes to be able to define additional settings
           before we source the configs and complete the rest of the process,
           so break init up into two methods, one to run first (both in the
           base class and the child class) and one to finalize the initiali-
           zation after both have completed.
+        The configuration is wrapped in a CachedConfiguration so config.base
+          and the task configs are each sourced only once.
         '''
-        obj = type.__call__(cls, *args, **kwargs)
-        obj._init_finalize(*args, **kwargs)
+        if not isinstance(conf, CachedConfiguration):
+            conf = CachedConfiguration(conf.config_dir)
+        obj = type.__call__(cls, conf, *args, **kwargs)
+        obj._init_finalize(conf, *args, **kwargs)
         return obj
 
 
@@ -102,6 +107,7 @@ class AppConfig(ABC, metaclass=AppConfigInit):
 
             run_options[run]['do_hpssarch'] = run_base.get('HPSSARCH', False)
             run_options[run]['fcst_segments'] = run_base.get('FCST_SEGMENTS', None)
+            run_options[run]['fhr_cost_profile'] = run_base.get('FHR_COST_PROFILE', None) or None
 
             run_options[run]['do_fetch_hpss'] = run_base.get('DO_FETCH_HPSS', False)
             run_options[run]['do_fetch_local'] = run_base.get('DO_FETCH_LOCAL', False)
@@ -135,18 +141,20 @@ class AppConfig(ABC, metaclass=AppConfigInit):
         '''
         pass
 
-    def _source_configs(self, conf: Configuration, run: str = "gfs", log: bool = True) -> Dict[str, Any]:
+    def _source_configs(self, conf: CachedConfiguration, run: str = "gfs", log: bool = True) -> Dict[str, Any]:
         """
         Given the configuration object used to initialize this application,
         source the configurations for each config and return a dictionary
-        Every config depends on "config.base"
+        Every config depends on "config.base", which is sourced once and
+        shared by all the configs sourced concurrently by parse_configs
         """
 
         # Include config.base by its lonesome and update it
         configs = {'base': conf.parse_config('config.base', RUN=run)}
         configs['base'] = self._update_base(configs['base'])
 
-        # Source the list of all config_files involved in the application
+        # Collect the list of all config_files involved in the application
+        config_files = {}
         for config in self._get_app_configs(run):
 
             # All must source config.base first
@@ -168,7 +176,11 @@ class AppConfig(ABC, metaclass=AppConfigInit):
                 files += [f'config.{config}']
 
             print(f'sourcing config.{config}') if log else 0
-            configs[config] = conf.parse_config(files, RUN=run)
+            config_files[config] = files
+
+        # Source them all at once
+        parsed = conf.parse_configs(list(config_files.values()), RUN=run)
+        configs.update(zip(config_files, parsed))
 
         return configs
 
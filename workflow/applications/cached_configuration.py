@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import copy
+import hashlib
+import os
+import random
+import shlex
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+from wxflow import Configuration, cast_strdict_as_dtypedict
+from wxflow.configuration import ShellScriptException
+
+__all__ = ['CachedConfiguration']
+
+
+class CachedConfiguration(Configuration):
+    '''
+    Configuration that sources config files in bulk and only once
+
+    Every task config sources config.base first, so rather than starting a new
+    shell to source config.base again for each task, parse_configs() starts one
+    shell per set of environment variables (i.e. per RUN), sources config.base
+    once, and sources each task config in a forked subshell, which inherits the
+    complete shell state (exported or not) exactly as if config.base had been
+    sourced again.  The subshells run concurrently, up to max_workers at a time.
+
+    The parsed environment of every list of config files is cached, keyed by the
+    content hash of the files and the environment variables, so repeated requests
+    (config.base for each RUN, identical task configs) do not start a shell.
+    '''
+
+    def __init__(self, config_dir: Union[str, Path], max_workers: int = None) -> None:
+        super().__init__(config_dir)
+        self.max_workers = max_workers if max_workers else min(32, os.cpu_count() or 1)
+        self._cache = {}
+        self._default_env = None
+
+    def parse_config(self, files: Union[str, bytes, list], **envvars) -> Dict[str, Any]:
+        '''
+        Given the name of config file(s), key-value pair of all variables in the config file(s)
+        are returned as a dictionary (see wxflow.Configuration.parse_config)
+        '''
+        return self.parse_configs([files], **envvars)[0]
+
+    def parse_configs(self, file_lists: List[Union[str, bytes, list]], **envvars) -> List[Dict[str, Any]]:
+        '''
+        Parse several lists of config files with the same environment variables
+
+        Parameters
+        ----------
+        file_lists: List
+                    Config file or list of config files for each parse; lists that
+                    start with the same file (e.g. config.base) share its sourcing
+        envvars: Any
+                 Environment variables to be set prior to sourcing config files
+
+        Returns
+        -------
+        List[Dict]: Key value pairs of the variables defined by each list of files,
+                    in the order of file_lists
+        '''
+
+        paths = []
+        for files in file_lists:
+            if isinstance(files, (str, bytes)):
+                files = [files]
+            paths.append([self.find_config(file) for file in files])
+
+        keys = [self._cache_key(files, envvars) for files in paths]
+
+        # Source the lists missing from the cache, grouped by their first file
+        groups = {}
+        for key, files in zip(keys, paths):
+            if key not in self._cache:
+                groups.setdefault(files[0], {})[key] = files[1:]
+        for prefix, suffixes in groups.items():
+            self._source_group(prefix, suffixes, envvars)
+
+        return [copy.deepcopy(self._cache[key]) for key in keys]
+
+    @staticmethod
+    def _cache_key(files: List[str], envvars: Dict[str, Any]) -> tuple:
+        digest = hashlib.sha1()
+        for file in files:
+            digest.update(file.encode() + b'\0')
+            digest.update(hashlib.sha1(Path(file).read_bytes()).digest())
+        return digest.hexdigest(), tuple(sorted((key, str(value)) for key, value in envvars.items()))
+
+    def _source_group(self, prefix: str, suffixes: Dict[tuple, List[str]], envvars: Dict[str, Any]) -> None:
+        '''
+        Source prefix once, then each list of suffix files in a subshell, and cache the results
+        '''
+
+        if self._default_env is None:
+            self._default_env = self._get_shell_env([])
+
+        magic = f'--- ENVIRONMENT BEGIN {random.randint(0, 64**5)} ---'
+        with tempfile.TemporaryDirectory(prefix='config_') as tmpdir:
+            runme = ''.join(f'export {key}={value}; ' for key, value in envvars.items())
+            runme += f'source {shlex.quote(prefix)}\n'
+            outputs = {}
+            for ii, (key, files) in enumerate(suffixes.items()):
+                outputs[key] = os.path.join(tmpdir, str(ii))
+                sources = ''.join(f'source {shlex.quote(file)}; ' for file in files)
+                runme += (f'( {sources}/bin/echo -n "{magic}" ; /usr/bin/env -0 ) '
+                          f'> {shlex.quote(outputs[key])} &\n')
+                if (ii + 1) % self.max_workers == 0:
+                    runme += 'wait\n'
+            runme += 'wait\n'
+
+            subprocess.run(runme, shell=True, executable=shutil.which('bash'),
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+
+            for key, output in outputs.items():
+                try:
+                    out = Path(output).read_bytes().decode()
+                except FileNotFoundError:
+                    out = ''
+                begin = out.find(magic)
+                if begin < 0:
+                    raise ShellScriptException([prefix] + suffixes[key], 'Cannot find magic string; '
+                                               'at least one script failed: ' + repr(out))
+
+                env = {}
+                for entry in out[begin + len(magic):].split('\x00'):
+                    iequal = entry.find('=')
+                    env[entry[0:iequal]] = entry[iequal + 1:]
+
+                # Keep only the variables defined by the scripts, as Configuration does
+                script_env = {var: env[var] for var in set(env) - set(self._default_env)}
+                self._cache[key] = cast_strdict_as_dtypedict(script_env)
@@ -30,7 +30,9 @@ import sys
 import os
 import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 try:
     import ecflow
 except ImportError as err:
@@ -62,6 +64,9 @@ class Ecflowsuite:
         While the ecfsuite_nodes dictionary tracks the actual ecflow API
         defined nodes, this dictionary tracks the custom nodes that are
         defined in the bottom of this module.
+    node_paths : dict
+        Index of the absolute paths of the nodes in ecf_nodes, by the same
+        keys, filled as the triggers are resolved.
     ecfhome : str
         The path to the base for the ecf items. This includes the ecf scripts
         repository and the storage location for all the suite script. In the
@@ -73,6 +78,10 @@ class Ecflowsuite:
         folders are not created and assumed to already be in place.
     ecfsuite : str
         The name of the suite.
+    script_deployments : dict
+        The scripts of the tasks to deploy when the tree is built, by their
+        destination path, as (script repository, script name) pairs. They
+        are deployed together by deploy_scripts once the suites are built.
 
     Methods
     -------
@@ -91,6 +100,10 @@ class Ecflowsuite:
     get_node(task)
         Returns a specific node from the suite.
 
+    get_node_path(node)
+        Returns the absolute path of a node of the suite from the index of
+        node paths.
+
     add_edit(edit_dict, parent=None)
         Adds an edit to either a suite, task, or family. The parent defines
         what object will get the edit object.
@@ -186,6 +199,8 @@ class Ecflowsuite:
         # Initialize environment
         self.ecfsuite_nodes = {}
         self.ecf_nodes = {}
+        self.node_paths = {}
+        self.script_deployments = {}
         self.ecfhome = ecfhome
         self.build_tree = build_tree
 
@@ -275,6 +290,27 @@ class Ecflowsuite:
 
         return self.ecf_nodes[node]
 
+    def get_node_path(self, node):
+        """
+        Returns the absolute path of a node of the suite. The path is looked
+        up in the node_paths index, and only computed by ecflow the first time
+        the node is referenced.
+
+        Parameters
+        ----------
+        node : str
+            The name of the node to lookup in the EcfNodes dictionary.
+
+        Returns
+        -------
+        str
+            The absolute path of the node, e.g. /suite/family/task.
+        """
+
+        if node not in self.node_paths:
+            self.node_paths[node] = self.ecf_nodes[node].get_abs_node_path()
+        return self.node_paths[node]
+
     def add_edit(self, edit_dict, parent=None):
         """
         Adds an edit to either a suite, task, or family. The parent defines
@@ -489,7 +525,7 @@ class Ecflowsuite:
 
         if suite is not None:
             try:
-                trigger_path = suite_array[suite].get_node(trigger).get_abs_node_path()
+                trigger_path = suite_array[suite].get_node_path(trigger)
                 if state is None and event is None:
                     add_trigger = ecflow.Trigger(f"{trigger_path} == complete")
                 elif state is not None and event is None:
@@ -506,10 +542,10 @@ class Ecflowsuite:
                 if state is None and event is None:
                     add_trigger = ecflow.Trigger([self.ecf_nodes[trigger]])
                 elif state is not None and event is None:
-                    trigger_path = self.ecf_nodes[trigger].get_abs_node_path()
+                    trigger_path = self.get_node_path(trigger)
                     add_trigger = ecflow.Trigger(f"{trigger_path} == {state}")
                 elif state is None and event is not None:
-                    trigger_path = self.ecf_nodes[trigger].get_abs_node_path()
+                    trigger_path = self.get_node_path(trigger)
                     add_trigger = ecflow.Trigger(f"{trigger_path}:{event}")
             except KeyError as e:
                 print(f"The node/trigger {parent}/{trigger} is not available "
@@ -595,11 +631,11 @@ class Ecflowsuite:
                  parent_node=None, index=None):
         """
         Adds a task to the parent node. If the build is set to true then the
-        method also calls the creation method in the EcfTask class to deploy
-        the script to the proper location. The script repo is where it will
-        look for the script. If template is set, it will look for that template
-        and then copy and change the name of the template at the destination to
-        the name of the task.
+        script of the task is added to the script_deployments, to be deployed
+        to the proper location with those of the other tasks. The script repo
+        is where it will look for the script. If template is set, it will look
+        for that template and then copy and change the name of the template at
+        the destination to the name of the task.
 
         Parameters
         ----------
@@ -632,9 +668,12 @@ class Ecflowsuite:
                 self.ecf_nodes[task_name] = EcfTask(task_name)
                 self.ecf_nodes[task_name].setup_script(scriptrepo, template)
                 if self.build_tree:
-                    self.ecf_nodes[task_name].generate_ecflow_task(self.ecfhome,
-                                                                   self.get_suite_name(),
-                                                                   parents)
+                    deployment = self.ecf_nodes[task_name].get_script_deployment(self.ecfhome,
+                                                                                 self.get_suite_name(),
+                                                                                 parents)
+                    if deployment is not None:
+                        script_path, search_script = deployment
+                        self.script_deployments[script_path] = (scriptrepo, search_script)
                 self.ecf_nodes[parents] += self.ecf_nodes[task_name]
 
     def add_task_edits(self, task, edit_dict, parent_node=None, index=None):
@@ -673,7 +712,7 @@ class Ecflowsuite:
         else:
             node_for_edits = parent_node
         for task_name in task_node.get_full_name_items(index):
-            task_index = task_node.get_full_name_items().index(task_name)
+            task_index = task_node.get_full_name_index(task_name)
             for node in edit_dict:
                 edit_node = EcfEditNode(node, node_for_edits)
                 value_node = EcfEditNode(edit_dict[node], node_for_edits)
@@ -757,7 +796,7 @@ class Ecflowsuite:
         for task_name in task_node.get_full_name_items(index):
             if task_node.is_list or task_node.is_range:
                 node_for_events = task_node
-                task_index = task_node.get_full_name_items().index(task_name)
+                task_index = task_node.get_full_name_index(task_name)
             else:
                 node_for_events = parent_node
                 task_index = index
@@ -805,24 +844,25 @@ class Ecflowsuite:
         """
 
         working_node = self.ecfsuite_nodes[node]
+        # The trigger nodes only depend on the working node, not on the item
+        trigger_nodes = [ecfTriggerNode(trigger_item, working_node)
+                         for trigger_item in triggers]
         for item in working_node.get_full_name_items(index):
             if working_node.get_type() == "family":
                 node_name = (f"{parents}>{item}")
             else:
                 node_name = item
-            for trigger_item in triggers:
+            for trigger_node in trigger_nodes:
                 suite = None
                 operand = None
-                trigger_node = ecfTriggerNode(trigger_item, working_node)
                 if trigger_node.has_suite():
                     suite = trigger_node.get_suite()
                 if trigger_node.has_operand():
                     operand = trigger_node.get_operand()
 
                 if working_node.is_list or working_node.is_range:
-                    trigger_index = working_node. \
-                        get_full_name_items(index). \
-                        index(item)
+                    trigger_index = working_node.get_full_name_index(item,
+                                                                     index)
                 else:
                     trigger_index = index
 
@@ -835,8 +875,7 @@ class Ecflowsuite:
                     if trigger_node.has_event():
                         if trigger_node.is_list or trigger_node.is_range:
                             event_index = trigger_node.\
-                                get_full_name_items(index).\
-                                index(trigger_name)
+                                get_full_name_index(trigger_name, index)
                         elif working_node.is_list or working_node.is_range:
                             event_index = trigger_index
                         else:
@@ -917,6 +956,10 @@ class EcfNode():
     get_name()
         Returns the name of the node.
 
+    _expand(ecfitem, ecfparent, check_parent_counter)
+        Breaks down the range or list of the node, or reuses the breakdown of
+        an identical node (same item and same parent breakdown).
+
     __check_range(ecfitem)
         Checks to see if the EcfNode is a loop. If it is, this function also
         calls the supporting functions to set the range values, if there is
@@ -935,6 +978,10 @@ class EcfNode():
         just returns an array of one item. If it uses the parent counter it
         returns an array of one item in the position of the parent counter.
 
+    get_full_name_index(name, counter=0)
+        Returns the position of a name in get_full_name_items(counter), from
+        an index of the names instead of a search through the list.
+
     __set_max_value(range_token)
         The range token is passed in and if only one value is set in the range
         then it is set to max value and the initial is set to 0 and the
@@ -995,15 +1042,60 @@ class EcfNode():
             Name of the parent for the EcfNode item. This will help determine
             if the parent has the counter or if one is defined for this class
         """
-        self.__items = []
-        self.__full_name_items = []
-        self.__check_range(ecfitem)
-        self.__setup_items_list(ecfparent)
-        self.__populate_full_name_items()
-        if (ecfparent and self.__max_value is None and
-            (ecfparent.is_list or ecfparent.is_range) and
-                len(self.__items) == len(ecfparent.get_full_name_items())):
-            self.use_parent_counter = True
+        self._expand(ecfitem, ecfparent, True)
+
+    # Breakdowns of the nodes, by item and parent breakdown (see _expand)
+    _expansions = {}
+
+    def _expand(self, ecfitem, ecfparent, check_parent_counter):
+        """
+        Breaks down the range or list of the node into its items and full
+        names. The same items are used with the same parents many times over
+        when a suite is built (e.g. the edits of each ensemble member), so the
+        breakdown only depends on the item and the breakdown of the parent,
+        and is kept in _expansions to be reused by identical nodes.
+
+        Parameters
+        ----------
+        ecfitem : str
+            Name of the EcfNode item.
+        ecfparent : EcfNode
+            The parent node, if any.
+        check_parent_counter : bool
+            Use the parent counter if the parent is a range or list of the
+            same length as the node.
+
+        Returns
+        -------
+        None
+        """
+
+        parent_key = getattr(ecfparent, '_expansion_key', None)
+        if ecfparent is not None and parent_key is None:
+            key = None
+        else:
+            key = (repr(ecfitem), check_parent_counter, parent_key)
+
+        expansion = EcfNode._expansions.get(key) if key is not None else None
+        if expansion is None:
+            self.__items = []
+            self.__full_name_items = []
+            self.__check_range(ecfitem)
+            self.__setup_items_list(ecfparent)
+            self.__populate_full_name_items()
+            if (check_parent_counter and ecfparent and
+                self.__max_value is None and
+                (ecfparent.is_list or ecfparent.is_range) and
+                    len(self.__items) == len(ecfparent.get_full_name_items())):
+                self.use_parent_counter = True
+            self.__full_name_positions = {}
+            for position, name in enumerate(self.__full_name_items):
+                self.__full_name_positions.setdefault(name, position)
+            if key is not None:
+                EcfNode._expansions[key] = dict(self.__dict__)
+        else:
+            self.__dict__.update(expansion)
+        self._expansion_key = key
 
     def get_name(self):
         """
@@ -1146,6 +1238,32 @@ class EcfNode():
         else:
             return self.__full_name_items
 
+    def get_full_name_index(self, name, counter=0):
+        """
+        Returns the position of a name in get_full_name_items(counter), like
+        get_full_name_items(counter).index(name), but from an index of the
+        names rather than a search through the list.
+
+        Parameters
+        ----------
+        name : str
+            The full name to look for.
+        counter : int
+            The position of the parent counter, as for get_full_name_items.
+
+        Returns
+        -------
+        int
+            The position of the name.
+        """
+
+        if self.use_parent_counter:
+            if self.__full_name_items[counter] == name:
+                return 0
+        elif name in self.__full_name_positions:
+            return self.__full_name_positions[name]
+        raise ValueError(f"{name} is not in the items of {self.name}")
+
     def __set_max_value(self, range_token):
         """
         The range token is passed in and if only one value is set in the range
@@ -1542,15 +1660,11 @@ class ecfTriggerNode(EcfNode):
             A dictionary or string item that represents the current node.
         """
 
-        self._EcfNode__items = []
-        self._EcfNode__full_name_items = []
         if 'family' in ecfitem.keys():
             trigger_type = 'family'
         else:
             trigger_type = 'task'
-        self._EcfNode__check_range(ecfitem[trigger_type])
-        self._EcfNode__setup_items_list(ecfparent)
-        self._EcfNode__populate_full_name_items()
+        self._expand(ecfitem[trigger_type], ecfparent, False)
         self.task_setup = ecfitem
         self.ecfparent = ecfparent
         self.trigger_type = trigger_type
@@ -1917,6 +2031,10 @@ class EcfTask(ecflow.Task, EcfRoot):
         script repo that isn't the default and template if that is also
         defined for a task.
 
+    get_script_deployment(ecfhome,suite,parents)
+        Returns the destination path of the script of the task and the name of
+        the script to look for in the script repository.
+
     generate_ecflow_task(ecfhome,suite,parents)
         Uses the parameters passed in to define the folder path and then
         looks in the script repository for the task name with a .ecf suffix or
@@ -1945,12 +2063,12 @@ class EcfTask(ecflow.Task, EcfRoot):
         self.scriptrepo = repopath
         self.template = template
 
-    def generate_ecflow_task(self, ecfhome, suite, parents):
+    def get_script_deployment(self, ecfhome, suite, parents):
         """
-        Uses the parameters passed in to define the folder path and then
-        looks in the script repository for the task name with a .ecf suffix or
-        template name with a .ecf suffix and then copies that script content
-        from the script repo over to the destination provided by the parameters
+        Returns the destination path of the script of the task, from the
+        ecfhome, suite and parent folders, and the name of the script to look
+        for in the script repository, the task name or the template name with
+        a .ecf suffix.
 
         Parameters
         ----------
@@ -1965,32 +2083,166 @@ class EcfTask(ecflow.Task, EcfRoot):
 
         Returns
         -------
-        None
+        tuple or None
+            The destination path and the script name, None if the template is
+            skip.
         """
         if self.template == "skip":
-            return
+            return None
         script_name = f"{self.name()}.ecf"
-        ecfscript = None
         search_script = f"{self.template}.ecf" if self.template is not \
             None else script_name
         if parents:
             script_path = f"{ecfhome}/{suite}/{parents.replace('>','/')}/{script_name}"
         else:
             script_path = f"{ecfhome}/{suite}/{script_name}"
-        for root, dirs, files in os.walk(self.scriptrepo):
-            if search_script in files and ecfscript is None:
-                ecfscript = os.path.join(root, search_script)
-            elif script_name in files:
-                print(f"More than one script named {script_name}. "
-                      "Using the first one found.")
-        try:
-            if ecfscript is not None:
-                shutil.copyfile(ecfscript, script_path, follow_symlinks=True)
+        return script_path, search_script
+
+    def generate_ecflow_task(self, ecfhome, suite, parents):
+        """
+        Uses the parameters passed in to define the folder path and then
+        looks in the script repository for the task name with a .ecf suffix or
+        template name with a .ecf suffix and then copies that script content
+        from the script repo over to the destination provided by the parameters
+
+        Parameters
+        ----------
+        ecfhome : str
+            Path to the root level directory to place the scripts.
+        suite : str
+            Suite name to add the scripts to that will be appended to the
+            ecfhome
+        parents: str
+            Any parent folders that are appended to the ecfhome and suite
+            folders.
+
+        Returns
+        -------
+        None
+        """
+        deployment = self.get_script_deployment(ecfhome, suite, parents)
+        if deployment is not None:
+            script_path, search_script = deployment
+            deploy_scripts({script_path: (self.scriptrepo, search_script)})
+
+
+@lru_cache(maxsize=None)
+def index_script_repository(scriptrepo):
+    """
+    Walks the script repository once and indexes the scripts by file name.
+    The scripts do not need to be in any particular folder of the repository,
+    so the first one found is used if more than one has the same name.
+
+    Parameters
+    ----------
+    scriptrepo : str
+        Path to the script repository.
+
+    Returns
+    -------
+    tuple
+        A dictionary of the paths of the scripts by name, and the set of the
+        names found more than once.
+    """
+
+    scripts = {}
+    duplicates = set()
+    for root, dirs, files in os.walk(scriptrepo):
+        for script in files:
+            if script in scripts:
+                duplicates.add(script)
             else:
-                raise ConfigurationError
-        except ConfigurationError:
+                scripts[script] = os.path.join(root, script)
+    return scripts, duplicates
+
+
+def deploy_scripts(deployments, mode='copy', max_workers=8):
+    """
+    Deploys the scripts of the tasks from the script repositories. Each
+    repository is walked once, each script is read once however many tasks
+    use it (e.g. the template of a range of forecast hours or members), and the
+    scripts are written by a pool of threads.
+
+    Parameters
+    ----------
+    deployments : dict
+        The destination paths of the scripts, with the script repository and
+        the name of the script to look for, as in Ecflowsuite.script_deployments.
+    mode : str
+        How to deploy the scripts: copy them, copy each script once and
+        hardlink the other tasks using it to the copy (where the filesystem
+        allows it, else copy), or symlink them to the script repository.
+    max_workers : int
+        The number of threads writing the scripts.
+
+    Returns
+    -------
+    int
+        The number of scripts deployed.
+    """
+
+    if mode not in ['copy', 'hardlink', 'symlink']:
+        print(f"Unknown script deployment {mode}, "
+              "use copy, hardlink or symlink.")
+        sys.exit(1)
+
+    # Resolve all the scripts first, so nothing is written if one is missing
+    destinations = {}
+    missing = set()
+    for script_path, (scriptrepo, search_script) in deployments.items():
+        scripts, duplicates = index_script_repository(scriptrepo)
+        if search_script not in scripts:
+            missing.add(search_script)
+            continue
+        if search_script in duplicates:
+            duplicates.discard(search_script)
+            print(f"More than one script named {search_script}. "
+                  "Using the first one found.")
+        destinations.setdefault(scripts[search_script], []).append(script_path)
+    if missing:
+        for search_script in sorted(missing):
             print(f"Could not find the script {search_script}. Exiting build")
-            sys.exit(1)
+        sys.exit(1)
+
+    def remove(script_path):
+        # Do not write through a link left by a previous deployment
+        if os.path.lexists(script_path):
+            os.remove(script_path)
+
+    def write(script_path, content):
+        remove(script_path)
+        with open(script_path, 'wb') as script:
+            script.write(content)
+
+    def link(script_path, target):
+        remove(script_path)
+        try:
+            os.link(target, script_path)
+        except OSError:
+            shutil.copyfile(target, script_path)
+
+    def symlink(script_path, target):
+        remove(script_path)
+        os.symlink(target, script_path)
+
+    def deploy(source):
+        script_paths = destinations[source]
+        if mode == 'symlink':
+            return [(symlink, script_path, os.path.abspath(source)) for script_path in script_paths]
+        with open(source, 'rb') as script:
+            content = script.read()
+        if mode == 'hardlink':
+            write(script_paths[0], content)
+            return [(link, script_path, script_paths[0]) for script_path in script_paths[1:]]
+        return [(write, script_path, content) for script_path in script_paths]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Read each script (and write the first copy of it), then write the rest
+        jobs = [job for source_jobs in executor.map(deploy, destinations) for job in source_jobs]
+        for _ in executor.map(lambda job: job[0](*job[1:]), jobs):
+            pass
+
+    return len(deployments)
 
 # define Python user-defined exceptions
 
@@ -21,7 +21,7 @@ import os
 import re
 import sys
 import datetime
-from ecFlow.ecflow_definitions import Ecflowsuite, EcfFamilyNode
+from ecFlow.ecflow_definitions import Ecflowsuite, EcfFamilyNode, deploy_scripts
 
 try:
     from ecflow import Defs
@@ -47,6 +47,9 @@ class Ecflowsetup:
     DEFS : ecflow.Defs
         A definition object provided by the ecflow module that holds all of the
         suites.
+    script_deployment : str
+        How the scripts of the tasks are deployed from the script repository,
+        copy (the default), hardlink or symlink.
 
     Methods
     -------
@@ -130,6 +133,10 @@ class Ecflowsetup:
             self.env_configs['base']['scriptrepo'] = f"{self.ecfhome}/scripts"
         self.scriptrepo = self.env_configs['base']['scriptrepo']
 
+        # Setup how the scripts are deployed from the script repository
+        self.script_deployment = self.ecfconf.get('script_deployment', 'copy')
+        self.script_workers = int(self.ecfconf.get('script_workers', 8))
+
         # Setup the default edits from the environment
         self.environment_edits = [
             'ACCOUNT',
@@ -218,6 +225,15 @@ class Ecflowsetup:
                         self.add_tasks_and_edits(new_suite, self.ecfconf['suites'][suite]['nodes'])
                     self.suite_array[new_suite.get_suite_name()] = new_suite
 
+        # Deploy the scripts of the tasks of all the suites together, each
+        # script of the repository is read once however many tasks use it.
+        script_deployments = {}
+        for suite_name, suite in self.suite_array.items():
+            script_deployments.update(suite.script_deployments)
+        if script_deployments:
+            deploy_scripts(script_deployments, self.script_deployment,
+                           self.script_workers)
+
         # Now that the families and tasks are setup, run through the triggers
         # and events and add them to the respective tasks/family objects.
         for suite in self.ecfconf['suites'].keys():
@@ -435,7 +451,7 @@ class Ecflowsetup:
                 suite.add_ecfsuite_node(item, family_node)
                 for family in family_node.get_full_name_items():
                     suite.add_family(family, parents)
-                    index = family_node.get_full_name_items().index(family)
+                    index = family_node.get_full_name_index(family)
                     if parents:
                         family_path = f"{parents}>{family}"
                     else:
@@ -518,7 +534,7 @@ class Ecflowsetup:
                                                                 'triggers'}:
                 family_node = EcfFamilyNode(item, parent_node)
                 for family in family_node.get_full_name_items():
-                    index = family_node.get_full_name_items().index(family)
+                    index = family_node.get_full_name_index(family)
                     if parents:
                         family_path = f"{parents}>{family}"
                     else:
@@ -584,7 +600,7 @@ class Ecflowsetup:
             elif isinstance(nodes[item], dict):
                 family_node = EcfFamilyNode(item, parent_node)
                 for family in family_node.get_full_name_items():
-                    index = family_node.get_full_name_items().index(family)
+                    index = family_node.get_full_name_index(family)
                     if parents:
                         family_path = f"{parents}>{item}"
                     else:
@@ -217,7 +217,7 @@ class GEFSTasks(Tasks):
         if component in ['ocean', 'ice'] and 0 in fhrs:
             fhrs.remove(0)
 
-        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks)
+        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks, metatask=f'{self.run}_{component}_prod')
 
         # Adjust walltime based on the largest group
         largest_group = max([len(grp.split(',')) for grp in fhr_var_dict['fhr_list'].split(' ')])
@@ -284,7 +284,7 @@ class GEFSTasks(Tasks):
             fhrs.remove(0)
 
         max_tasks = self._configs['atmos_ensstat']['MAX_TASKS']
-        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks)
+        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks, metatask=f'{self.run}_atmos_ensstat')
 
         # Adjust walltime based on the largest group
         largest_group = max([len(grp.split(',')) for grp in fhr_var_dict['fhr_list'].split(' ')])
@@ -335,7 +335,7 @@ class GEFSTasks(Tasks):
             fhrs = [fhr for fhr in fhrs if fhr not in [0, 1, 2]]
 
         max_tasks = self._configs['wavepostsbs']['MAX_TASKS']
-        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks)
+        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks, metatask=f'{self.run}_wave_post_grid')
 
         wave_post_envars = self.envars.copy()
         postenvar_dict = {'ENSMEM': '#member#',
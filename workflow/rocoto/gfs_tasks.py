@@ -1154,7 +1154,7 @@ class GFSTasks(Tasks):
         if component in ['ocean', 'ice'] and 0 in fhrs:
             fhrs.remove(0)
 
-        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks)
+        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks, metatask=f'{self.run}_{component}_prod')
 
         # Adjust walltime based on the largest group
         largest_group = max([len(grp.split(',')) for grp in fhr_var_dict['fhr_list'].split(' ')])
@@ -1211,7 +1211,7 @@ class GFSTasks(Tasks):
 
         fhrs = self._get_forecast_hours(self.run, self._configs['wavepostsbs'], 'wave')
         max_tasks = self._configs['wavepostsbs']['MAX_TASKS']
-        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks)
+        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks, metatask=f'{self.run}_wavepostsbs')
 
         wave_post_envars = self.envars.copy()
         postenvar_dict = {'FHR_LIST': '#fhr_list#'}
@@ -1538,7 +1538,7 @@ class GFSTasks(Tasks):
 
         fhrs = self._get_forecast_hours(self.run, self._configs['gempak'])
         max_tasks = self._configs['gempak']['MAX_TASKS']
-        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks)
+        fhr_var_dict = self.get_grouped_fhr_dict(fhrs=fhrs, ngroups=max_tasks, metatask=f'{self.run}_gempak')
 
         resources = self.get_resource('gempak')
         # Adjust walltime based on the largest group
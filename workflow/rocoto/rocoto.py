@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
-from typing import Union, List, Dict, Any
+import io
+from contextlib import contextmanager
+from typing import Union, List, Dict, Any, TextIO
 
 '''
     MODULE:
@@ -11,17 +13,77 @@ from typing import Union, List, Dict, Any
         Rocoto documentation is available at https://christopherwharrop.github.io/rocoto
 '''
 
-__all__ = ['create_task',
+__all__ = ['XMLWriter', 'create_task', 'write_task',
            'add_dependency', 'create_dependency',
            'create_envar', 'create_entity', 'create_cycledef']
 
 
-def create_task(task_dict: Dict[str, Any]) -> List[str]:
+class XMLWriter:
+    """
+    Streaming writer for Rocoto XML
+
+    Lines are written straight to a file object, indented by one tab per
+    level of nesting (e.g. per enclosing metatask).  Blank lines are never
+    indented.
+
+    Parameters
+    ----------
+    fh: TextIO
+        File object to write to
+    """
+
+    def __init__(self, fh: TextIO) -> None:
+        self.fh = fh
+        self.level = 0
+
+    @contextmanager
+    def indented(self):
+        """
+        Indent the lines written within the context by one more level
+        """
+        self.level += 1
+        try:
+            yield self
+        finally:
+            self.level -= 1
+
+    def line(self, text: str = '', indent: int = 0) -> None:
+        """
+        Write a line of XML
+
+        Parameters
+        ----------
+        text: str
+            Text of the line (without the newline)
+        indent: int
+            Additional indentation of the line, on top of the nesting level
+        """
+        text = '\t' * indent + text + '\n'
+        if self.level == 0 or text == '\n':
+            self.fh.write(text)
+        elif '\n' not in text[:-1]:
+            self.fh.write('\t' * self.level + text)
+        else:
+            self.write(text)
+
+    def write(self, text: str) -> None:
+        """
+        Write a block of XML, indenting each of its non-blank lines to the nesting level
+        """
+        if self.level == 0:
+            self.fh.write(text)
+            return
+        prefix = '\t' * self.level
+        for line in text.splitlines(True):
+            self.fh.write(line if line == '\n' else prefix + line)
+
+
+def create_task(task_dict: Dict[str, Any]) -> str:
     """
     Create XML for a rocoto task or metatask
 
-    Creates the XML required to define a task and returns the lines
-    as a list of strings. Tasks can be nested to create metatasks by
+    Creates the XML required to define a task and returns it as a
+    string (see write_task). Tasks can be nested to create metatasks by
     defining a key 'task_dict' within the task_dict. When including
     a nested task, you also need to provide a 'var_dict' key that
     contains a dictionary of variables to loop over.
@@ -48,10 +110,38 @@ def create_task(task_dict: Dict[str, Any]) -> List[str]:
 
     """
 
+    buffer = io.StringIO()
+    write_task(XMLWriter(buffer), task_dict)
+
+    return buffer.getvalue()
+
+
+def write_task(writer: XMLWriter, task_dict: Dict[str, Any]) -> None:
+    """
+    Write the XML for a rocoto task or metatask
+
+    Same as create_task, but the XML is streamed to an XMLWriter.
+    Nested tasks are written one level of indentation deeper than
+    their metatask.
+
+    Parameters
+    ----------
+    writer: XMLWriter
+        Writer to stream the XML to
+    task_dict: dict
+        Dictionary of task definitions
+
+    Raises
+    ------
+    KeyError
+        If a required key is missing
+
+    """
+
     inner_task_dict = task_dict.pop('task_dict', None)
 
     if inner_task_dict is None:
-        strings = _create_innermost_task(task_dict)
+        _write_innermost_task(writer, task_dict)
 
     else:
         # There is a nested task_dict, so this is a metatask
@@ -59,48 +149,39 @@ def create_task(task_dict: Dict[str, Any]) -> List[str]:
         metataskmode = 'serial' if task_dict.get('is_serial', False) else 'parallel'
         var_dict = task_dict.get('var_dict', None)
 
-        strings = [f'<metatask name="{metataskname}" mode="{metataskmode}">\n',
-                   '\n']
-
         if var_dict is None:
             msg = f'Task {metataskname} has a nested task dict, but has no var_dict'
             raise KeyError(msg)
 
+        writer.line(f'<metatask name="{metataskname}" mode="{metataskmode}">')
+        writer.line()
+
         for key in var_dict.keys():
             value = str(var_dict[key])
-            strings.append(f'\t<var name="{key}">{value}</var>\n')
+            writer.line(f'<var name="{key}">{value}</var>', indent=1)
 
-        strings.append('\n')
+        writer.line()
         task_dict.update(inner_task_dict)
-        tasklines = create_task(task_dict).splitlines(True)
-        for tl in tasklines:
-            strings.append(f'{tl}') if tl == '\n' else strings.append(f'\t{tl}')
-        strings.append('\n')
-        strings.append('</metatask>\n')
-
-    return ''.join(strings)
+        with writer.indented():
+            write_task(writer, task_dict)
+        writer.line()
+        writer.line('</metatask>')
 
 
-def _create_innermost_task(task_dict: Dict[str, Any]) -> List[str]:
+def _write_innermost_task(writer: XMLWriter, task_dict: Dict[str, Any]) -> None:
     """
-    Create XML for a regular rocoto task
-
-    Creates the XML required to define a task and returns the lines
-    as a list of strings.
+    Write the XML for a regular rocoto task
 
     All task dicts must include a 'task_name' and a 'resources'
     key containing a dict of values defining the HPC settings.
 
     Parameters
     ----------
+    writer: XMLWriter
+        Writer to stream the XML to
     task_dict: dict
         Dictionary of task definitions
 
-    Returns
-    -------
-    List[str]
-        List of strings containing the XML code defining the task
-
     Raises
     ------
     KeyError
@@ -133,41 +214,39 @@ def _create_innermost_task(task_dict: Dict[str, Any]) -> List[str]:
     str_final = ' final="true"' if final else ''
     envar = envar if isinstance(envar, list) else [envar]
 
-    strings = [f'<task name="{taskname}" cycledefs="{cycledef}" maxtries="{str_maxtries}"{str_final}>\n',
-               '\n',
-               f'\t<command>{command}</command>\n',
-               '\n',
-               f'\t<jobname><cyclestr>{jobname}</cyclestr></jobname>\n',
-               f'\t<account>{account}</account>\n',
-               f'\t<queue>{queue}</queue>\n']
+    writer.line(f'<task name="{taskname}" cycledefs="{cycledef}" maxtries="{str_maxtries}"{str_final}>')
+    writer.line()
+    writer.line(f'<command>{command}</command>', indent=1)
+    writer.line()
+    writer.line(f'<jobname><cyclestr>{jobname}</cyclestr></jobname>', indent=1)
+    writer.line(f'<account>{account}</account>', indent=1)
+    writer.line(f'<queue>{queue}</queue>', indent=1)
 
     if partition is not None:
-        strings.append(f'\t<partition>{partition}</partition>\n')
-    strings.append(f'\t<walltime>{walltime}</walltime>\n')
-    strings.append(f'\t<nodes>{nodes}:ppn={ppn}:tpp={threads}</nodes>\n')
+        writer.line(f'<partition>{partition}</partition>', indent=1)
+    writer.line(f'<walltime>{walltime}</walltime>', indent=1)
+    writer.line(f'<nodes>{nodes}:ppn={ppn}:tpp={threads}</nodes>', indent=1)
     if memory is not None:
-        strings.append(f'\t<memory>{memory}</memory>\n')
+        writer.line(f'<memory>{memory}</memory>', indent=1)
     if native is not None:
-        strings.append(f'\t<native>{native}</native>\n')
-    strings.append('\n')
-    strings.append(f'\t<join><cyclestr>{log}</cyclestr></join>\n')
-    strings.append('\n')
+        writer.line(f'<native>{native}</native>', indent=1)
+    writer.line()
+    writer.line(f'<join><cyclestr>{log}</cyclestr></join>', indent=1)
+    writer.line()
 
     if envar[0] is not None:
         for e in envar:
-            strings.append(f'\t{e}\n')
-        strings.append('\n')
+            writer.line(f'{e}', indent=1)
+        writer.line()
 
     if dependency is not None and len(dependency) > 0:
-        strings.append('\t<dependency>\n')
+        writer.line('<dependency>', indent=1)
         for d in dependency:
-            strings.append(f'\t\t{d}\n')
-        strings.append('\t</dependency>\n')
-        strings.append('\n')
+            writer.line(f'{d}', indent=2)
+        writer.line('</dependency>', indent=1)
+        writer.line()
 
-    strings.append('</task>\n')
-
-    return strings
+    writer.line('</task>')
 
 
 def add_dependency(dep_dict: Dict[str, Any]) -> str:
@@ -3,8 +3,8 @@
 import numpy as np
 from applications.applications import AppConfig
 import rocoto.rocoto as rocoto
-from wxflow import Template, TemplateConstants, to_timedelta, timedelta_to_HMS
-from typing import List, Union
+from wxflow import Template, TemplateConstants, YAMLFile, to_timedelta, timedelta_to_HMS
+from typing import Dict, List, Union
 from bisect import bisect_right
 
 __all__ = ['Tasks']
@@ -66,6 +66,9 @@ class Tasks:
 
         self.n_tiles = 6  # TODO - this needs to be elsewhere
 
+        # Runtimes of the forecast hours, read when first needed (see get_grouped_fhr_dict)
+        self._fhr_cost_profile = None
+
         # DATAROOT is set by prod_envir in ops.  Here, we use `STMP` to construct DATAROOT
         dataroot_str = f"{self._base.get('STMP')}/RUNDIRS/{self._base.get('PSLOT')}/{self.run}.<cyclestr>@Y@m@d@H</cyclestr>"
         envar_dict = {'RUN_ENVIR': self._base.get('RUN_ENVIR', 'emc'),
@@ -178,13 +181,19 @@ class Tasks:
         return fhrs
 
     @staticmethod
-    def get_job_groups(fhrs: List[int], ngroups: int, breakpoints: List[int] = None) -> List[dict]:
+    def get_job_groups(fhrs: List[int], ngroups: int, breakpoints: List[int] = None,
+                       costs: List[float] = None) -> List[dict]:
         '''
         Split forecast hours into a number of groups, obeying a list of pre-set breakpoints.
 
         Takes a list of forecast hours and splits it into a number of groups while obeying
         a list of pre-set breakpoints and recording which segment each belongs to.
 
+        By default the groups have (nearly) the same number of forecast hours.  If the cost
+        (e.g. runtime) of each forecast hour is given, the groups are balanced by cost
+        instead: the groups are assigned to the segments in proportion to their cost, and
+        each segment is split so as to minimize the cost of its most expensive group.
+
         Parameters
         ----------
         fhrs: List[int]
@@ -193,6 +202,8 @@ class Tasks:
                  Number of groups to split the forecast hours into
         breakpoints: List[int]
                      List of preset forecast hour break points to use (default: [])
+        costs: List[float]
+               Cost of each forecast hour (default: None, split by number of hours)
 
         Returns
         -------
@@ -211,17 +222,27 @@ class Tasks:
         if ngroups > len(fhrs):
             ngroups = len(fhrs)
 
+        if costs is not None and len(costs) != len(fhrs):
+            raise ValueError(f"Number of costs ({len(costs)}) does not match the number of forecast hours ({len(fhrs)})")
+
         # First, split at segment boundaries
-        fhrs_segs = [grp.tolist() for grp in np.array_split(fhrs, [bisect_right(fhrs, bpnt) for bpnt in breakpoints if bpnt < max(fhrs)])]
+        seg_bounds = [bisect_right(fhrs, bpnt) for bpnt in breakpoints if bpnt < max(fhrs)]
+        fhrs_segs = [grp.tolist() for grp in np.array_split(fhrs, seg_bounds)]
         seg_lens = [len(seg) for seg in fhrs_segs]
+        if costs is None:
+            seg_sizes = seg_lens
+        else:
+            costs_segs = [grp.tolist() for grp in np.array_split(np.asarray(costs, dtype=float), seg_bounds)]
+            seg_sizes = [sum(seg) for seg in costs_segs]
 
         # Initialize each segment to be split into one job group
         ngroups_segs = [1 for _ in range(0, len(fhrs_segs))]
 
         # For remaining job groups, iteratively assign to the segment with the most
-        # hours per group
+        # hours (or cost) per group, that still has more hours than groups
         for _ in range(0, ngroups - len(fhrs_segs)):
-            current_lens = [size / weight for size, weight in zip(seg_lens, ngroups_segs)]
+            current_lens = [size / weight if weight < seg_len else -1.
+                            for size, weight, seg_len in zip(seg_sizes, ngroups_segs, seg_lens)]
             index_max = max(range(len(current_lens)), key=current_lens.__getitem__)
             ngroups_segs[index_max] += 1
 
@@ -229,11 +250,54 @@ class Tasks:
         # Split them and flatten to a single list.
         groups = []
         for seg_num, (fhrs_seg, ngroups_seg) in enumerate(zip(fhrs_segs, ngroups_segs)):
-            [groups.append({'fhrs': grp.tolist(), 'seg': seg_num}) for grp in np.array_split(fhrs_seg, ngroups_seg)]
+            if costs is None:
+                [groups.append({'fhrs': grp.tolist(), 'seg': seg_num}) for grp in np.array_split(fhrs_seg, ngroups_seg)]
+            else:
+                [groups.append({'fhrs': grp, 'seg': seg_num})
+                 for grp in Tasks._split_by_cost(fhrs_seg, costs_segs[seg_num], ngroups_seg)]
+
+        return groups
+
+    @staticmethod
+    def _split_by_cost(fhrs: List[int], costs: List[float], ngroups: int) -> List[List[int]]:
+        '''
+        Split forecast hours into ngroups contiguous groups, minimizing the cost of the most
+        expensive group (bisection on the largest cost allowed for a group)
+        '''
+
+        def pack(limit):
+            # Fill each group in order until the next hour would exceed the limit
+            groups, total = [[]], 0.
+            for fhr, cost in zip(fhrs, costs):
+                if groups[-1] and total + cost > limit:
+                    groups.append([])
+                    total = 0.
+                groups[-1].append(fhr)
+                total += cost
+            return groups
+
+        low, high = max(costs), sum(costs)
+        while high - low > 1.e-6 * high:
+            mid = 0.5 * (low + high)
+            if len(pack(mid)) <= ngroups:
+                high = mid
+            else:
+                low = mid
+        groups = pack(high)
+
+        # Fewer groups may be enough for the optimal limit; split the most expensive ones
+        cost_of = dict(zip(fhrs, costs))
+        while len(groups) < ngroups:
+            index = max((ii for ii, grp in enumerate(groups) if len(grp) > 1),
+                        key=lambda ii: sum(cost_of[fhr] for fhr in groups[ii]))
+            group = groups[index]
+            cumulative = np.cumsum([cost_of[fhr] for fhr in group])
+            split = min(max(int(np.searchsorted(cumulative, 0.5 * cumulative[-1])), 1), len(group) - 1)
+            groups[index:index + 1] = [group[:split], group[split:]]
 
         return groups
 
-    def get_grouped_fhr_dict(self, fhrs: List[int], ngroups: int) -> dict:
+    def get_grouped_fhr_dict(self, fhrs: List[int], ngroups: int, metatask: str = None) -> dict:
         '''
         Prepare a metatask dictionary for forecast hour groups.
 
@@ -241,12 +305,17 @@ class Tasks:
         crossing forecast segment boundaries. Then use that to prepare a dict with key
         variable lists for use in a rocoto metatask.
 
+        If FHR_COST_PROFILE has runtimes for the metatask, the groups are balanced by
+        runtime rather than by number of forecast hours.
+
         Parameters
         ----------
         fhrs: List[int]
               List of forecast hours to break into groups
         ngroups: int
                  Number of groups to split the forecast hours into
+        metatask: str
+                  Name of the metatask, to look up its runtimes in FHR_COST_PROFILE
 
         Returns
         -------
@@ -259,7 +328,8 @@ class Tasks:
               seg_dep: list of segments each group belongs to
         '''
         fhr_breakpoints = self.options['fcst_segments'][1:-1]
-        group_dicts = Tasks.get_job_groups(fhrs=fhrs, ngroups=ngroups, breakpoints=fhr_breakpoints)
+        costs = None if metatask is None else self._get_fhr_costs(metatask, fhrs)
+        group_dicts = Tasks.get_job_groups(fhrs=fhrs, ngroups=ngroups, breakpoints=fhr_breakpoints, costs=costs)
 
         fhrs_group = [dct['fhrs'] for dct in group_dicts]
         fhrs_first = [grp[0] for grp in fhrs_group]
@@ -277,6 +347,42 @@ class Tasks:
 
         return fhr_var_dict
 
+    def _get_fhr_costs(self, metatask: str, fhrs: List[int]) -> Union[List[float], None]:
+        '''
+        Runtime of each forecast hour of a metatask, from FHR_COST_PROFILE
+
+        The profile is a YAML file mapping metatask names, with or without the RUN
+        prefix, to the runtime of forecast hours, e.g.
+            gfs_atmos_prod: {0: 60., 3: 45., 120: 40.}
+        Runtimes of the forecast hours not in the profile are interpolated.
+
+        Parameters
+        ----------
+        metatask: str
+                  Name of the metatask
+        fhrs: List[int]
+              List of forecast hours
+
+        Returns
+        -------
+        List[float] | None: Runtime of each forecast hour, None if the metatask is not in the profile
+        '''
+        if not self.options.get('fhr_cost_profile'):
+            return None
+
+        if self._fhr_cost_profile is None:
+            self._fhr_cost_profile = YAMLFile(path=self.options['fhr_cost_profile'])
+
+        costs: Dict = self._fhr_cost_profile.get(metatask)
+        if costs is None and metatask.startswith(f'{self.run}_'):
+            costs = self._fhr_cost_profile.get(metatask[len(self.run) + 1:])
+        if not costs:
+            return None
+
+        profile_fhrs = sorted(int(fhr) for fhr in costs)
+        profile_costs = [float(costs.get(fhr, costs.get(str(fhr)))) for fhr in profile_fhrs]
+        return np.interp(fhrs, profile_fhrs, profile_costs).tolist()
+
     @staticmethod
     def multiply_HMS(hms_timedelta: str, multiplier: Union[int, float]) -> str:
         '''
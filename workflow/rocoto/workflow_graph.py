@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+
+import re
+import sqlite3
+import statistics
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+'''
+    MODULE:
+        workflow_graph.py
+
+    ABOUT:
+        Dependency graph (DAG) of a Rocoto workflow, built from the task XML
+        generated by the Tasks classes or from a workflow document, and the
+        analyses run on it: critical path of a cycle and redundant dependencies
+'''
+
+__all__ = ['WorkflowGraph', 'TaskNode', 'parse_duration', 'load_durations']
+
+# Dependency tags that do not depend on other tasks of the workflow
+_EXTERNAL_TAGS = ['datadep', 'cycleexistdep', 'taskvalid', 'streq', 'strneq', 'sh', 'timedep', 'true', 'false']
+
+# Entity references other than the predefined XML ones, e.g. &MAXTRIES; in a task fragment
+_entity_ref = re.compile(r'&(?!(?:amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+);)(\w+);')
+
+
+def parse_duration(duration: Optional[str]) -> float:
+    """
+    Convert a Rocoto walltime or cycle offset ([-][[dd:]hh:]mm:ss or seconds) to seconds
+
+    Anything else, e.g. an entity that was not expanded, counts as 0
+    """
+    duration = str(duration or '').strip()
+    if not re.fullmatch(r'[+-]?[\d.]+(:[\d.]+){0,3}', duration):
+        return 0.
+    sign = -1. if duration.startswith('-') else 1.
+    seconds = 0.
+    for field, factor in zip(reversed(duration.lstrip('+-').split(':')), (1, 60, 3600, 86400)):
+        seconds += float(field) * factor
+    return sign * seconds
+
+
+class TaskNode:
+    """
+    A task of the workflow, after expansion of its metatasks
+
+    Attributes
+    ----------
+    name: str
+        Task name, with the metatask variables substituted
+    cycledefs: List[str]
+        Cycledef groups the task runs in
+    walltime: float
+        Requested walltime in seconds
+    metatasks: List[str]
+        Names of the enclosing metatasks, innermost last
+    variables: Dict[str, str]
+        Values of the metatask variables for the task
+    dependency: tuple
+        Dependency tree: (tag, [children]) for boolean operators,
+        (tag, name, offset) for taskdep/metataskdep/serialdep, and (tag,) otherwise
+    """
+
+    def __init__(self, name: str, cycledefs: List[str], walltime: float, metatasks: List[str], dependency,
+                 variables: Dict[str, str] = None) -> None:
+        self.name = name
+        self.cycledefs = cycledefs
+        self.walltime = walltime
+        self.metatasks = metatasks
+        self.dependency = dependency
+        self.variables = variables or {}
+
+    def __repr__(self) -> str:
+        return f'TaskNode({self.name})'
+
+
+class WorkflowGraph:
+    """
+    Dependency graph of a Rocoto workflow
+
+    Tasks are added from the XML of each task or metatask (add_xml), e.g. as
+    they are generated by the Tasks classes, or from a complete workflow
+    document (from_file).  Metatasks are expanded into their tasks, and
+    serial metatasks get an implicit dependency (serialdep) of each task on the previous one.
+    """
+
+    def __init__(self) -> None:
+        self.tasks = OrderedDict()
+        self.metatasks = OrderedDict()
+        self.cycledefs = OrderedDict()
+
+    @classmethod
+    def from_file(cls, xml_file: str) -> 'WorkflowGraph':
+        """
+        Build the graph of a workflow document (entities are expanded by the parser)
+        """
+        graph = cls()
+        for element in ET.parse(xml_file).getroot():
+            graph._add_element(element)
+        return graph
+
+    def add_xml(self, fragment: str) -> None:
+        """
+        Add the tasks of a fragment of XML (cycledefs, tasks and metatasks)
+        """
+        fragment = _entity_ref.sub(r'\1', fragment)
+        for element in ET.fromstring(f'<workflow>{fragment}</workflow>'):
+            self._add_element(element)
+
+    def _add_element(self, element, variables: Dict[str, str] = None, metatasks: List[str] = None) -> None:
+        variables = variables or {}
+        metatasks = metatasks or []
+
+        if element.tag == 'cycledef':
+            fields = element.text.split()
+            if len(fields) == 3:
+                start, end = (datetime.strptime(field, '%Y%m%d%H%M') for field in fields[:2])
+                self.cycledefs.setdefault(element.get('group'), []).append(
+                    (start, end, timedelta(seconds=parse_duration(fields[2]))))
+
+        elif element.tag == 'metatask':
+            name = _substitute(element.get('name'), variables)
+            members = self.metatasks.setdefault(name, [])
+            var_values = {var.get('name'): (var.text or '').split() for var in element.findall('var')}
+            nvalues = min(len(values) for values in var_values.values()) if var_values else 0
+            previous = None
+            for ii in range(nvalues):
+                inner = dict(variables, **{var: values[ii] for var, values in var_values.items()})
+                first = len(self.tasks)
+                for child in element:
+                    if child.tag in ['task', 'metatask']:
+                        self._add_element(child, inner, metatasks + [name])
+                added = list(self.tasks)[first:]
+                if element.get('mode') == 'serial' and previous:
+                    # Each iteration of a serial metatask waits for the previous one
+                    for task in added:
+                        node = self.tasks[task]
+                        deps = [('serialdep', prev, None) for prev in previous]
+                        node.dependency = ('and', deps + ([node.dependency] if node.dependency else []))
+                previous = added
+                members.extend(added)
+
+        elif element.tag == 'task':
+            name = _substitute(element.get('name'), variables)
+            dependency = element.find('dependency')
+            tree = None
+            if dependency is not None and len(dependency) > 0:
+                tree = _dependency_tree(dependency[0], variables)
+            self.tasks[name] = TaskNode(name=name,
+                                        cycledefs=_substitute(element.get('cycledefs', ''), variables).split(','),
+                                        walltime=parse_duration(element.findtext('walltime')),
+                                        metatasks=metatasks,
+                                        dependency=tree,
+                                        variables=variables)
+
+    def members(self, name: str, tag: str) -> List[str]:
+        """
+        Tasks a taskdep, serialdep or metataskdep refers to
+        """
+        if tag in ['taskdep', 'serialdep']:
+            return [name] if name in self.tasks else []
+        return list(self.metatasks.get(name, []))
+
+    def cycle_tasks(self, cycle: datetime) -> List[str]:
+        """
+        Tasks that run in a cycle, according to the cycledefs of the workflow
+        """
+        groups = {group for group, ranges in self.cycledefs.items()
+                  if any(start <= cycle <= end and (step.total_seconds() == 0 and cycle == start or
+                                                    step.total_seconds() > 0 and (cycle - start) % step == timedelta(0))
+                         for start, end, step in ranges)}
+        return [name for name, task in self.tasks.items() if groups.intersection(task.cycledefs)]
+
+    def critical_path(self, tasks: List[str], durations: Dict[str, float]) -> Tuple[float, List[Tuple[str, float, float]]]:
+        """
+        Critical path through the tasks of one cycle
+
+        Dependencies on tasks of other cycles, on data, or on tasks that do not
+        run in the cycle are taken to be satisfied when the cycle starts.
+        'and' (and 'nor') waits for all its dependencies, 'or' for the first one.
+
+        Parameters
+        ----------
+        tasks: List[str]
+            Tasks that run in the cycle
+        durations: Dict[str, float]
+            Duration of each task in seconds (the walltime is used for missing tasks)
+
+        Returns
+        -------
+        Tuple[float, List]
+            Length of the critical path in seconds, and its (task, start, finish) steps
+        """
+        in_cycle = set(tasks)
+        finish = {}
+        ready_from = {}
+
+        def ready(tree):
+            # Returns (time the dependency is satisfied, task that satisfies it last)
+            tag = tree[0]
+            if tag in ['taskdep', 'metataskdep', 'serialdep']:
+                if parse_duration(tree[2]) != 0:
+                    return 0., None
+                members = [member for member in self.members(tree[1], tag) if member in in_cycle]
+                if not members:
+                    return 0., None
+                return max((visit(member), member) for member in members)
+            if tag in ['and', 'nor', 'nand', 'xor']:
+                times = [ready(child) for child in tree[1]] or [(0., None)]
+                return max(times, key=lambda item: item[0])
+            if tag in ['or', 'some']:
+                times = [ready(child) for child in tree[1]] or [(0., None)]
+                return min(times, key=lambda item: item[0])
+            return 0., None
+
+        def visit(name):
+            if name not in finish:
+                finish[name] = 0.  # guards against cycles in the graph
+                task = self.tasks[name]
+                start, ready_from[name] = ready(task.dependency) if task.dependency else (0., None)
+                finish[name] = start + durations.get(name, task.walltime)
+            return finish[name]
+
+        for name in tasks:
+            visit(name)
+        if not finish:
+            return 0., []
+
+        path = []
+        name = max(finish, key=finish.get)
+        while name is not None:
+            path.append((name, finish[name] - durations.get(name, self.tasks[name].walltime), finish[name]))
+            name = ready_from.get(name)
+
+        return max(finish.values()), path[::-1]
+
+    def required_dependencies(self, name: str) -> List[Tuple[str, str]]:
+        """
+        Same-cycle dependencies of a task that must all be satisfied, i.e. the
+        taskdeps and metataskdeps reached from the root of its dependency through 'and' only
+        """
+        required = []
+
+        def walk(tree):
+            if tree[0] == 'and':
+                for child in tree[1]:
+                    walk(child)
+            elif tree[0] in ['taskdep', 'metataskdep', 'serialdep'] and parse_duration(tree[2]) == 0:
+                required.append((tree[0], tree[1]))
+
+        task = self.tasks[name]
+        if task.dependency:
+            walk(task.dependency)
+        return required
+
+    def redundant_dependencies(self) -> List[Tuple[str, str, str]]:
+        """
+        Dependencies that are implied by other dependencies of the same task
+
+        A required dependency of a task on X is redundant if another required
+        dependency of the task (transitively) already depends on X, or if it is
+        listed twice.  The implicit dependencies of serial metatasks are not
+        reported, nor used to imply others, since they cannot be removed.  Rocoto evaluates every dependency of every pending task
+        on each pass, so redundant ones only slow it down.
+
+        Returns
+        -------
+        List[Tuple[str, str, str]]
+            (task, redundant dependency, dependency that implies it)
+        """
+        closure = {}
+
+        def upstream(name):
+            # Tasks a task requires, directly or transitively
+            if name not in closure:
+                closure[name] = set()
+                result = set()
+                for tag, dep in self.required_dependencies(name):
+                    for member in self.members(dep, tag):
+                        result.add(member)
+                        result.update(upstream(member))
+                closure[name] = result
+            return closure[name]
+
+        redundant = []
+        for name in self.tasks:
+            deps = self.required_dependencies(name)
+            for ii, (tag, dep) in enumerate(deps):
+                if tag == 'serialdep':
+                    continue
+                if (tag, dep) in deps[:ii]:
+                    redundant.append((name, f'{tag} {dep}', 'the same dependency listed again'))
+                    continue
+                members = set(self.members(dep, tag))
+                if not members:
+                    continue
+                for jj, (other_tag, other) in enumerate(deps):
+                    other_members = set(self.members(other, other_tag))
+                    if other_tag == 'serialdep' or (other_tag, other) == (tag, dep) or \
+                            (other_members == members and jj > ii):
+                        continue
+                    implied = set(other_members)
+                    for member in other_members:
+                        implied.update(upstream(member))
+                    if members <= implied:
+                        redundant.append((name, f'{tag} {dep}', f'{other_tag} {other}'))
+                        break
+
+        return redundant
+
+
+def _substitute(text: Optional[str], variables: Dict[str, str]) -> Optional[str]:
+    if text is None:
+        return None
+    for var, value in variables.items():
+        text = text.replace(f'#{var}#', value)
+    return text
+
+
+def _dependency_tree(element, variables: Dict[str, str]):
+    tag = element.tag
+    if tag in ['taskdep', 'metataskdep']:
+        name = element.get('task' if tag == 'taskdep' else 'metatask')
+        return (tag, _substitute(name, variables), element.get('cycle_offset'))
+    if tag in _EXTERNAL_TAGS:
+        return (tag,)
+    return (tag, [_dependency_tree(child, variables) for child in element])
+
+
+def load_durations(database_file: str) -> Tuple[Dict[int, Dict[str, float]], Dict[str, float]]:
+    """
+    Read the runtimes of the succeeded jobs from a Rocoto database
+
+    Returns
+    -------
+    Tuple[Dict, Dict]
+        Durations in seconds of each task in each cycle (keyed by the cycle as
+        a Unix time, as in the database), and the median duration of each task
+    """
+    connection = sqlite3.connect(f'file:{database_file}?mode=ro', uri=True)
+    try:
+        rows = connection.execute("SELECT cycle, taskname, duration FROM jobs "
+                                  "WHERE state='SUCCEEDED' AND duration IS NOT NULL").fetchall()
+    finally:
+        connection.close()
+
+    by_cycle = {}
+    by_task = {}
+    for cycle, taskname, duration in rows:
+        by_cycle.setdefault(cycle, {})[taskname] = float(duration)
+        by_task.setdefault(taskname, []).append(float(duration))
+
+    return by_cycle, {taskname: statistics.median(values) for taskname, values in by_task.items()}
+
+
+def cycle_datetime(cycle: int) -> datetime:
+    """
+    Convert a cycle of the Rocoto database (Unix time) to a naive UTC datetime
+    """
+    return datetime.fromtimestamp(cycle, tz=timezone.utc).replace(tzinfo=None)
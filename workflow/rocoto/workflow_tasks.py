@@ -1,23 +1,71 @@
 #!/usr/bin/env python3
 
-from typing import List
+import time
+from typing import Iterator, List
 from applications.applications import AppConfig
 from rocoto.tasks_factory import tasks_factory
 
 
-__all__ = ['get_wf_tasks']
+__all__ = ['get_wf_tasks', 'iter_wf_tasks', 'TaskProfiler']
 
 
-def get_wf_tasks(app_config: AppConfig) -> List:
+class TaskProfiler:
     """
-    Take application configuration to return a list of all tasks for that application
+    Collect the time spent generating the XML of each task, and of the
+    phases of setup_xml, and report the most expensive ones
+    """
+
+    def __init__(self) -> None:
+        self.phases = {}
+        self.tasks = []
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.) + seconds
+
+    def add_task(self, run: str, task_name: str, seconds: float, nbytes: int) -> None:
+        self.tasks.append((seconds, run, task_name, nbytes))
+
+    def report(self, top: int = 20) -> str:
+        """
+        Return a report of the phases and of the top most expensive tasks
+        """
+        total_time = sum(task[0] for task in self.tasks)
+        total_bytes = sum(task[3] for task in self.tasks)
+
+        strings = ['Phase                          Time (s)']
+        for name, seconds in self.phases.items():
+            strings.append(f'{name:<30} {seconds:8.3f}')
+        strings.append('')
+        strings.append(f'Generated {len(self.tasks)} tasks ({total_bytes} bytes of XML) in {total_time:.3f} s')
+        strings.append(f'{"RUN":<10} {"Task":<30} {"Time (s)":>9} {"Share":>6} {"Bytes":>9}')
+        for seconds, run, task_name, nbytes in sorted(self.tasks, reverse=True)[:top]:
+            share = 100. * seconds / total_time if total_time > 0 else 0.
+            strings.append(f'{run:<10} {task_name:<30} {seconds:9.4f} {share:5.1f}% {nbytes:9d}')
+
+        return '\n'.join(strings)
+
+
+def iter_wf_tasks(app_config: AppConfig, profiler: TaskProfiler = None) -> Iterator[str]:
+    """
+    Take application configuration to generate the XML of each task for that application, one at a time
     """
 
-    tasks = []
     # Loop over all keys of cycles (RUN)
     for run, run_tasks in app_config.task_names.items():
         task_obj = tasks_factory.create(app_config.net, app_config, run)  # create Task object based on run
         for task_name in run_tasks:
-            tasks.append(task_obj.get_task(task_name))
+            if profiler is None:
+                yield task_obj.get_task(task_name)
+            else:
+                start = time.perf_counter()
+                task = task_obj.get_task(task_name)
+                profiler.add_task(run, task_name, time.perf_counter() - start, len(task))
+                yield task
+
+
+def get_wf_tasks(app_config: AppConfig) -> List:
+    """
+    Take application configuration to return a list of all tasks for that application
+    """
 
-    return tasks
+    return list(iter_wf_tasks(app_config))
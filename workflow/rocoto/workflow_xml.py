@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 
+import io
 import os
+import time
 from distutils.spawn import find_executable
 from datetime import datetime
 from collections import OrderedDict
-from typing import Dict
+from typing import Dict, TextIO
 from applications.applications import AppConfig
-from rocoto.workflow_tasks import get_wf_tasks
+from rocoto.workflow_tasks import iter_wf_tasks, TaskProfiler
+from rocoto.workflow_graph import WorkflowGraph
 from wxflow import to_timedelta
 import rocoto.rocoto as rocoto
 from abc import ABC, abstractmethod
@@ -28,11 +31,27 @@ class RocotoXML(ABC):
         self.definitions = self._get_definitions()
         self.header = self._get_workflow_header()
         self.cycledefs = self.get_cycledefs()
-        task_list = get_wf_tasks(app_config)
-        self.tasks = '\n'.join(task_list)
         self.footer = self._get_workflow_footer()
 
-        self.xml = self._assemble_xml()
+    @property
+    def xml(self) -> str:
+        """
+        The complete XML document
+        """
+        buffer = io.StringIO()
+        self._stream_xml(buffer)
+        return buffer.getvalue()
+
+    @property
+    def graph(self) -> WorkflowGraph:
+        """
+        The dependency graph of the workflow
+        """
+        graph = WorkflowGraph()
+        graph.add_xml(self.cycledefs)
+        for task in iter_wf_tasks(self._app_config):
+            graph.add_xml(task)
+        return graph
 
     @staticmethod
     def _get_preamble():
@@ -111,22 +130,26 @@ class RocotoXML(ABC):
 
         return '\n</workflow>\n'
 
-    def _assemble_xml(self) -> str:
+    def _stream_xml(self, fh: TextIO, profiler: TaskProfiler = None) -> None:
+        """
+        Write the XML document to a file object, generating the tasks one at a time
+        """
 
-        strings = [self.preamble,
-                   self.definitions,
-                   self.header,
-                   self.cycledefs,
-                   self.tasks,
-                   self.footer]
+        for string in [self.preamble, self.definitions, self.header, self.cycledefs]:
+            fh.write(string)
 
-        return ''.join(strings)
+        for ii, task in enumerate(iter_wf_tasks(self._app_config, profiler)):
+            if ii > 0:
+                fh.write('\n')
+            fh.write(task)
 
-    def write(self, xml_file: str = None, crontab_file: str = None):
-        self._write_xml(xml_file=xml_file)
+        fh.write(self.footer)
+
+    def write(self, xml_file: str = None, crontab_file: str = None, profiler: TaskProfiler = None):
+        self._write_xml(xml_file=xml_file, profiler=profiler)
         self._write_crontab(crontab_file=crontab_file)
 
-    def _write_xml(self, xml_file: str = None) -> None:
+    def _write_xml(self, xml_file: str = None, profiler: TaskProfiler = None) -> None:
 
         expdir = self._base['EXPDIR']
         pslot = self._base['PSLOT']
@@ -134,8 +157,19 @@ class RocotoXML(ABC):
         if xml_file is None:
             xml_file = f"{expdir}/{pslot}.xml"
 
-        with open(xml_file, 'w') as fh:
-            fh.write(self.xml)
+        # Stream to a temporary file so a failing task does not leave a partial XML behind
+        start = time.perf_counter()
+        tmp_file = f"{xml_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w') as fh:
+                self._stream_xml(fh, profiler)
+            os.replace(tmp_file, xml_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+        if profiler is not None:
+            profiler.add_phase('Write XML', time.perf_counter() - start)
 
     def _write_crontab(self, crontab_file: str = None, cronint: int = 5) -> None:
         """
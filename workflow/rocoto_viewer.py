@@ -45,6 +45,7 @@ from datetime import datetime, timedelta
 import re
 import traceback
 import pickle
+import hashlib
 
 import sqlite3
 import collections
@@ -115,6 +116,9 @@ rzdm_path = ''
 only_check_point = False
 save_checkfile_path = None
 use_multiprocessing = True
+exporter_address = None
+exporter_interval = 60
+exporter_cycles = 5
 get_user = getpass.getuser()
 
 rocotoboot = None
@@ -321,9 +325,12 @@ def sigwinch_handler(signum, frame):
 
 
 def usage(message=None):
-    curses.endwin()
+    try:
+        curses.endwin()
+    except curses.error:
+        pass  # curses was never started, e.g. in exporter mode
     eprint('''
-Usage: rocoto_status_viewer.py  -w workflow.xml -d database.db [--listtasks] [--html=filename.html]
+Usage: rocoto_status_viewer.py  -w workflow.xml -d database.db [--listtasks] [--html=filename.html] [--exporter=[host:]port]
 
 Mandatory arguments:
   -w workflow.xml
@@ -331,6 +338,11 @@ Mandatory arguments:
 Optional arguments:
   --listtasks             --- print out a list of all tasks
   --html=filename.html    --- creates an HTML document of status
+  --exporter=[host:]port  --- run headless, serving the status as JSON (/status.json)
+                              and in Prometheus text format (/metrics)
+  --interval=seconds      --- refresh interval of the exporter (default 60)
+  --exporter-cycles=N     --- number of completed cycles with per-task metrics in /metrics,
+                              besides the active cycles (default 5)
   --help                  --- print this usage message''')
 
     if message is not None:
@@ -338,27 +350,73 @@ Optional arguments:
     sys.exit(-1)
 
 
+# Jobs still in these states have performance metrics that change between polls
+active_job_states = ('SUBMITTING', 'QUEUED', 'RUNNING')
+
+
 def augment_SQLite3(filename):
+    """
+    Add the persistent jobs_perf side table of performance metrics to the Rocoto database,
+    and the jobs_augment view joining it to the jobs table.
+    """
     connection = sqlite3.connect(filename)
     c = connection.cursor()
-    # qinfo=q = c.execute("DROP TABLE IF EXISTS jobs_augment;")
-    c.execute("PRAGMA table_info(jobs_augment)").fetchall()
-    if any('qtime' in element for element in qinfo):
+    qinfo = c.execute("SELECT type FROM sqlite_master WHERE name='jobs_augment'").fetchall()
+    if qinfo == [('view',)]:
         c.close()
+        connection.close()
         return 'is_already_augmented'
-    else:
-        sql_create_augment_table = "CREATE TABLE jobs_augment AS SELECT * FROM jobs;"
-        c.execute(sql_create_augment_table)
-        c.execute("alter table jobs_augment add column qtime integer;")
-        c.execute("alter table jobs_augment add column cputime integer;")
-        c.execute("alter table jobs_augment add column runtime integer;")
-        c.execute("alter table jobs_augment add column slots integer;")
-        connection.commit()
 
+    with connection:
+        # jobs_augment used to be a full copy of the jobs table
+        c.execute("DROP TABLE IF EXISTS jobs_augment;")
+        c.execute("DROP TABLE IF EXISTS jobs_augment_tmp;")
+        c.execute("CREATE TABLE IF NOT EXISTS jobs_perf (jobid TEXT PRIMARY KEY, state TEXT, "
+                  "qtime integer, cputime integer, runtime integer, slots integer);")
+        c.execute("CREATE VIEW jobs_augment AS SELECT jobs.*, jobs_perf.qtime, jobs_perf.cputime, "
+                  "jobs_perf.runtime, jobs_perf.slots FROM jobs LEFT JOIN jobs_perf "
+                  "ON jobs_perf.jobid = CAST(jobs.jobid AS TEXT);")
     c.close()
+    connection.close()
     return 'now_augmented'
 
 
+def update_perf_values(database_file, aug_perf):
+    """
+    Refresh the jobs_perf side table with the metrics from the scheduler.
+
+    Only jobs that are new, whose state changed since the last poll, or that are
+    still active are refreshed, with parameterized upserts in one transaction.
+    """
+    connection = sqlite3.connect(database_file)
+    c = connection.cursor()
+    placeholders = ','.join('?' * len(active_job_states))
+    changed_jobs = c.execute("SELECT CAST(jobs.jobid AS TEXT), jobs.state FROM jobs LEFT JOIN jobs_perf "
+                             "ON jobs_perf.jobid = CAST(jobs.jobid AS TEXT) "
+                             "WHERE jobs.jobid IS NOT NULL AND (jobs_perf.jobid IS NULL "
+                             f"OR jobs_perf.state IS NOT jobs.state OR jobs.state IN ({placeholders}))",
+                             active_job_states).fetchall()
+
+    column_updates = ('qtime', 'cputime', 'runtime', 'slots')
+    with_perf = []
+    state_only = []
+    for jobid, state in changed_jobs:
+        perf_values = aug_perf.get(jobid) if aug_perf else None
+        if perf_values:
+            with_perf.append((jobid, state) + tuple(perf_values.get(column) for column in column_updates))
+        else:
+            # The scheduler no longer reports the job, keep any metrics already recorded
+            state_only.append((jobid, state))
+
+    with connection:
+        c.executemany("INSERT OR REPLACE INTO jobs_perf (jobid, state, qtime, cputime, runtime, slots) "
+                      "VALUES (?, ?, ?, ?, ?, ?)", with_perf)
+        c.executemany("INSERT OR IGNORE INTO jobs_perf (jobid, state) VALUES (?, ?)", state_only)
+        c.executemany("UPDATE jobs_perf SET state = ? WHERE jobid = ?", [(state, jobid) for jobid, state in state_only])
+    c.close()
+    connection.close()
+
+
 def isSQLite3(filename):
     try:
         file = open(filename, 'rb')
@@ -388,7 +446,8 @@ def isRocotoWorkflow(filename):
 
 def get_arguments():
     short_opts = "w:d:f:"
-    long_opts = ["checkfile=", "workfolw=", "database=", "html=", "listtasks", "onlycheckpoint", "help", "perfmetrics="]
+    long_opts = ["checkfile=", "workfolw=", "database=", "html=", "listtasks", "onlycheckpoint", "help", "perfmetrics=",
+                 "exporter=", "interval=", "exporter-cycles="]
     try:
         opts, args = getopt.getopt(sys.argv[1:], short_opts, long_opts)
     except getopt.GetoptError as err:
@@ -423,6 +482,15 @@ def get_arguments():
             send_html_to_rzdm = True
             rzdm_path = v
             html_output = True
+        elif k == '--exporter':
+            global exporter_address
+            exporter_address = v
+        elif k == '--exporter-cycles':
+            global exporter_cycles
+            exporter_cycles = int(v)
+        elif k in ('--interval'):
+            global exporter_interval
+            exporter_interval = float(v)
         elif k in ('--help'):
             usage('')
         else:
@@ -494,14 +562,18 @@ def timedelta_total_seconds(timedelta):
 
 def get_aug_perf_values(username):
     global html_ouput
-    global format_keys
     try:
         which_bjobs = syscall(['which', 'bjobs'])
     except Exception:
         return None
+    bjobs_line = syscall([which_bjobs, '-a', '-o', format_string, '-u', username])
+    return parse_aug_perf_values(bjobs_line)
+
+
+def parse_aug_perf_values(bjobs_line):
+    global format_keys
     bjobs = collections.defaultdict(dict)
     aug_perf = collections.defaultdict(dict)
-    bjobs_line = syscall([which_bjobs, '-a', '-o', format_string, '-u', username])
     if 'No job found' in bjobs_line:
         return None
     bjobs_lines = bjobs_line.split('\n')
@@ -831,16 +903,6 @@ def list_selector(screen, selected_strings, strings):
     return strings_selected
 
 
-def get_rocoto_check(params, queue_check):
-    workflow_file, database_file, task, cycle, process = params
-    check = syscall([rocotocheck, '-v', "10", '-w', workflow_file, '-d', database_file, '-c', cycle, '-t', task])
-    if check is None:
-        curses.endwin()
-        print(f'rocotocheck failed: {stat}')
-        sys.exit(-1)
-    queue_check.put(check)
-
-
 def rocoto_boot(params):
     workflow_file, database_file, cycle, metatask_list, task_list = params
     stat = syscall([rocotoboot, '--workflow', workflow_file, '--database', database_file, '--cycles', cycle, '--tasks', task_list])
@@ -867,6 +929,124 @@ def rocoto_run(params):
     return stat
 
 
+class CycleDefSet:
+    """
+    Cycles of a cycledef group, stored as (start, end, increment) ranges.
+
+    Membership is answered arithmetically from the ranges instead of by scanning
+    the list of every cycle of the experiment.  Cycles are given as YYYYMMDDHHMM
+    strings or datetimes.
+    """
+
+    def __init__(self):
+        self.ranges = []
+
+    def add(self, start, end, step=None, months=None):
+        """Add the cycles from start to end (inclusive), every step (timedelta) or every months months"""
+        self.ranges.append((start, end, step, months))
+
+    def __contains__(self, cycle):
+        if not isinstance(cycle, datetime):
+            try:
+                cycle = datetime.strptime(cycle, '%Y%m%d%H%M')
+            except (TypeError, ValueError):
+                return False
+        for start, end, step, months in self.ranges:
+            if not start <= cycle <= end:
+                continue
+            if months:
+                nmonths = (cycle.year - start.year) * 12 + cycle.month - start.month
+                if nmonths % months == 0 and start + relativedelta(months=+nmonths) == cycle:
+                    return True
+            elif step:
+                if (cycle - start) % step == timedelta(0):
+                    return True
+            elif cycle == start:
+                return True
+        return False
+
+    def __iter__(self):
+        cycles = set()
+        for start, end, step, months in self.ranges:
+            cycle, n = start, 0
+            while cycle <= end:
+                cycles.add(cycle)
+                if not (step or months):
+                    break
+                n += 1
+                cycle = start + (relativedelta(months=+n * months) if months else n * step)
+        return iter(sorted(cycle.strftime('%Y%m%d%H%M') for cycle in cycles))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        return isinstance(other, CycleDefSet) and self.ranges == other.ranges
+
+
+def tasklist_cache_path(workflow_file):
+    """
+    Path of the cached task index of a workflow, under the user's cache directory
+    """
+    cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'rocoto_viewer')
+    workflow_hash = hashlib.sha1(os.path.abspath(workflow_file).encode()).hexdigest()
+    return os.path.join(cache_dir, f'{workflow_hash}.pickle')
+
+
+def load_tasklist(workflow_file):
+    """
+    Return the task index (tasks_ordered, metatask_list, cycledef_group_cycles) of a workflow,
+    from the cache if the workflow XML has not changed since it was cached.
+
+    The cache is keyed by the XML's modification time and size, and falls back to a hash of
+    its contents when only the modification time changed (e.g. the XML was regenerated
+    identically), so the XML is only parsed when it actually changes.
+    """
+    if list_tasks:
+        return get_tasklist(workflow_file)
+
+    cache_file = tasklist_cache_path(workflow_file)
+    stat = os.stat(workflow_file)
+    cached = None
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+    except Exception:
+        pass
+
+    key = (PACKAGE, stat.st_size)
+    if cached is not None and cached['key'] == key:
+        if cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['tasklist']
+        with open(workflow_file, 'rb') as f:
+            xml_hash = hashlib.sha1(f.read()).hexdigest()
+        if cached['hash'] == xml_hash:
+            cached['mtime_ns'] = stat.st_mtime_ns
+            save_tasklist(cache_file, cached)
+            return cached['tasklist']
+    else:
+        with open(workflow_file, 'rb') as f:
+            xml_hash = hashlib.sha1(f.read()).hexdigest()
+
+    tasklist = get_tasklist(workflow_file)
+    save_tasklist(cache_file, {'key': key, 'mtime_ns': stat.st_mtime_ns, 'hash': xml_hash, 'tasklist': tasklist})
+    return tasklist
+
+
+def save_tasklist(cache_file, cached):
+    """
+    Write the cached task index, ignoring any error (the cache is only an optimization)
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(cached, f)
+        os.replace(tmp_file, cache_file)
+    except Exception:
+        pass
+
+
 def get_tasklist(workflow_file):
     tasks_ordered = []
     metatask_list = collections.defaultdict(list)
@@ -890,7 +1070,7 @@ def get_tasklist(workflow_file):
             raise
 
     root = tree.getroot()
-    cycledef_group_cycles = collections.defaultdict(list)
+    cycledef_group_cycles = collections.defaultdict(CycleDefSet)
     if list_tasks:
         curses.endwin()
         print()
@@ -920,24 +1100,21 @@ def get_tasklist(workflow_file):
                 end_cycle = datetime.strptime(cycle_string[1], '%Y%m%d%H%M')
                 inc_cycle = string_to_timedelta(cycle_string[2])
 
-            while start_cycle <= end_cycle:
-                cycledef_group_cycles[cycle_def_name].append(start_cycle.strftime("%Y%m%d%H%M"))
-                if PACKAGE.lower() == 'ugcs' and ucgs_is_cron:
-                    try:
-                        start_cycle = start_cycle + relativedelta(months=+inc_cycle)
-                    except AttributeError:
-                        curses.endwin()
-                        eprint("""
-                            Could not handle cycle increment measured in months because dateutil
-                            could not be imported. In order to read this workflow, install dateutil
-                            using pip:
+            if PACKAGE.lower() == 'ugcs' and ucgs_is_cron and 'relativedelta' not in globals():
+                curses.endwin()
+                eprint("""
+                    Could not handle cycle increment measured in months because dateutil
+                    could not be imported. In order to read this workflow, install dateutil
+                    using pip:
 
-                            > pip install python-dateutil --user
+                    > pip install python-dateutil --user
 
-                            """)
-                        sys.exit(-1)
-                else:
-                    start_cycle = start_cycle + inc_cycle
+                    """)
+                sys.exit(-1)
+            if PACKAGE.lower() == 'ugcs' and ucgs_is_cron:
+                cycledef_group_cycles[cycle_def_name].add(start_cycle, end_cycle, months=inc_cycle)
+            else:
+                cycledef_group_cycles[cycle_def_name].add(start_cycle, end_cycle, step=inc_cycle)
         if child.tag == 'task':
             task_name = child.attrib['name']
             log_file = child.find('join').find('cyclestr').text.replace('@Y@m@d@H', 'CYCLE')
@@ -1022,163 +1199,182 @@ def get_tasklist(workflow_file):
     return tasks_ordered, metatask_list, cycledef_group_cycles
 
 
-def get_rocoto_stat(params, queue_stat):
-    workflow_file, database_file, tasks_ordered, metatask_list, cycledef_group_cycles = params
+class RocotoStatusEngine:
+    """
+    Incremental reader of the Rocoto database for the viewer.
+
+    The status lines of every cycle are kept between refreshes.  Each poll reads
+    the (small) cycles table, and then only the jobs of cycles that can have
+    changed: new cycles, cycles that are not done or whose done state changed,
+    and cycles with jobs newer than the last job id seen.  Jobs of completed
+    cycles are never read again, and only the lines of changed cycles are
+    rebuilt, so the cost of a refresh follows the amount of change rather than
+    the length of the experiment.
+
+    poll() only reads the database and returns the changes, and apply() merges
+    them, so a poll can run in a separate process and send back just the changes.
+    """
 
-    global database_file_agmented
-    if len(tasks_ordered) == 0 or len(metatask_list) == 0 or len(cycledef_group_cycles) == 0 or list_tasks:
-        tasks_ordered, metatask_list, cycledef_group_cycles = get_tasklist(workflow_file)
+    # Number of cycles per 'IN (...)' query, below the SQLite host parameter limit
+    max_query_cycles = 500
 
-    if use_performance_metrics:
-        aug_perf = get_aug_perf_values(get_user)
-    else:
-        aug_perf = None
+    def __init__(self):
+        self.last_job_id = 0
+        self.cycle_done = {}
+        self.cycle_jobs = {}
+        self.cycle_lines = {}
+        self.tasks_ordered = None
+        self.cycledef_group_cycles = None
 
-    info = collections.defaultdict(list)
-    cycles = set()
+    def _job_columns(self):
+        if use_performance_metrics:
+            return 'jobs_augment', 'id,jobid,taskname,cycle,state,exit_status,duration,tries,qtime,cputime,runtime,slots'
+        return 'jobs', 'id,jobid,taskname,cycle,state,exit_status,duration,tries'
 
-    connection = sqlite3.connect(database_file)
-    c = connection.cursor()
+    @staticmethod
+    def _job_line(row):
+        row = tuple('-' if x is None else x for x in row)
+        if use_performance_metrics:
+            (theid, jobid, taskname, cycle, state, exit_status, duration, tries, qtime, cputime, runtime, slots) = row
+            return (f"{datetime.fromtimestamp(cycle).strftime('%Y%m%d%H%M')} "
+                    f"{taskname} {str(jobid)} {str(state)} {str(exit_status)} "
+                    f"{str(tries)} {str(duration).split('.')[0]} {str(slots)} "
+                    f"{str(qtime)} {str(cputime).split('.')[0]} {str(runtime)}")
+        (theid, jobid, taskname, cycle, state, exit_status, duration, tries) = row
+        return (f"{datetime.fromtimestamp(cycle).strftime('%Y%m%d%H%M')} "
+                f"{taskname} {str(jobid)} {str(state)} {str(exit_status)} "
+                f"{str(tries)} {str(duration).split('.')[0]}")
+
+    def poll(self, database_file):
+        """
+        Read what changed in the database since the last applied poll.
+
+        Returns
+        -------
+        dict
+            'done': done state of every cycle, 'jobs': job row of each task for
+            every re-read cycle, and 'last_job_id': the largest job id read
+        """
+        connection = sqlite3.connect(database_file)
+        c = connection.cursor()
+        table, columns = self._job_columns()
+
+        cycle_done = dict(c.execute('SELECT cycle,done FROM cycles'))
+        last_job_id = c.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0] or 0
+
+        if not self.cycle_done:
+            read_cycles = None  # first poll, read every job
+        else:
+            read_cycles = {cycle for cycle, done in cycle_done.items()
+                           if not done or self.cycle_done.get(cycle) != done}
+            read_cycles.update(row[0] for row in c.execute(f'SELECT DISTINCT cycle FROM {table} WHERE id > ?',
+                                                           (self.last_job_id,)))
+
+        rows = []
+        if read_cycles is None:
+            rows = c.execute(f'SELECT {columns} FROM {table} ORDER BY id').fetchall()
+        else:
+            read_cycles = sorted(read_cycles)
+            for i in range(0, len(read_cycles), self.max_query_cycles):
+                chunk = read_cycles[i:i + self.max_query_cycles]
+                rows += c.execute(f"SELECT {columns} FROM {table} WHERE cycle IN ({','.join('?' * len(chunk))})",
+                                  chunk).fetchall()
+            rows.sort(key=lambda row: row[0])
+        c.close()
+        connection.close()
 
-    if use_performance_metrics:
-        c.execute("DROP TABLE IF EXISTS jobs_augment_tmp;")
-        sql_create_augment_table = "CREATE TABLE jobs_augment_tmp AS SELECT * FROM jobs;"
-        c.execute(sql_create_augment_table)
-        c.execute("alter table jobs_augment_tmp add column qtime integer;")
-        c.execute("alter table jobs_augment_tmp add column cputime integer;")
-        c.execute("alter table jobs_augment_tmp add column runtime integer;")
-        c.execute("alter table jobs_augment_tmp add column slots integer;")
-
-        sq_command = ''
-        column_updates = ('qtime', 'cputime', 'runtime', 'slots')
-        for column in column_updates:
-            sq_command += f"{column}=(SELECT jobs_augment.{column} FROM jobs_augment WHERE jobs_augment.id=jobs_augment_tmp.id)" + ','
-        sq_command = ';'.join(sq_command.rsplit(',', 1))
-        sq_command = 'UPDATE jobs_augment_tmp SET ' + sq_command
-        c.execute(sq_command)
-
-        sq_command = 'UPDATE jobs_augment_tmp SET'
-        for perf_jobid, perf_values in aug_perf.items():
-            for name, each_value in perf_values.items():
-                c.execute(f"{sq_command} {name} = '{each_value}' WHERE jobs_augment_tmp.jobid = {perf_jobid}")
+        jobs = {} if read_cycles is None else {cycle: {} for cycle in read_cycles}
+        for row in rows:
+            taskname, cycle, jobid = row[2], row[3], row[1]
+            if jobid is None:
+                continue
+            # Keep the first job of each task in a cycle
+            jobs.setdefault(cycle, {}).setdefault(taskname, row)
+
+        return {'done': cycle_done, 'jobs': jobs, 'last_job_id': last_job_id}
+
+    def apply(self, delta, tasks_ordered, cycledef_group_cycles):
+        """
+        Merge the changes returned by poll() and rebuild the lines of the changed cycles.
+
+        Returns
+        -------
+        set
+            Cycles that were added, changed, or removed
+        """
+        rebuild_all = False
+        if tasks_ordered != self.tasks_ordered or cycledef_group_cycles != self.cycledef_group_cycles:
+            self.tasks_ordered = list(tasks_ordered)
+            self.cycledef_group_cycles = dict(cycledef_group_cycles)
+            rebuild_all = True
+
+        changed = set(delta['jobs'])
+        for cycle in list(self.cycle_done):
+            if cycle not in delta['done']:
+                self.cycle_jobs.pop(cycle, None)
+                self.cycle_lines.pop(cycle, None)
+                changed.add(cycle)
+        changed.update(cycle for cycle, done in delta['done'].items() if self.cycle_done.get(cycle, -1) != done)
+        self.cycle_done = dict(delta['done'])
+        self.last_job_id = delta['last_job_id']
+        for cycle, jobs in delta['jobs'].items():
+            self.cycle_jobs[cycle] = jobs
+
+        if rebuild_all:
+            changed = set(self.cycle_done)
+        for cycle in changed:
+            if cycle in self.cycle_done:
+                self.cycle_lines[cycle] = self._cycle_lines(cycle)
+        return changed
+
+    def _in_cycledefs(self, cycle_time, task_cycledefs):
+        for name in task_cycledefs.split(','):
+            cycles = self.cycledef_group_cycles.get(name, ())
+            # Checkpoint files from older versions hold plain lists of cycle strings
+            if (cycle_time if isinstance(cycles, CycleDefSet) else cycle_time.strftime('%Y%m%d%H%M')) in cycles:
+                return True
+        return False
 
-        c.execute("DROP TABLE IF EXISTS jobs_augment;")
-        c.execute("ALTER TABLE jobs_augment_tmp RENAME TO jobs_augment;")
+    def cycle_tasks(self, cycle):
+        """
+        Tasks that run in a cycle, in workflow order, with their job row (None if not submitted yet)
+        """
+        jobs = self.cycle_jobs.get(cycle, {})
+        cycle_time = datetime.fromtimestamp(cycle)
+        return [(task[0], jobs.get(task[0])) for task in self.tasks_ordered if self._in_cycledefs(cycle_time, task[1])]
 
-    cycledifitions = []
-    q = c.execute('SELECT id, groupname, cycledef FROM cycledef')
-    for row in q:
-        (theid, groupname, cycledef) = row
-        cycledifitions.append((theid, groupname, cycledef))
+    def _cycle_lines(self, cycle):
+        """
+        Status lines of a cycle, one per task that runs in it, in workflow order
+        """
+        cycle_string = datetime.fromtimestamp(cycle).strftime('%Y%m%d%H%M')
+        return [self._job_line(row) if row is not None else cycle_string + ' ' * 7 + taskname + ' - - - - -'
+                for taskname, row in self.cycle_tasks(cycle)]
 
-    cycle_done_stat = dict()
-    q = c.execute('SELECT id,cycle,done FROM cycles')
-    for row in q:
-        (theid, cycle, done) = row
-        cycles.add(cycle)
-        cycle_done_stat[cycle] = done
+    def rocoto_stat(self):
+        """
+        Status lines of every cycle that has any, ordered by cycle
+        """
+        return [self.cycle_lines[cycle] for cycle in sorted(self.cycle_lines) if len(self.cycle_lines[cycle]) != 0]
 
-    if use_performance_metrics:
-        q = c.execute('SELECT id,jobid,taskname,cycle,state,exit_status,duration,tries,qtime,cputime,runtime,slots FROM jobs_augment')
-    else:
-        q = c.execute('SELECT id,jobid,taskname,cycle,state,exit_status,duration,tries FROM jobs')
 
-    q_get = []
-    entered_jobids = []
-    last_task_index = 0
-    for row in q:
-        row = tuple('-' if x is None else x for x in row)
-        if use_performance_metrics:
-            (theid, jobid, taskname, cycle, state, exit_status, duration, tries, qtime, cputime, runtime, slots) = row
-        else:
-            (theid, jobid, taskname, cycle, state, exit_status, duration, tries, ) = row
-        if jobid in entered_jobids:
-            continue
-        else:
-            if taskname in tasks_ordered:
-                task_index = [x[0] for x in task_ordered].index(taskname)
-                last_task_index = task_index
-            else:
-                task_index = last_task_index
+status_engine = RocotoStatusEngine()
 
-            if use_performance_metrics:
-                q_get.append((theid, jobid, task_index, taskname, cycle, state, exit_status, duration, tries, qtime, cputime, runtime, slots))
-            else:
-                q_get.append((theid, jobid, task_index, taskname, cycle, state, exit_status, duration, tries))
-        entered_jobids.append(jobid)
 
-    q_get.sort(key=lambda x: x[2])
+def get_rocoto_stat(params, queue_stat):
+    workflow_file, database_file, tasks_ordered, metatask_list, cycledef_group_cycles = params
 
-    connection.commit()
-    c.close()
+    global database_file_agmented
+    if len(tasks_ordered) == 0 or len(metatask_list) == 0 or len(cycledef_group_cycles) == 0 or list_tasks:
+        tasks_ordered, metatask_list, cycledef_group_cycles = load_tasklist(workflow_file)
 
-    for row in q_get:
-        if use_performance_metrics:
-            (theid, jobid, task_order, taskname, cycle, state, exit_status, duration, tries, qtime, cputime, runtime, slots) = row
-        else:
-            (theid, jobid, task_order, taskname, cycle, state, exit_status, duration, tries) = row
-        if jobid != '-':
-            if use_performance_metrics:
-                line = (f"{datetime.fromtimestamp(cycle).strftime('%Y%m%d%H%M')} "
-                        f"{taskname} {str(jobid)} {str(state)} {str(exit_status)} "
-                        f"{str(tries)} {str(duration).split('.')[0]} {str(slots)} "
-                        f"{str(qtime)} {str(cputime).split('.')[0]} {str(runtime)}")
-            else:
-                line = (f"{datetime.fromtimestamp(cycle).strftime('%Y%m%d%H%M')} "
-                        f"{taskname} {str(jobid)} {str(state)} {str(exit_status)} "
-                        f"{str(tries)} {str(duration).split('.')[0]}")
-            info[cycle].append(line)
-
-    for every_cycle in cycles:
-        if len(info[every_cycle]) == 0:
-            info[every_cycle].append('place holder')
-
-    new_info = collections.defaultdict(list)
-    job_ids = []
-    job_id = ''
-    for each_cycle, lines_in_cycle in info.items():
-        for task in tasks_ordered:
-            skip_task = False
-            for each_line in lines_in_cycle:
-                if task[0] == each_line.split()[1]:
-                    job_id = each_line.split()[2]
-                    if job_id in job_ids:
-                        break
-                    cycle_string = datetime.fromtimestamp(each_cycle).strftime('%Y%m%d%H%M')
-                    cycledefs = task[1].split(',')
-                    if len(cycledefs) > 1:
-                        for each_cycledef in cycledefs:
-                            if cycle_string in cycledef_group_cycles[each_cycledef]:
-                                new_info[each_cycle].append(each_line)
-                                job_ids.append(job_id)
-                                skip_task = True
-                                break
-                    elif cycle_string in cycledef_group_cycles[task[1]]:
-                        new_info[each_cycle].append(each_line)
-                        job_ids.append(job_id)
-                        skip_task = True
-                        break
-            if skip_task:
-                continue
-            line = datetime.fromtimestamp(each_cycle).strftime('%Y%m%d%H%M') + ' ' * 7 + task[0] + ' - - - - -'
-            cycle_string = datetime.fromtimestamp(each_cycle).strftime('%Y%m%d%H%M')
-            cycledefs = task[1].split(',')
-            if len(cycledefs) > 1:
-                for each_cycledef in cycledefs:
-                    if cycle_string in cycledef_group_cycles[each_cycledef]:
-                        new_info[each_cycle].append(line)
-                        skip_task = True
-                        break
-            elif cycle_string in cycledef_group_cycles[task[1]]:
-                new_info[each_cycle].append(line)
-                skip_task = True
-            if skip_task:
-                continue
+    if use_performance_metrics:
+        aug_perf = get_aug_perf_values(get_user)
+        update_perf_values(database_file, aug_perf)
 
-    rocoto_stat = []
-    for cycle in sorted(cycles):
-        if len(new_info[cycle]) != 0:
-            rocoto_stat.append(new_info[cycle])
+    delta = status_engine.poll(database_file)
+    status_engine.apply(delta, tasks_ordered, cycledef_group_cycles)
+    rocoto_stat = status_engine.rocoto_stat()
 
     if save_checkfile_path is not None:
         stat_update_time = str(datetime.now()).rsplit(':', 1)[0]
@@ -1189,11 +1385,428 @@ def get_rocoto_stat(params, queue_stat):
             sys.exit(0)
 
     if use_multiprocessing:
-        queue_stat.put((rocoto_stat, tasks_ordered, metatask_list, cycledef_group_cycles))
+        # Only the changes go back to the viewer, which applies them to its own status engine
+        queue_stat.put((delta, tasks_ordered, metatask_list, cycledef_group_cycles))
     else:
         return (rocoto_stat, tasks_ordered, metatask_list, cycledef_group_cycles)
 
 
+def receive_rocoto_stat(rocoto_stat_delta):
+    """
+    Apply the changes sent back by a get_rocoto_stat process to the viewer's status engine
+    and return the same tuple get_rocoto_stat returns when run in the viewer process.
+    """
+    delta, tasks_ordered, metatask_list, cycledef_group_cycles = rocoto_stat_delta
+    status_engine.apply(delta, tasks_ordered, cycledef_group_cycles)
+    return (status_engine.rocoto_stat(), tasks_ordered, metatask_list, cycledef_group_cycles)
+
+
+class PollerRequest:
+    """
+    Handle of a request running on the AsyncPoller.
+
+    It has the is_alive/join/terminate methods of the multiprocessing.Process
+    objects the viewer used before, so the main loop handles both the same way.
+    """
+
+    def __init__(self, future):
+        self.future = future
+
+    def is_alive(self):
+        return not self.future.done()
+
+    def join(self, timeout=None):
+        try:
+            self.future.exception(timeout=timeout)
+        except Exception:
+            pass
+
+    def terminate(self):
+        self.future.cancel()
+
+
+class AsyncPoller:
+    """
+    Run the database reads, scheduler queries and rocoto commands of the viewer
+    on an asyncio event loop in a background thread, so the curses UI never
+    blocks on them.
+
+    Results are put on the same queues the UI already polls: the status changes
+    (see receive_rocoto_stat) and the rocotocheck output.  Slow commands are
+    given timeouts, and failed status reads are retried with an exponential
+    backoff.  Once max_stat_retries reads in a row have failed, the error is
+    kept in stat_error for the viewer to show until a read succeeds.  The scheduler (bjobs) output is cached in a file next to the
+    database for scheduler_cache_ttl seconds, and refreshed under a file lock,
+    so several viewers of the same experiment query the scheduler at most once
+    per interval between them.
+    """
+
+    command_timeout = 300
+    scheduler_timeout = 60
+    scheduler_cache_ttl = 60
+    max_backoff = 15 * 60
+    max_stat_retries = 5
+
+    def __init__(self):
+        import asyncio
+        import threading
+        self.asyncio = asyncio
+        self.loop = asyncio.new_event_loop()
+        self.scheduler_backoff = 0
+        self.scheduler_retry_time = 0
+        self.stat_error = None
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def _submit(self, coroutine):
+        return PollerRequest(self.asyncio.run_coroutine_threadsafe(coroutine, self.loop))
+
+    def request_stat(self, params, queue_stat):
+        return self._submit(self._stat(params, queue_stat))
+
+    def request_check(self, params, queue_check):
+        return self._submit(self._check(params, queue_check))
+
+    async def _run_command(self, args, timeout):
+        process = await self.asyncio.create_subprocess_exec(*args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        try:
+            stdout, _ = await self.asyncio.wait_for(process.communicate(), timeout)
+        except self.asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, args, stdout)
+        return stdout.decode('utf-8', errors='replace').strip()
+
+    async def _check(self, params, queue_check):
+        workflow_file, database_file, task, cycle, process = params
+        args = [rocotocheck, '-v', "10", '-w', workflow_file, '-d', database_file, '-c', cycle, '-t', task]
+        try:
+            check = await self._run_command(args, self.command_timeout)
+        except self.asyncio.TimeoutError:
+            check = f'rocotocheck did not finish within {self.command_timeout} seconds'
+        except (OSError, subprocess.CalledProcessError) as err:
+            check = f'rocotocheck failed: {err}'
+        queue_check.put(check if check else 'rocotocheck returned no output')
+
+    async def _aug_perf_values(self, database_file, username):
+        """
+        Scheduler performance values, from the shared cache when it is fresh
+        """
+        import fcntl
+        if time() < self.scheduler_retry_time:
+            return None
+        cache_file = os.path.join(os.path.dirname(os.path.abspath(database_file)), f'.rocoto_viewer_bjobs_{username}')
+        try:
+            with open(cache_file + '.lock', 'a') as lock:
+                # Wait without blocking the event loop while another viewer queries the scheduler
+                waited = 0
+                while True:
+                    try:
+                        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if waited >= self.scheduler_timeout:
+                            raise self.asyncio.TimeoutError()
+                        await self.asyncio.sleep(1)
+                        waited += 1
+                try:
+                    if time() - os.path.getmtime(cache_file) < self.scheduler_cache_ttl:
+                        with open(cache_file) as f:
+                            return parse_aug_perf_values(f.read())
+                except OSError:
+                    pass
+                bjobs_line = await self._run_command(['bjobs', '-a', '-o', format_string, '-u', username],
+                                                     self.scheduler_timeout)
+                with open(cache_file + '.tmp', 'w') as f:
+                    f.write(bjobs_line)
+                os.replace(cache_file + '.tmp', cache_file)
+        except (OSError, self.asyncio.TimeoutError, subprocess.CalledProcessError):
+            # Back off from a slow or failing scheduler, the status is read without it meanwhile
+            self.scheduler_backoff = min(max(2 * self.scheduler_backoff, self.scheduler_timeout), self.max_backoff)
+            self.scheduler_retry_time = time() + self.scheduler_backoff
+            return None
+        self.scheduler_backoff = 0
+        return parse_aug_perf_values(bjobs_line)
+
+    async def _stat(self, params, queue_stat):
+        workflow_file, database_file, tasks_ordered, metatask_list, cycledef_group_cycles = params
+        loop = self.asyncio.get_running_loop()
+        backoff = 1
+        failures = 0
+        while True:
+            try:
+                reads = []
+                if len(tasks_ordered) == 0 or len(metatask_list) == 0 or len(cycledef_group_cycles) == 0:
+                    reads.append(loop.run_in_executor(None, load_tasklist, workflow_file))
+                if use_performance_metrics:
+                    reads.append(self._aug_perf_values(database_file, get_user))
+                results = await self.asyncio.gather(*reads)
+                if len(tasks_ordered) == 0 or len(metatask_list) == 0 or len(cycledef_group_cycles) == 0:
+                    tasks_ordered, metatask_list, cycledef_group_cycles = results.pop(0)
+                if use_performance_metrics:
+                    await loop.run_in_executor(None, update_perf_values, database_file, results.pop(0))
+                delta = await self.asyncio.wait_for(loop.run_in_executor(None, status_engine.poll, database_file),
+                                                    self.command_timeout)
+                break
+            except (sqlite3.Error, OSError, self.asyncio.TimeoutError) as err:
+                # e.g. the database is locked by rocotorun, or unreadable if it keeps failing
+                failures += 1
+                if failures >= self.max_stat_retries:
+                    self.stat_error = (f'Unable to read the rocoto status after {failures} attempts: '
+                                       f'{str(err) or type(err).__name__}')
+                await self.asyncio.sleep(backoff)
+                backoff = min(2 * backoff, self.max_backoff)
+        self.stat_error = None
+        queue_stat.put((delta, tasks_ordered, metatask_list, cycledef_group_cycles))
+
+
+poller = None
+
+
+def rocoto_stat_error():
+    """
+    Error of the status reads that keep failing on the AsyncPoller, None while they succeed
+    """
+    return poller.stat_error if poller is not None else None
+
+
+def start_rocoto_stat(params, queue_stat):
+    """
+    Start reading the rocoto status, returning a handle with the is_alive/join/terminate methods of a Process
+    """
+    global poller
+    if save_checkfile_path is None:
+        if poller is None:
+            poller = AsyncPoller()
+        return poller.request_stat(params, queue_stat)
+    process = Process(target=get_rocoto_stat, args=[params, queue_stat])
+    process.start()
+    return process
+
+
+def start_rocoto_check(params_check, queue_check):
+    """
+    Start a rocotocheck, returning a handle with the is_alive/join/terminate methods of a Process
+    """
+    global poller
+    if poller is None:
+        poller = AsyncPoller()
+    return poller.request_check(params_check, queue_check)
+
+
+class StatusExporter:
+    """
+    Headless exporter of the workflow status for dashboards.
+
+    The status engine of the viewer is refreshed every exporter_interval
+    seconds, and the per-cycle and per-task state, duration, queue time
+    (with performance metrics) and tries are rendered as JSON and in the
+    Prometheus text format.  Only the cycles that changed since the last
+    refresh are rendered again, and the documents are served from memory,
+    so polling the exporter costs nothing beyond the periodic database read.
+
+    To bound the number of Prometheus series, the per-cycle and per-task
+    metrics are only exported for the active cycles and the last
+    exported_done_cycles completed cycles; the job and cycle counts cover
+    all the cycles.
+
+    Once max_stat_retries refreshes in a row have failed, the error is
+    reported in the documents (and rocoto_status_up is 0) until a refresh
+    succeeds; the last status read is still served.
+    """
+
+    max_stat_retries = 5
+
+    # Prometheus metric of each numeric task field
+    task_metrics = (('rocoto_task_duration_seconds', 'duration'), ('rocoto_task_queue_seconds', 'qtime'),
+                    ('rocoto_task_tries', 'tries'), ('rocoto_task_exit_status', 'exit_status'))
+
+    def __init__(self, workflow_file, database_file, experiment, exported_done_cycles=5):
+        import threading
+        self.workflow_file = workflow_file
+        self.database_file = database_file
+        self.experiment = experiment
+        self.exported_done_cycles = exported_done_cycles
+        self.lock = threading.Lock()
+        self.cycle_records = {}
+        self.cycle_metrics = {}
+        self.updated = None
+        self.failures = 0
+        self.error = None
+        self.json_document = b'{}'
+        self.metrics_document = b''
+
+    @staticmethod
+    def _number(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _label(self, **labels):
+        labels = dict(experiment=self.experiment, **labels)
+        escaped = {k: str(v).replace('\\', '\\\\').replace('"', '\\"') for k, v in labels.items()}
+        return '{' + ','.join(f'{k}="{v}"' for k, v in escaped.items()) + '}'
+
+    def _render_cycle(self, cycle):
+        cycle_string = datetime.fromtimestamp(cycle).strftime('%Y%m%d%H%M')
+        done = bool(status_engine.cycle_done.get(cycle))
+        tasks = []
+        metrics = collections.defaultdict(list)
+        metrics['rocoto_cycle_done'].append(f'rocoto_cycle_done{self._label(cycle=cycle_string)} {int(done)}')
+        for taskname, row in status_engine.cycle_tasks(cycle):
+            record = {'task': taskname, 'jobid': None, 'state': None, 'exit_status': None,
+                      'tries': None, 'duration': None, 'qtime': None}
+            if row is not None:
+                record.update(jobid=row[1], state=row[4], exit_status=row[5], tries=row[7],
+                              duration=self._number(row[6]))
+                if use_performance_metrics:
+                    record['qtime'] = self._number(row[8])
+            tasks.append(record)
+
+            labels = dict(cycle=cycle_string, task=taskname)
+            metrics['rocoto_task_state'].append(
+                f'rocoto_task_state{self._label(state=record["state"] or "NOT_SUBMITTED", **labels)} 1')
+            for name, key in self.task_metrics:
+                value = self._number(record[key])
+                if value is not None:
+                    metrics[name].append(f'{name}{self._label(**labels)} {value:g}')
+        return {'cycle': cycle_string, 'done': done, 'tasks': tasks}, metrics
+
+    def refresh(self, tasks_ordered, metatask_list, cycledef_group_cycles):
+        """
+        Read the status changes and render the cycles that changed
+        """
+        if len(tasks_ordered) == 0 or len(cycledef_group_cycles) == 0:
+            tasks_ordered, metatask_list, cycledef_group_cycles = load_tasklist(self.workflow_file)
+        if use_performance_metrics:
+            update_perf_values(self.database_file, get_aug_perf_values(get_user))
+        delta = status_engine.poll(self.database_file)
+
+        with self.lock:
+            changed = status_engine.apply(delta, tasks_ordered, cycledef_group_cycles)
+            for cycle in changed:
+                if cycle in status_engine.cycle_done:
+                    self.cycle_records[cycle], self.cycle_metrics[cycle] = self._render_cycle(cycle)
+                else:
+                    self.cycle_records.pop(cycle, None)
+                    self.cycle_metrics.pop(cycle, None)
+            self.updated = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+            self.failures = 0
+            self.error = None
+            self._render_documents()
+
+        return tasks_ordered, metatask_list, cycledef_group_cycles
+
+    def refresh_failed(self, err):
+        """
+        Count a failed refresh, and report it once max_stat_retries refreshes in a row have failed
+        """
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.max_stat_retries:
+                self.error = f'Unable to read the rocoto status after {self.failures} attempts: {err}'
+                self._render_documents()
+
+    def _render_documents(self):
+        import json
+        cycles = [self.cycle_records[cycle] for cycle in sorted(self.cycle_records)]
+        state_counts = collections.Counter(task['state'] or 'NOT_SUBMITTED' for record in cycles for task in record['tasks'])
+        summary = {'cycles_total': len(cycles),
+                   'cycles_done': sum(1 for record in cycles if record['done']),
+                   'states': dict(state_counts)}
+        self.json_document = json.dumps({'experiment': self.experiment, 'updated': self.updated, 'error': self.error,
+                                         'summary': summary, 'cycles': cycles}).encode()
+
+        metrics = ['# TYPE rocoto_status_up gauge',
+                   f'rocoto_status_up{self._label()} {int(self.error is None)}',
+                   '# TYPE rocoto_cycles_total gauge',
+                   f'rocoto_cycles_total{self._label()} {summary["cycles_total"]}',
+                   '# TYPE rocoto_cycles_done gauge',
+                   f'rocoto_cycles_done{self._label()} {summary["cycles_done"]}',
+                   '# TYPE rocoto_jobs gauge']
+        metrics += [f'rocoto_jobs{self._label(state=state)} {count}' for state, count in sorted(state_counts.items())]
+
+        # Per-task series of the active cycles and the last completed ones only
+        done_cycles = sorted(cycle for cycle, record in self.cycle_records.items() if record['done'])
+        exported = set(self.cycle_records) - set(done_cycles)
+        if self.exported_done_cycles > 0:
+            exported.update(done_cycles[-self.exported_done_cycles:])
+        metrics += ['# TYPE rocoto_cycles_exported gauge',
+                    f'rocoto_cycles_exported{self._label()} {len(exported)}']
+        # Samples of a metric must be contiguous, so emit each metric across all cycles
+        for name in ['rocoto_cycle_done', 'rocoto_task_state'] + [name for name, _ in self.task_metrics]:
+            metrics.append(f'# TYPE {name} gauge')
+            for cycle in sorted(exported):
+                metrics += self.cycle_metrics[cycle].get(name, [])
+        self.metrics_document = ('\n'.join(metrics) + '\n').encode()
+
+    def serve(self, address, interval):
+        """
+        Serve /status.json and /metrics on address ([host:]port), refreshing every interval seconds
+        """
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                with exporter.lock:
+                    if path in ('/', '/status.json'):
+                        body, content_type = exporter.json_document, 'application/json'
+                    elif path == '/metrics':
+                        body, content_type = exporter.metrics_document, 'text/plain; version=0.0.4'
+                    else:
+                        body, content_type = None, None
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        host, _, port = address.rpartition(':')
+        server = ThreadingHTTPServer((host or '0.0.0.0', int(port)), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f'Serving the status of {self.experiment} on {host or "0.0.0.0"}:{port} (/status.json, /metrics)')
+
+        tasklist = ([], collections.defaultdict(list), collections.defaultdict(list))
+        while True:
+            try:
+                tasklist = self.refresh(*tasklist)
+            except (sqlite3.Error, OSError) as err:
+                # e.g. the database is locked by rocotorun, keep serving the last status
+                eprint(f'Unable to refresh the status: {err}')
+                self.refresh_failed(err)
+            std_time.sleep(interval)
+
+
+def run_exporter():
+    """
+    Run the viewer headless as a status exporter (--exporter)
+    """
+    global PSLOT
+    global PACKAGE
+    global entity_values
+    workflow_file, database_file = get_arguments()
+    entity_values = get_entity_values(workflow_file)
+    PSLOT = entity_values.get('PSLOT', 'no_name')
+    PACKAGE = entity_values.get('PACKAGE', 'none')
+    os.environ['TZ'] = 'UTC'
+    std_time.tzset()
+    if use_performance_metrics:
+        augment_SQLite3(database_file)
+    StatusExporter(workflow_file, database_file, PSLOT, exporter_cycles).serve(exporter_address, exporter_interval)
+
+
 def display_results(results, screen, params):
     results_lines = results.split('\n')
     num_lines, num_columns = (len(results_lines) + 3, len(max(results_lines, key=len)) + 1)
@@ -1384,8 +1997,9 @@ def main(screen):
     metatask_list = collections.defaultdict(list)
     cycledef_group_cycles = collections.defaultdict(list)
 
-    queue_stat = Queue()
-    queue_check = Queue()
+    # The status is read by a separate process only when writing a checkpoint file
+    queue_stat = Queue() if save_checkfile_path is not None else queue.Queue()
+    queue_check = queue.Queue()
 
     if only_check_point:
         curses.endwin()
@@ -1447,8 +2061,7 @@ def main(screen):
     if save_checkfile_path is None or (save_checkfile_path is not None and not os.path.isfile(save_checkfile_path)):
         params = (workflow_file, database_file, tasks_ordered, metatask_list, cycledef_group_cycles)
         if use_multiprocessing:
-            process_get_rocoto_stat = Process(target=get_rocoto_stat, args=[params, queue_stat])
-            process_get_rocoto_stat.start()
+            process_get_rocoto_stat = start_rocoto_stat(params, queue_stat)
             screen.addstr(mlines - 2, 0, 'No checkpoint file, must get rocoto stats please wait', curses.A_BOLD)
             screen.addstr(mlines - 1, 0, 'Running rocotostat ', curses.A_BOLD)
         else:
@@ -1481,6 +2094,9 @@ def main(screen):
                 i = (0 if i == len(dots) - 1 else i + 1)
                 curses.curs_set(0)
                 screen.addstr(mlines - 1, 19, dots[i], curses.A_BOLD)
+                stat_error = rocoto_stat_error()
+                if stat_error is not None:
+                    screen.addstr(mlines - 2, 0, stat_error[:mcols - 1].ljust(mcols - 1), curses.A_BOLD)
                 screen.refresh()
             try:
                 rocoto_stat_params = queue_stat.get_nowait()
@@ -1491,7 +2107,7 @@ def main(screen):
                     sys.exit(1)
 
             if len(rocoto_stat_params) != 0:
-                (rocoto_stat, tasks_ordered, metatask_list, cycledef_group_cycles) = rocoto_stat_params
+                (rocoto_stat, tasks_ordered, metatask_list, cycledef_group_cycles) = receive_rocoto_stat(rocoto_stat_params)
                 if use_multiprocessing:
                     process_get_rocoto_stat.join()
                     process_get_rocoto_stat.terminate()
@@ -2024,14 +2640,18 @@ def main(screen):
 
             if loading_stat:
                 dot_stat = (0 if dot_stat == len(dots) - 1 else dot_stat + 1)
-                screen.addstr(mlines - 2, 0, 'Running rocotostat ')
-                screen.addstr(mlines - 2, 20, dots[dot_stat])
+                stat_error = rocoto_stat_error()
+                if stat_error is not None:
+                    screen.addstr(mlines - 2, 0, stat_error[:100].ljust(100), curses.A_BOLD)
+                else:
+                    screen.addstr(mlines - 2, 0, 'Running rocotostat ')
+                    screen.addstr(mlines - 2, 20, dots[dot_stat])
                 try:
                     rocoto_stat_tmp = queue_stat.get_nowait()
                 except Exception:
                     rocoto_stat_tmp = ''
                 if len(rocoto_stat_tmp) != 0:
-                    (rocoto_stat, tasks_ordered, metatask_list, cycledef_group_cycles) = rocoto_stat_tmp
+                    (rocoto_stat, tasks_ordered, metatask_list, cycledef_group_cycles) = receive_rocoto_stat(rocoto_stat_tmp)
                     process_get_rocoto_stat.join()
                     process_get_rocoto_stat.terminate()
                     update_pad = True
@@ -2227,8 +2847,7 @@ def main(screen):
                     screen.addstr(mlines - 2, loc, 'Running rocotocheck ')
                     screen.refresh()
                     params_check = (workflow_file, database_file, execute_task, execute_cycle, 'check')
-                    process_get_rocoto_check = Process(target=get_rocoto_check, args=[params_check, queue_check])
-                    process_get_rocoto_check.start()
+                    process_get_rocoto_check = start_rocoto_check(params_check, queue_check)
                     current_check_time = time()
                     loading_check = True
             elif event == ord('f'):
@@ -2474,8 +3093,7 @@ def main(screen):
                     loading_stat = True
                     screen.addstr(mlines - 2, 0, 'Running rocotostat                                        ')
                     params = (workflow_file, database_file, tasks_ordered, metatask_list, cycledef_group_cycles)
-                    process_get_rocoto_stat = Process(target=get_rocoto_stat, args=[params, queue_stat])
-                    process_get_rocoto_stat.start()
+                    process_get_rocoto_stat = start_rocoto_stat(params, queue_stat)
 
         if use_multiprocessing:
             if process_get_rocoto_stat is not None:
@@ -2489,6 +3107,11 @@ def main(screen):
 
 
 if __name__ == '__main__':
+    if any(arg == '--exporter' or arg.startswith('--exporter=') for arg in sys.argv[1:]):
+        try:
+            run_exporter()
+        except KeyboardInterrupt:
+            sys.exit(0)
     if not get_rocoto_commands():
         print('\n\nCRITICAL ERROR: Rocoto run-time environment not installed')
         sys.exit(-1)
@@ -4,11 +4,13 @@ Entry point for setting up Rocoto XML for all applications in global-workflow
 """
 
 import os
+import time
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
 
 from applications.application_factory import app_config_factory
+from applications.cached_configuration import CachedConfiguration
 from rocoto.rocoto_xml_factory import rocoto_xml_factory
-from wxflow import Configuration
+from rocoto.workflow_tasks import TaskProfiler
 
 
 def input_args(*argv):
@@ -36,6 +38,8 @@ def input_args(*argv):
                         default=25, required=False)
     parser.add_argument('--verbosity', help='verbosity level of Rocoto', type=int,
                         default=10, required=False)
+    parser.add_argument('--profile', help='report the time spent sourcing configs and generating each task',
+                        action='store_true', required=False)
 
     return parser.parse_args(argv[0][0] if len(argv[0]) else None)
 
@@ -57,7 +61,10 @@ def main(*argv):
                          'taskthrottle': user_inputs.taskthrottle,
                          'verbosity': user_inputs.verbosity}
 
-    cfg = Configuration(user_inputs.expdir)
+    profiler = TaskProfiler() if user_inputs.profile else None
+    start = time.perf_counter()
+
+    cfg = CachedConfiguration(user_inputs.expdir)
 
     base = cfg.parse_config('config.base')
 
@@ -68,10 +75,15 @@ def main(*argv):
 
     # Configure the application
     app_config = app_config_factory.create(f'{net}_{mode}', cfg)
+    if profiler is not None:
+        profiler.add_phase('Source configs', time.perf_counter() - start)
 
-    # Create Rocoto Tasks and Assemble them into an XML
+    # Create Rocoto Tasks and stream them into an XML
     xml = rocoto_xml_factory.create(f'{net}_{mode}', app_config, rocoto_param_dict)
-    xml.write()
+    xml.write(profiler=profiler)
+
+    if profiler is not None:
+        print(profiler.report())
 
 
 if __name__ == '__main__':
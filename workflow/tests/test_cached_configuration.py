@@ -0,0 +1,79 @@
+import pytest
+from wxflow import Configuration
+from wxflow.configuration import ShellScriptException
+from applications.cached_configuration import CachedConfiguration
+
+
+CONFIGS = {
+    'config.base': '''
+export EXPDIR="@EXPDIR@"
+export CASE=C96
+export RUN_IN_BASE=${RUN:-none}
+not_exported="hidden"
+double() { echo "$(( $1 * 2 ))"; }
+''',
+    'config.resources': '''
+case $1 in
+  "fcst") export ntasks=48;;
+  *) export ntasks=1;;
+esac
+''',
+    'config.fcst': '''
+source "${EXPDIR}/config.resources" fcst
+export FCST_HIDDEN=${not_exported}
+export FCST_DOUBLE=$(double 21)
+''',
+    'config.anal': '''
+source "${EXPDIR}/config.resources" anal
+export ANAL_LIST="a,b,c"
+''',
+    'config.efcs': '''
+export EFCS=YES
+''',
+    'config.bad': '''
+exit 1
+''',
+}
+
+
+@pytest.fixture
+def expdir(tmp_path):
+    for name, content in CONFIGS.items():
+        (tmp_path / name).write_text(content.replace('@EXPDIR@', str(tmp_path)))
+    return tmp_path
+
+
+class TestCachedConfiguration:
+
+    def test_parse_configs(self, expdir):
+        file_lists = [['config.base'],
+                      ['config.base', 'config.fcst'],
+                      ['config.base', 'config.anal'],
+                      ['config.base', 'config.fcst', 'config.efcs']]
+
+        cfg = Configuration(expdir)
+        cached_cfg = CachedConfiguration(expdir, max_workers=2)
+
+        for run in ['gdas', 'gfs']:
+            expected = [cfg.parse_config(files, RUN=run) for files in file_lists]
+            assert cached_cfg.parse_configs(file_lists, RUN=run) == expected
+
+        fcst = cached_cfg.parse_config(['config.base', 'config.fcst'], RUN='gfs')
+        assert fcst['RUN_IN_BASE'] == 'gfs'
+        assert fcst['FCST_HIDDEN'] == 'hidden'
+        assert fcst['FCST_DOUBLE'] == 42
+        assert fcst['ntasks'] == 48
+
+    def test_cache(self, expdir):
+        cached_cfg = CachedConfiguration(expdir)
+
+        base = cached_cfg.parse_config('config.base', RUN='gfs')
+        base['CASE'] = 'C384'
+        assert cached_cfg.parse_config('config.base', RUN='gfs')['CASE'] == 'C96'
+
+        (expdir / 'config.base').write_text(CONFIGS['config.base'].replace('@EXPDIR@', str(expdir)) + 'export CASE=C48\n')
+        assert cached_cfg.parse_config('config.base', RUN='gfs')['CASE'] == 'C48'
+
+    def test_failed_config(self, expdir):
+        with pytest.raises(ShellScriptException):
+            CachedConfiguration(expdir).parse_configs([['config.base', 'config.bad']], RUN='gfs')
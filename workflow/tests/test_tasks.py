@@ -1,3 +1,4 @@
+import pytest
 from rocoto.tasks import Tasks
 
 
@@ -75,6 +76,40 @@ class TestTasks:
                        {'fhrs': [5], 'seg': 0}]
         assert Tasks.get_job_groups(fhrs=test_array, ngroups=15) == test_groups
 
+    def test_job_groups_costs(self):
+        test_array = list(range(0, 12))
+
+        # Expensive hours are spread over more groups
+        test_costs = [4.] * 6 + [1.] * 6
+        test_groups = [{'fhrs': [0, 1], 'seg': 0},
+                       {'fhrs': [2, 3], 'seg': 0},
+                       {'fhrs': [4, 5], 'seg': 0},
+                       {'fhrs': [6, 7, 8, 9, 10, 11], 'seg': 0}]
+        assert Tasks.get_job_groups(fhrs=test_array, ngroups=4, costs=test_costs) == test_groups
+
+        # Equal costs give groups of equal size
+        test_groups = [{'fhrs': [0, 1, 2], 'seg': 0},
+                       {'fhrs': [3, 4, 5], 'seg': 0},
+                       {'fhrs': [6, 7, 8], 'seg': 0},
+                       {'fhrs': [9, 10, 11], 'seg': 0}]
+        assert Tasks.get_job_groups(fhrs=test_array, ngroups=4, costs=[1.] * 12) == test_groups
+
+        # Groups are assigned to segments by cost
+        test_array = list(range(0, 24))
+        test_costs = [3.] * 12 + [1.] * 12
+        test_groups = [{'fhrs': [0, 1, 2, 3], 'seg': 0},
+                       {'fhrs': [4, 5, 6, 7], 'seg': 0},
+                       {'fhrs': [8, 9, 10, 11], 'seg': 0},
+                       {'fhrs': list(range(12, 24)), 'seg': 1}]
+        assert Tasks.get_job_groups(fhrs=test_array, ngroups=4, breakpoints=[11], costs=test_costs) == test_groups
+
+        # One expensive hour still leaves one hour per group at most
+        test_groups = Tasks.get_job_groups(fhrs=list(range(0, 4)), ngroups=4, costs=[100., 1., 1., 1.])
+        assert [grp['fhrs'] for grp in test_groups] == [[0], [1], [2], [3]]
+
+        with pytest.raises(ValueError):
+            Tasks.get_job_groups(fhrs=test_array, ngroups=4, costs=[1.] * 12)
+
     def test_multiply_HMS(self):
         assert Tasks.multiply_HMS('00:10:00', 2) == '00:20:00'
         assert Tasks.multiply_HMS('00:30:00', 10) == '05:00:00'
@@ -0,0 +1,72 @@
+from datetime import datetime
+from rocoto.workflow_graph import WorkflowGraph, parse_duration
+
+
+XML = '''
+<cycledef group="gdas">202103231800 202103241800 06:00:00</cycledef>
+<task name="gdas_prep" cycledefs="gdas">
+    <walltime>00:30:00</walltime>
+    <dependency><datadep>obs</datadep></dependency>
+</task>
+<task name="gdas_anal" cycledefs="gdas">
+    <walltime>01:00:00</walltime>
+    <dependency><and>
+        <taskdep task="gdas_prep"/>
+        <taskdep task="gdas_fcst" cycle_offset="-06:00:00"/>
+    </and></dependency>
+</task>
+<task name="gdas_fcst" cycledefs="gdas">
+    <walltime>&FCST_WALLTIME;</walltime>
+    <dependency><and>
+        <taskdep task="gdas_anal"/>
+        <taskdep task="gdas_prep"/>
+    </and></dependency>
+</task>
+<metatask name="gdas_atmos_prod" mode="serial">
+    <var name="fhr">000 003 006</var>
+    <task name="gdas_atmos_prod_f#fhr#" cycledefs="gdas">
+        <walltime>00:10:00</walltime>
+        <dependency><taskdep task="gdas_fcst"/></dependency>
+    </task>
+</metatask>
+<task name="gdas_arch" cycledefs="gdas">
+    <walltime>00:20:00</walltime>
+    <dependency><and>
+        <metataskdep metatask="gdas_atmos_prod"/>
+        <taskdep task="gdas_fcst"/>
+        <metataskdep metatask="gdas_atmos_prod"/>
+    </and></dependency>
+</task>
+'''
+
+
+def test_parse_duration():
+    assert parse_duration('01:30:00') == 5400.
+    assert parse_duration('-06:00:00') == -21600.
+    assert parse_duration('1:00:00:00') == 86400.
+    assert parse_duration(None) == 0.
+
+
+class TestWorkflowGraph:
+
+    graph = WorkflowGraph()
+    graph.add_xml(XML)
+
+    def test_expansion(self):
+        assert self.graph.metatasks['gdas_atmos_prod'] == ['gdas_atmos_prod_f000', 'gdas_atmos_prod_f003',
+                                                           'gdas_atmos_prod_f006']
+        assert self.graph.cycle_tasks(datetime(2021, 3, 24)) == list(self.graph.tasks)
+        assert self.graph.cycle_tasks(datetime(2021, 3, 24, 1)) == []
+
+    def test_critical_path(self):
+        length, path = self.graph.critical_path(list(self.graph.tasks), {'gdas_fcst': 3600.})
+        assert length == 1800. + 3600. + 3600. + 3 * 600. + 1200.
+        assert [step[0] for step in path] == ['gdas_prep', 'gdas_anal', 'gdas_fcst', 'gdas_atmos_prod_f000',
+                                              'gdas_atmos_prod_f003', 'gdas_atmos_prod_f006', 'gdas_arch']
+
+    def test_redundant_dependencies(self):
+        assert self.graph.redundant_dependencies() == [
+            ('gdas_fcst', 'taskdep gdas_prep', 'taskdep gdas_anal'),
+            ('gdas_arch', 'taskdep gdas_fcst', 'metataskdep gdas_atmos_prod'),
+            ('gdas_arch', 'metataskdep gdas_atmos_prod', 'the same dependency listed again'),
+        ]